@@ -0,0 +1,111 @@
+"""
+Compare AIService latency over a pooled keep-alive transport and fresh connections.
+
+Starts the stand-in API (deployment/api/standin.py) unless --url points at a
+running deployment, then makes the same calls twice: once through the
+shared HttpTransport, once with a new transport (new connection) per call,
+as the app did before. The stand-in's --connect-ms simulates the TCP + TLS
+setup a remote deployment costs.
+
+Usage:
+    python -m business_management.ai_http_benchmark --calls 200 --connect-ms 40 --latency-ms 5
+    python -m business_management.ai_http_benchmark --url https://ai.example.com --calls 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from business_management.services.ai_service import AIService
+from business_management.services.http_client import HttpTransport
+
+STANDIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'deployment', 'api', 'standin.py')
+
+def start_standin(connect_ms: float, latency_ms: float):
+    """Run the stand-in on a free port; returns (process, url)"""
+    process = subprocess.Popen(
+        [sys.executable, STANDIN_PATH, "--port", "0", "--connect-ms", str(connect_ms), "--latency-ms", str(latency_ms)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError(f"stand-in did not start: {line!r}")
+    return process, line[len("listening on "):]
+
+REQUESTS = (
+    lambda service, image: service.recognize_handwriting(image, "tamil"),
+    lambda service, image: service.translate_text("ராகி", "tamil", "english"),
+    lambda service, image: service.analyze_invoice_image(image),
+)
+
+def run(url: str, calls: int, threads: int, pooled: bool, image: bytes) -> list:
+    """Latency in ms of each round of calls (one handwriting, translate and invoice request)"""
+    shared = AIService(url, HttpTransport(url, pool_size=max(threads, 1))) if pooled else None
+
+    def timed(_):
+        start = time.perf_counter()
+        for request in REQUESTS:
+            if pooled:
+                result = request(shared, image)
+            else:
+                # A new connection for every request
+                transport = HttpTransport(url)
+                result = request(AIService(url, transport), image)
+                transport.close()
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(timed, range(calls)))
+    if shared is not None:
+        shared.transport.close()
+    return latencies
+
+def summary(latencies: list) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mean {statistics.mean(ordered):7.2f} ms  p50 {statistics.median(ordered):7.2f} ms  p95 {p95:7.2f} ms"
+
+def connections(url: str):
+    transport = HttpTransport(url, retries=0)
+    try:
+        return transport.get("/stats", (1, 1))["connections"]
+    except Exception:
+        return None  # not the stand-in
+    finally:
+        transport.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs unpooled AI API calls")
+    parser.add_argument("--url", help="Deployed API to call instead of starting the stand-in")
+    parser.add_argument("--calls", type=int, default=100, help="Rounds of calls per mode")
+    parser.add_argument("--threads", type=int, default=1, help="Concurrent callers")
+    parser.add_argument("--connect-ms", type=float, default=40.0, help="Stand-in delay per new connection")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stand-in delay per request")
+    parser.add_argument("--image-kb", type=int, default=64, help="Size of the uploaded image")
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if not url:
+        process, url = start_standin(args.connect_ms, args.latency_ms)
+    image = os.urandom(args.image_kb * 1024)
+    try:
+        for pooled in (True, False):
+            before = connections(url)
+            latencies = run(url, args.calls, args.threads, pooled, image)
+            after = connections(url)
+            opened = f", {after - before - 1} connections opened" if before is not None else ""
+            print(f"{'pooled  ' if pooled else 'unpooled'} {summary(latencies)} "
+                  f"({args.calls} rounds x 3 requests, {args.threads} thread(s){opened})")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
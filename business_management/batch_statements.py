@@ -0,0 +1,110 @@
+"""
+Generate ledger statements for every customer over a period, headless.
+
+Usage:
+    python -m business_management.batch_statements --start 2025-06-01 --end 2025-06-30
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from business_management.database.db_manager import DEFAULT_DB_PATH, DBManager
+from business_management.resources.customers import CUSTOMERS
+from business_management.services.statement_service import StatementService
+from business_management.utils.helpers import to_iso_date
+
+_statement_service = None
+
+def _init_worker(db_path):
+    global _statement_service
+    _statement_service = StatementService(DBManager(db_path, read_only=True))
+
+def statement_filenames(customers, start_date, end_date):
+    """
+    Map each customer key to a file name of its own
+
+    Anything outside [\w.-] becomes "_", with a short hash of the key appended
+    when that changed it so "a/b" and "a?b" get different files; names that
+    still clash (ignoring case, for case-insensitive file systems) get a counter.
+    """
+    filenames, used = {}, set()
+    for key in customers:
+        if key in filenames:
+            continue
+        safe = re.sub(r"[^\w.-]", "_", key)
+        if safe != key:
+            safe += "_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        stem, counter = f"statement_{safe}_{start_date}_to_{end_date}", 1
+        filename = f"{stem}.html"
+        while filename.casefold() in used:
+            counter += 1
+            filename = f"{stem}_{counter}.html"
+        used.add(filename.casefold())
+        filenames[key] = filename
+    return filenames
+
+def _render_customer(customer_key, start_date, end_date, output_path):
+    summary = _statement_service.render(output_path, start_date, end_date, customer_key)
+    return output_path if summary else None, summary["rows"] if summary else 0
+
+def generate_all(db_path, start_date, end_date, output_dir, workers=None, customers=None):
+    """
+    Render one statement per customer on a process pool
+
+    Each worker opens its own read-only connection to the database.
+
+    Returns:
+        Tuple of (written paths, failures as (customer_key, error), rows rendered)
+    """
+    start_date, end_date = to_iso_date(start_date), to_iso_date(end_date)
+    # Open read-write once so migrations are applied before the read-only workers start
+    db_manager = DBManager(db_path)
+    if customers is None:
+        customers = sorted(set(CUSTOMERS) | set(db_manager.get_customer_keys()))
+    os.makedirs(output_dir, exist_ok=True)
+    filenames = statement_filenames(customers, start_date, end_date)
+
+    written, failures, rows = [], [], 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as executor:
+        futures = {
+            executor.submit(_render_customer, key, start_date, end_date,
+                            os.path.join(output_dir, filenames[key])): key
+            for key in customers
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                path, count = future.result()
+            except Exception as e:
+                failures.append((key, str(e)))
+                continue
+            rows += count
+            if path:
+                written.append(path)
+    return written, failures, rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate statements for all customers")
+    parser.add_argument("--start", required=True, help="Start date (YYYY-MM-DD or DD-MM-YYYY)")
+    parser.add_argument("--end", required=True, help="End date (YYYY-MM-DD or DD-MM-YYYY)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to bills.db")
+    parser.add_argument("--output-dir", default="statements", help="Directory for the HTML statements")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--customer", action="append", help="Only this customer key (repeatable)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    written, failures, rows = generate_all(args.db, args.start, args.end, args.output_dir, args.workers, args.customer)
+    elapsed = time.perf_counter() - started
+
+    for key, error in failures:
+        print(f"FAILED {key}: {error}", file=sys.stderr)
+    print(f"Wrote {len(written)} statements ({rows} transactions) to {args.output_dir} in {elapsed:.2f}s "
+          f"({len(written) / elapsed:.1f} statements/s, {rows / elapsed:.0f} rows/s), {len(failures)} failed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
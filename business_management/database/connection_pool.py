@@ -0,0 +1,152 @@
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+# Applied to every connection when it is opened. journal_mode is persistent in
+# the database file, the others are per-connection.
+PRAGMAS = (
+    ("busy_timeout", 5000),       # first, so the pragmas below wait out other writers
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),       # negative means KiB, i.e. ~16 MB page cache
+    ("mmap_size", 268435456),     # 256 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),
+)
+
+# Size of the per-connection prepared statement cache (sqlite3 default is 128).
+STATEMENT_CACHE_SIZE = 256
+
+
+class _PooledConnection:
+    """Thread-local slot holding a connection and its transaction depth.
+
+    Only the owning thread's ``threading.local`` keeps a strong reference, so
+    when a worker thread exits the slot and its connection are released.
+    """
+
+    __slots__ = ("conn", "depth", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+
+
+class ConnectionPool:
+    """Per-thread SQLite connections for one database file.
+
+    Pools are shared process-wide: every ``DBManager`` opened on the same path
+    gets the same pool, so widgets and QThread workers reuse warm connections
+    and the statement cache instead of reconnecting on every call.
+    """
+
+    _pools: Dict[Tuple[str, bool], "ConnectionPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.schema_ready = False
+        self.schema_lock = threading.Lock()
+        self._local = threading.local()
+        self._slots = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def for_path(cls, db_path: str, read_only: bool = False) -> "ConnectionPool":
+        key = (os.path.abspath(db_path), read_only)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None or pool._closed:
+                pool = cls(key[0], read_only)
+                cls._pools[key] = pool
+            return pool
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            # Path.as_uri rather than urllib.request.pathname2url: urllib.request imports http.client and ssl
+            uri = "{}?mode=ro".format(Path(self.db_path).as_uri())
+            conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        for name, value in PRAGMAS:
+            if self.read_only and name == "journal_mode":
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _slot(self) -> _PooledConnection:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Connection pool for {self.db_path} is closed")
+            slot = _PooledConnection(self._connect())
+            self._local.slot = slot
+            with self._lock:
+                self._slots.add(slot)
+        return slot
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection (autocommit mode)."""
+        return self._slot().conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run the block in a transaction on the calling thread's connection.
+
+        Write transactions start IMMEDIATE so the write lock is taken up front;
+        upgrading a deferred read transaction can fail with SQLITE_BUSY when
+        another process is writing. Nested blocks join the outermost
+        transaction, which commits on success and rolls back if any exception
+        escapes.
+        """
+        slot = self._slot()
+        conn = slot.conn
+        if slot.depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        slot.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            slot.depth -= 1
+            if slot.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        slot.depth -= 1
+        if slot.depth == 0:
+            conn.execute("COMMIT")
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            slots = list(self._slots)
+            self._slots.clear()
+        for slot in slots:
+            try:
+                if not self.read_only:
+                    slot.conn.execute("PRAGMA optimize")
+                slot.conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+atexit.register(ConnectionPool.close_all)
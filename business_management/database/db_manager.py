@@ -1,128 +1,598 @@
-import sqlite3
 import os
-from typing import List, Optional
-from business_management.models.bill import Bill
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from itertools import groupby, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.migrations import apply_migrations
+from business_management.models.bill import Bill, BillBatch, LineItem
+from business_management.utils.helpers import to_iso_date
+from business_management.utils.product_index import ProductSearchIndex
+
+# The application's database; every page and tool uses this file unless told otherwise.
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bills.db')
+
+# Keeps "IN (...)" lookups under SQLite's host parameter limit on older builds.
+MAX_IN_PARAMS = 500
+# Sorts after every date string, as an open upper bound
+_AFTER_ALL_DATES = "\uffff"
+
+INSERT_ITEM_SQL = '''
+    INSERT INTO bill_items (bill_id, line_no, product_id, name, quantity, price_paise, total_paise, type, remarks)
+    VALUES (?, ?, (SELECT id FROM products WHERE name = ?), ?, ?, ?, ?, ?, ?)
+'''
+
+
+def item_row(bill_id: int, line_no: int, item: LineItem) -> tuple:
+    return (bill_id, line_no, item.name, item.name, item.quantity, item.price, item.total, item.type, item.remarks)
+
+
+@dataclass
+class BillFilter:
+    """Criteria for DBManager.browse_bills; None leaves a field unrestricted. Totals are paise."""
+    bill_number: Optional[int] = None
+    customer_key: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    min_total: Optional[int] = None
+    max_total: Optional[int] = None
+
+    def where(self) -> Tuple[str, list]:
+        """SQL condition on bills (deleted bills excluded) and its parameters"""
+        conditions, params = ["deleted_at IS NULL"], []
+        for column, operator, value in (
+                ("bill_number", "=", self.bill_number),
+                ("customer_key", "=", self.customer_key or None),
+                ("date", ">=", to_iso_date(self.start_date) if self.start_date else None),
+                ("date", "<=", to_iso_date(self.end_date) if self.end_date else None),
+                ("total_paise", ">=", self.min_total),
+                ("total_paise", "<=", self.max_total)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        return " AND ".join(conditions), params
+
+    def matches(self, bill: Bill) -> bool:
+        """Whether a (saved) bill meets the criteria, without asking the database"""
+        date = to_iso_date(bill.date) if bill.date else bill.date
+        return ((self.bill_number is None or bill.bill_number == self.bill_number)
+                and (not self.customer_key or bill.customer_key == self.customer_key)
+                and (not self.start_date or date >= to_iso_date(self.start_date))
+                and (not self.end_date or date <= to_iso_date(self.end_date))
+                and (self.min_total is None or bill.total_amount >= self.min_total)
+                and (self.max_total is None or bill.total_amount <= self.max_total))
+
+
+@dataclass
+class BulkSaveResult:
+    saved: int = 0
+    # (bill_number, reason) for every bill that was skipped; bill_number is
+    # None for a bill that came without one (no number is used up for it)
+    conflicts: List[Tuple[Optional[int], str]] = field(default_factory=list)
+
 
 class DBManager:
-    def __init__(self, db_path: str):
+    # One product search index per database file, shared like the connection pool.
+    _product_indexes: Dict[str, ProductSearchIndex] = {}
+    _product_indexes_lock = threading.Lock()
+
+    def __init__(self, db_path: str, read_only: bool = False):
         self.db_path = db_path
-        self._initialize_database()
+        self._pool = ConnectionPool.for_path(db_path, read_only)
+        if not read_only:
+            self._initialize_database()
 
     def _initialize_database(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bills (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    bill_number INTEGER NOT NULL UNIQUE,
-                    customer_key TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    items TEXT NOT NULL,
-                    total_amount REAL NOT NULL,
-                    transaction_type TEXT NOT NULL,
-                    remarks TEXT
-                )
-            ''')
-            # Add product master table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE
-                )
-            ''')
-            conn.commit()
+        # Schema setup runs once per database file, not once per widget.
+        with self._pool.schema_lock:
+            if self._pool.schema_ready:
+                return
+            with self._pool.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS bills (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        bill_number INTEGER NOT NULL UNIQUE,
+                        customer_key TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        items TEXT NOT NULL,
+                        total_amount REAL NOT NULL,
+                        transaction_type TEXT NOT NULL,
+                        remarks TEXT
+                    )
+                ''')
+                # Add product master table
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS products (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL UNIQUE
+                    )
+                ''')
+                apply_migrations(conn)
+            self._pool.schema_ready = True
 
     def save_bill(self, bill: Bill):
-        import json
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO bills (bill_number, customer_key, date, items, total_amount, transaction_type, remarks)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+        """Insert a bill with its items and ledger entry in one transaction.
+
+        If bill.bill_number is None the next number is allocated from the
+        bill sequence within the same transaction and set on the bill.
+        """
+        with self._pool.transaction() as conn:
+            if bill.bill_number is None:
+                bill.bill_number = self._allocate_bill_numbers(conn, 1)
+            else:
+                self._advance_bill_sequence(conn, bill.bill_number + 1)
+            cursor = conn.execute('''
+                INSERT INTO bills (bill_number, customer_key, date, total_paise, transaction_type, remarks)
+                VALUES (?, ?, ?, ?, ?, ?)
             ''', (
                 bill.bill_number,
                 bill.customer_key,
-                bill.date,
-                json.dumps(bill.items),
+                to_iso_date(bill.date),
                 bill.total_amount,
                 bill.transaction_type,
                 bill.remarks
             ))
-            conn.commit()
-
-    def get_bill(self, bill_number: int) -> Optional[Bill]:
-        import json
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT bill_number, customer_key, date, items, total_amount, transaction_type, remarks FROM bills WHERE bill_number = ?', (bill_number,))
-            row = cursor.fetchone()
-            if row:
-                return Bill(
-                    bill_number=row[0],
-                    customer_key=row[1],
-                    date=row[2],
-                    items=json.loads(row[3]),
-                    total_amount=row[4],
-                    transaction_type=row[5],
-                    remarks=row[6] or ""
-                )
-        return None
-
-    def get_bills(self, start_date: str, end_date: str, customer_key: Optional[str] = None) -> List[Bill]:
-        import json
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            query = "SELECT bill_number, customer_key, date, items, total_amount, transaction_type, remarks FROM bills WHERE date BETWEEN ? AND ?"
-            params = [start_date, end_date]
-            if customer_key:
-                query += " AND customer_key = ?"
-                params.append(customer_key)
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            bills = [
-                Bill(
-                    bill_number=row[0],
-                    customer_key=row[1],
-                    date=row[2],
-                    items=json.loads(row[3]),
-                    total_amount=row[4],
-                    transaction_type=row[5],
-                    remarks=row[6] or ""
-                ) for row in rows
-            ]
-            return bills
-
-    def get_total_amount(self, start_date: str, end_date: str, transaction_type: Optional[str] = None) -> float:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            query = "SELECT SUM(total_amount) FROM bills WHERE date BETWEEN ? AND ?"
-            params = [start_date, end_date]
-            if transaction_type:
-                query += " AND transaction_type = ?"
-                params.append(transaction_type)
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            return result[0] if result and result[0] is not None else 0.0
+            bill_id = cursor.lastrowid
+            conn.executemany(INSERT_ITEM_SQL, (item_row(bill_id, line_no, item) for line_no, item in enumerate(bill.items)))
+            self._post_to_ledger(conn, bill.customer_key, to_iso_date(bill.date), bill.transaction_type, bill.total_amount)
+
+    def save_bills(self, bills: Iterable[Bill], batch_size: int = 1000,
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> BulkSaveResult:
+        """Insert many bills, one transaction and a few executemany calls per batch.
+
+        Bills whose bill_number already exists (in the database or earlier in
+        the input) or whose date cannot be parsed are skipped and reported in
+        the result's conflicts instead of aborting the batch.
+        progress_callback(processed, saved) is called after each batch commits.
+        """
+        result = BulkSaveResult()
+        seen = set()
+        processed = 0
+        bills = iter(bills)
+        while True:
+            batch = list(islice(bills, batch_size))
+            if not batch:
+                break
+            processed += len(batch)
+            with self._pool.transaction() as conn:
+                result.saved += self._save_batch(conn, batch, seen, result.conflicts)
+            if progress_callback:
+                progress_callback(processed, result.saved)
+        return result
+
+    def _save_batch(self, conn, batch: List[Bill], seen: set, conflicts: List[Tuple[Optional[int], str]]) -> int:
+        existing = set()
+        numbers = [bill.bill_number for bill in batch if bill.bill_number is not None]
+        for start in range(0, len(numbers), MAX_IN_PARAMS):
+            chunk = numbers[start:start + MAX_IN_PARAMS]
+            existing.update(row[0] for row in conn.execute(
+                f"SELECT bill_number FROM bills WHERE bill_number IN ({','.join('?' * len(chunk))})", chunk))
+
+        # Validate first, so skipped bills don't use up sequence numbers
+        accepted = []
+        for bill in batch:
+            if bill.bill_number is not None and (bill.bill_number in existing or bill.bill_number in seen):
+                conflicts.append((bill.bill_number, "duplicate bill_number"))
+                continue
+            try:
+                date = to_iso_date(bill.date)
+            except ValueError as e:
+                conflicts.append((bill.bill_number, str(e)))
+                continue
+            if bill.bill_number is not None:
+                seen.add(bill.bill_number)
+            accepted.append((bill, date))
+        if not accepted:
+            return 0
+
+        numbered = [bill.bill_number for bill, _ in accepted if bill.bill_number is not None]
+        if numbered:
+            self._advance_bill_sequence(conn, max(numbered) + 1)
+        # Allocated past every number in the batch, so they can't collide with it
+        unnumbered = [bill for bill, _ in accepted if bill.bill_number is None]
+        if unnumbered:
+            first = self._allocate_bill_numbers(conn, len(unnumbered))
+            for offset, bill in enumerate(unnumbered):
+                bill.bill_number = first + offset
+                seen.add(bill.bill_number)
+
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM bills').fetchone()[0]
+        conn.executemany('''
+            INSERT INTO bills (bill_number, customer_key, date, total_paise, transaction_type, remarks)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(bill.bill_number, bill.customer_key, date, bill.total_amount, bill.transaction_type, bill.remarks)
+              for bill, date in accepted])
+        # The write lock is held since BEGIN IMMEDIATE, so every id above last_id is ours
+        ids = dict(conn.execute('SELECT bill_number, id FROM bills WHERE id > ?', (last_id,)))
+        conn.executemany(INSERT_ITEM_SQL, (
+            item_row(ids[bill.bill_number], line_no, item)
+            for bill, _ in accepted
+            for line_no, item in enumerate(bill.items)
+        ))
+
+        self._post_many_to_ledger(conn, ((bill.customer_key, date, bill.transaction_type, bill.total_amount)
+                                         for bill, date in accepted))
+        return len(accepted)
+
+    @staticmethod
+    def _allocate_bill_numbers(conn, count: int) -> int:
+        first = conn.execute("SELECT next_value FROM bill_sequence WHERE name = 'bill_number'").fetchone()[0]
+        conn.execute("UPDATE bill_sequence SET next_value = next_value + ? WHERE name = 'bill_number'", (count,))
+        return first
+
+    @staticmethod
+    def _advance_bill_sequence(conn, at_least: int):
+        conn.execute(
+            "UPDATE bill_sequence SET next_value = MAX(next_value, ?) WHERE name = 'bill_number'",
+            (at_least,)
+        )
+
+    def peek_next_bill_number(self) -> int:
+        """The number the next save_bill would allocate (not reserved)."""
+        conn = self._pool.connection()
+        return conn.execute("SELECT next_value FROM bill_sequence WHERE name = 'bill_number'").fetchone()[0]
+
+    def reserve_bill_numbers(self, count: int) -> range:
+        """Atomically reserve a block of bill numbers, e.g. for a bulk import."""
+        with self._pool.transaction() as conn:
+            first = self._allocate_bill_numbers(conn, count)
+        return range(first, first + count)
+
+    def seed_bill_number(self, next_value: int):
+        """Make sure the sequence never hands out a number below next_value."""
+        with self._pool.transaction() as conn:
+            self._advance_bill_sequence(conn, next_value)
+
+    @staticmethod
+    def _post_to_ledger(conn, customer_key: str, date: str, transaction_type: str, amount: int):
+        """Add (or with a negative amount, reverse) a bill's paise in ledger_daily.
+
+        The day's row starts from the previous day's running balance, then
+        the change is carried into that day and every later day.
+        """
+        debit, credit = (amount, 0) if transaction_type == "Debit" else (0, amount)
+        conn.execute('''
+            INSERT INTO ledger_daily (customer_key, date, debit_paise, credit_paise, balance_paise)
+            VALUES (?, ?, ?, ?, COALESCE(
+                (SELECT balance_paise FROM ledger_daily WHERE customer_key = ? AND date < ? ORDER BY date DESC LIMIT 1), 0))
+            ON CONFLICT (customer_key, date) DO UPDATE SET
+                debit_paise = debit_paise + excluded.debit_paise,
+                credit_paise = credit_paise + excluded.credit_paise
+        ''', (customer_key, date, debit, credit, customer_key, date))
+        conn.execute(
+            'UPDATE ledger_daily SET balance_paise = balance_paise + ? WHERE customer_key = ? AND date >= ?',
+            (debit - credit, customer_key, date)
+        )
+        conn.execute(
+            'DELETE FROM ledger_daily WHERE customer_key = ? AND date = ? AND debit_paise = 0 AND credit_paise = 0',
+            (customer_key, date)
+        )
+
+    @staticmethod
+    def _post_many_to_ledger(conn, entries: Iterable[Tuple[str, str, str, int]]):
+        """_post_to_ledger for many (customer_key, date, transaction_type, amount) entries at once.
+
+        Amounts are summed per customer and day first. Days new to the
+        ledger are inserted carrying the balance before them, then each
+        customer's running balance takes the batch's cumulative change with
+        one range UPDATE per posted day, so SQLite rewrites the later rows
+        rather than Python.
+        """
+        daily = {}
+        for customer_key, date, transaction_type, amount in entries:
+            debit, credit = daily.get((customer_key, date), (0, 0))
+            if transaction_type == "Debit":
+                debit += amount
+            else:
+                credit += amount
+            daily[(customer_key, date)] = (debit, credit)
+        conn.executemany('''
+            INSERT INTO ledger_daily (customer_key, date, debit_paise, credit_paise, balance_paise)
+            VALUES (?, ?, 0, 0, COALESCE(
+                (SELECT balance_paise FROM ledger_daily WHERE customer_key = ? AND date < ? ORDER BY date DESC LIMIT 1), 0))
+            ON CONFLICT (customer_key, date) DO NOTHING
+        ''', [(customer_key, date, customer_key, date) for customer_key, date in daily])
+        conn.executemany(
+            'UPDATE ledger_daily SET debit_paise = debit_paise + ?, credit_paise = credit_paise + ? '
+            'WHERE customer_key = ? AND date = ?',
+            [(debit, credit, customer_key, date) for (customer_key, date), (debit, credit) in daily.items()]
+        )
+        # Between two posted days every row moves by the change up to the first of them
+        shifts, change, previous = [], 0, None
+        for (customer_key, date), (debit, credit) in sorted(daily.items()):
+            if customer_key != previous:
+                if previous is not None:
+                    shifts[-1][3] = _AFTER_ALL_DATES
+                change, previous = 0, customer_key
+            elif shifts:
+                shifts[-1][3] = date
+            change += debit - credit
+            shifts.append([change, customer_key, date, None])
+        if shifts:
+            shifts[-1][3] = _AFTER_ALL_DATES
+        conn.executemany(
+            'UPDATE ledger_daily SET balance_paise = balance_paise + ? WHERE customer_key = ? AND date >= ? AND date < ?',
+            [shift for shift in shifts if shift[0]]
+        )
+        conn.executemany(
+            'DELETE FROM ledger_daily WHERE customer_key = ? AND date = ? AND debit_paise = 0 AND credit_paise = 0',
+            list(daily)
+        )
+
+    @staticmethod
+    def _row_to_bill(row, items: Optional[List[LineItem]] = None) -> Bill:
+        return Bill(
+            bill_number=row[1],
+            customer_key=row[2],
+            date=row[3],
+            items=items if items is not None else [],
+            total_amount=row[4],
+            transaction_type=row[5],
+            remarks=row[6] or ""
+        )
+
+    @staticmethod
+    def _row_to_item(row) -> LineItem:
+        return LineItem(name=row[1], price=row[3], quantity=row[2], total=row[4], type=row[5], remarks=row[6])
+
+    def _load_items(self, conn, bill_filter: str, params) -> Dict[int, List[LineItem]]:
+        rows = conn.execute(
+            f'SELECT bill_id, name, quantity, price_paise, total_paise, type, remarks FROM bill_items '
+            f'WHERE bill_id IN ({bill_filter}) ORDER BY bill_id, line_no',
+            params
+        )
+        return {
+            bill_id: [self._row_to_item(row) for row in group]
+            for bill_id, group in groupby(rows, key=lambda row: row[0])
+        }
+
+    def get_bill(self, bill_number: int, include_items: bool = True) -> Optional[Bill]:
+        conn = self._pool.connection()
+        row = conn.execute('SELECT id, bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills WHERE bill_number = ? AND deleted_at IS NULL', (bill_number,)).fetchone()
+        if not row:
+            return None
+        items = None
+        if include_items:
+            items = self._load_items(conn, '?', (row[0],)).get(row[0], [])
+        return self._row_to_bill(row, items)
+
+    def get_bills_by_number(self, bill_numbers: Iterable[int]) -> Dict[int, Bill]:
+        """bill_number -> Bill with items for those of bill_numbers that exist, in one query per chunk."""
+        conn = self._pool.connection()
+        numbers = list(bill_numbers)
+        bills = {}
+        for start in range(0, len(numbers), MAX_IN_PARAMS):
+            chunk = numbers[start:start + MAX_IN_PARAMS]
+            rows = conn.execute(
+                f"SELECT id, bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills "
+                f"WHERE bill_number IN ({','.join('?' * len(chunk))}) AND deleted_at IS NULL", chunk).fetchall()
+            if not rows:
+                continue
+            ids = [row[0] for row in rows]
+            items = self._load_items(conn, ','.join('?' * len(ids)), ids)
+            for row in rows:
+                bills[row[1]] = self._row_to_bill(row, items.get(row[0], []))
+        return bills
+
+    def browse_bills(self, bill_filter: BillFilter, before: Optional[int] = None, limit: int = 200) -> List[Bill]:
+        """
+        One page of bills matching bill_filter, newest (highest number) first, without items
+
+        Keyset pagination: pass the last bill_number of the previous page as
+        before to get the next one, so every page is an index seek rather
+        than an OFFSET scan over the pages already seen.
+        """
+        conn = self._pool.connection()
+        where, params = bill_filter.where()
+        if before is not None:
+            where += " AND bill_number < ?"
+            params.append(before)
+        rows = conn.execute(
+            f"SELECT id, bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills "
+            f"WHERE {where} ORDER BY bill_number DESC LIMIT ?", params + [limit])
+        return [self._row_to_bill(row) for row in rows]
+
+    def get_bills(self, start_date: str, end_date: str, customer_key: Optional[str] = None,
+                  include_items: bool = True) -> List[Bill]:
+        """Bills dated within the range; pass include_items=False to skip loading line items."""
+        conn = self._pool.connection()
+        where = "date BETWEEN ? AND ? AND deleted_at IS NULL"
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if customer_key:
+            where += " AND customer_key = ?"
+            params.append(customer_key)
+        rows = conn.execute(f"SELECT id, bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills WHERE {where}", params).fetchall()
+        if not include_items:
+            return [self._row_to_bill(row) for row in rows]
+        items = self._load_items(conn, f"SELECT id FROM bills WHERE {where}", params)
+        return [self._row_to_bill(row, items.get(row[0], [])) for row in rows]
+
+    def get_bills_columnar(self, start_date: str, end_date: str, customer_key: Optional[str] = None,
+                           include_items: bool = True) -> BillBatch:
+        """Bills dated within the range, in date order, as one columnar BillBatch (for reports)."""
+        conn = self._pool.connection()
+        where = "b.date BETWEEN ? AND ? AND b.deleted_at IS NULL"
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if customer_key:
+            where += " AND b.customer_key = ?"
+            params.append(customer_key)
+        batch = BillBatch()
+        add_bill = batch.add_bill
+        if not include_items:
+            for row in conn.execute(
+                    f"SELECT bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills b "
+                    f"WHERE {where} ORDER BY b.date, b.bill_number", params):
+                add_bill(*row)
+            return batch
+        add_item = batch.add_item
+        last_id, bill_row = None, -1
+        for row in conn.execute(f'''
+                SELECT b.id, b.bill_number, b.customer_key, b.date, b.total_paise, b.transaction_type, b.remarks,
+                       bi.name, bi.quantity, bi.price_paise, bi.total_paise, bi.type, bi.remarks
+                FROM bills b LEFT JOIN bill_items bi ON bi.bill_id = b.id
+                WHERE {where} ORDER BY b.date, b.bill_number, bi.line_no''', params):
+            if row[0] != last_id:
+                last_id = row[0]
+                bill_row = add_bill(row[1], row[2], row[3], row[4], row[5], row[6])
+            if row[7] is not None:
+                add_item(bill_row, row[7], row[8], row[9], row[10], row[11], row[12])
+        return batch
+
+    def iter_bills(self, start_date: str, end_date: str, customer_key: Optional[str] = None,
+                   chunk_size: int = 1000) -> Iterator[Bill]:
+        """Stream bills in the range in date order, without items, fetching chunk_size rows at a time."""
+        conn = self._pool.connection()
+        query = "SELECT id, bill_number, customer_key, date, total_paise, transaction_type, remarks FROM bills WHERE date BETWEEN ? AND ? AND deleted_at IS NULL"
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if customer_key:
+            query += " AND customer_key = ?"
+            params.append(customer_key)
+        query += " ORDER BY date, bill_number"
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._row_to_bill(row)
+
+    def get_product_sales(self, start_date: str, end_date: str, customer_key: Optional[str] = None) -> List[Tuple[str, float, int]]:
+        """(name, total quantity, total paise) per product sold in the range, best sellers first."""
+        conn = self._pool.connection()
+        query = '''
+            SELECT bi.name, SUM(bi.quantity), SUM(bi.total_paise)
+            FROM bill_items bi JOIN bills b ON b.id = bi.bill_id
+            WHERE b.date BETWEEN ? AND ? AND b.transaction_type = 'Debit' AND b.deleted_at IS NULL
+        '''
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if customer_key:
+            query += " AND b.customer_key = ?"
+            params.append(customer_key)
+        query += " GROUP BY bi.name ORDER BY SUM(bi.total_paise) DESC"
+        return conn.execute(query, params).fetchall()
+
+    def get_bill_numbers(self) -> List[int]:
+        conn = self._pool.connection()
+        return [row[0] for row in conn.execute('SELECT bill_number FROM bills WHERE deleted_at IS NULL ORDER BY bill_number ASC')]
+
+    def get_customer_keys(self) -> List[str]:
+        """Every customer that has at least one bill."""
+        conn = self._pool.connection()
+        return [row[0] for row in conn.execute('SELECT DISTINCT customer_key FROM ledger_daily ORDER BY customer_key')]
+
+    def get_total_amount(self, start_date: str, end_date: str, transaction_type: Optional[str] = None) -> int:
+        """Sum of bill totals in the range, in paise."""
+        conn = self._pool.connection()
+        query = "SELECT SUM(total_paise) FROM bills WHERE date BETWEEN ? AND ? AND deleted_at IS NULL"
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if transaction_type:
+            query += " AND transaction_type = ?"
+            params.append(transaction_type)
+        result = conn.execute(query, params).fetchone()
+        return result[0] if result and result[0] is not None else 0
 
     def get_products(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT name FROM products ORDER BY name ASC')
-            return [row[0] for row in cursor.fetchall()]
+        conn = self._pool.connection()
+        return [row[0] for row in conn.execute('SELECT name FROM products ORDER BY name ASC')]
+
+    @property
+    def product_index(self) -> ProductSearchIndex:
+        """Search index over the product master, built on first use."""
+        with self._product_indexes_lock:
+            index = self._product_indexes.get(self._pool.db_path)
+            if index is None:
+                index = ProductSearchIndex(self.get_products())
+                self._product_indexes[self._pool.db_path] = index
+            return index
 
     def add_product(self, name: str):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute('INSERT INTO products (name) VALUES (?)', (name.strip(),))
-                conn.commit()
-                return True
-            except sqlite3.IntegrityError:
-                return False
+        try:
+            with self._pool.transaction() as conn:
+                conn.execute('INSERT INTO products (name) VALUES (?)', (name.strip(),))
+        except sqlite3.IntegrityError:
+            return False
+        index = self._product_indexes.get(self._pool.db_path)
+        if index is not None:
+            index.add(name)
+        return True
+
+    def get_opening_balance(self, as_of_date: str, customer_key: Optional[str] = None) -> int:
+        """Debit minus credit of all bills dated before as_of_date, in paise.
+
+        One index seek per customer on ledger_daily, independent of history length.
+        For all customers, the customer keys are walked with one primary-key
+        seek each (a skip-scan) rather than DISTINCT over every ledger row.
+        """
+        conn = self._pool.connection()
+        as_of_date = to_iso_date(as_of_date)
+        if customer_key:
+            row = conn.execute(
+                'SELECT balance_paise FROM ledger_daily WHERE customer_key = ? AND date < ? ORDER BY date DESC LIMIT 1',
+                (customer_key, as_of_date)
+            ).fetchone()
+        else:
+            row = conn.execute('''
+                WITH RECURSIVE customers (customer_key) AS (
+                    SELECT MIN(customer_key) FROM ledger_daily
+                    UNION ALL
+                    SELECT (SELECT MIN(customer_key) FROM ledger_daily WHERE customer_key > c.customer_key)
+                    FROM customers c WHERE c.customer_key IS NOT NULL
+                )
+                SELECT SUM((SELECT balance_paise FROM ledger_daily l
+                            WHERE l.customer_key = c.customer_key AND l.date < ?
+                            ORDER BY l.date DESC LIMIT 1))
+                FROM customers c WHERE c.customer_key IS NOT NULL
+            ''', (as_of_date,)).fetchone()
+        return row[0] if row and row[0] is not None else 0
+
+    def get_ledger_totals(self, start_date: str, end_date: str, customer_key: Optional[str] = None) -> Tuple[int, int]:
+        """(total debit, total credit) in paise for the range, summed from the daily ledger."""
+        conn = self._pool.connection()
+        query = "SELECT SUM(debit_paise), SUM(credit_paise) FROM ledger_daily WHERE date BETWEEN ? AND ?"
+        params = [to_iso_date(start_date), to_iso_date(end_date)]
+        if customer_key:
+            query += " AND customer_key = ?"
+            params.append(customer_key)
+        debit, credit = conn.execute(query, params).fetchone()
+        return debit or 0, credit or 0
 
     def delete_bill(self, bill_number: int) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM bills WHERE bill_number = ?', (bill_number,))
-            conn.commit()
-            return cursor.rowcount > 0
+        return bool(self.delete_bills([bill_number]))
+
+    def delete_bills(self, bill_numbers: Iterable[int]) -> List[int]:
+        """Soft-delete bills and reverse them out of the ledger, all in one transaction.
+
+        The rows stay in bills with deleted_at set (see restore_bill).
+        Returns the numbers actually deleted; unknown or already deleted
+        ones are ignored.
+        """
+        numbers = list(dict.fromkeys(bill_numbers))
+        with self._pool.transaction() as conn:
+            rows = []
+            for start in range(0, len(numbers), MAX_IN_PARAMS):
+                chunk = numbers[start:start + MAX_IN_PARAMS]
+                rows.extend(conn.execute(
+                    f"SELECT bill_number, customer_key, date, transaction_type, total_paise FROM bills "
+                    f"WHERE bill_number IN ({','.join('?' * len(chunk))}) AND deleted_at IS NULL", chunk))
+            if not rows:
+                return []
+            conn.executemany("UPDATE bills SET deleted_at = datetime('now') WHERE bill_number = ?",
+                             [(row[0],) for row in rows])
+            self._post_many_to_ledger(conn, ((customer_key, date, transaction_type, -total)
+                                             for _, customer_key, date, transaction_type, total in rows))
+        return [row[0] for row in rows]
+
+    def restore_bill(self, bill_number: int) -> bool:
+        """Undo delete_bill: bring a soft-deleted bill back into queries and the ledger."""
+        with self._pool.transaction() as conn:
+            row = conn.execute(
+                'SELECT customer_key, date, transaction_type, total_paise FROM bills '
+                'WHERE bill_number = ? AND deleted_at IS NOT NULL',
+                (bill_number,)
+            ).fetchone()
+            if not row:
+                return False
+            conn.execute('UPDATE bills SET deleted_at = NULL WHERE bill_number = ?', (bill_number,))
+            self._post_to_ledger(conn, *row)
+            return True
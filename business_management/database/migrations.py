@@ -0,0 +1,261 @@
+import json
+import sqlite3
+from business_management.utils.helpers import to_iso_date
+
+# Schema migrations, applied in order on top of the original (version 0)
+# schema. The database's PRAGMA user_version records the last one applied.
+
+
+def _normalize_bill_items(conn: sqlite3.Connection):
+    """Move the JSON ``bills.items`` blob into a ``bill_items`` child table."""
+    conn.execute('''
+        CREATE TABLE bills_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bill_number INTEGER NOT NULL UNIQUE,
+            customer_key TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            transaction_type TEXT NOT NULL,
+            remarks TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bills_new (id, bill_number, customer_key, date, total_amount, transaction_type, remarks)
+        SELECT id, bill_number, customer_key, date, total_amount, transaction_type, remarks FROM bills
+    ''')
+    legacy_items = conn.execute('SELECT id, items FROM bills').fetchall()
+    conn.execute('DROP TABLE bills')
+    conn.execute('ALTER TABLE bills_new RENAME TO bills')
+    conn.execute('''
+        CREATE TABLE bill_items (
+            id INTEGER PRIMARY KEY,
+            bill_id INTEGER NOT NULL REFERENCES bills(id) ON DELETE CASCADE,
+            line_no INTEGER NOT NULL,
+            product_id INTEGER REFERENCES products(id),
+            name TEXT NOT NULL,
+            quantity NUMERIC NOT NULL,
+            price REAL NOT NULL,
+            total REAL NOT NULL,
+            type TEXT NOT NULL,
+            remarks TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_bill_items_bill ON bill_items (bill_id, line_no)')
+    conn.execute('CREATE INDEX idx_bill_items_product ON bill_items (product_id)')
+    conn.execute('CREATE INDEX idx_bill_items_name ON bill_items (name)')
+
+    def rows():
+        for bill_id, items_json in legacy_items:
+            try:
+                items = json.loads(items_json) if items_json else []
+            except ValueError:
+                items = []
+            for line_no, item in enumerate(items):
+                yield _legacy_item_row(bill_id, line_no, item)
+
+    conn.executemany(_LEGACY_ITEM_SQL, rows())
+
+
+def _iso_dates(conn: sqlite3.Connection):
+    """Rewrite legacy bill dates (e.g. dd-mm-yyyy) as ISO-8601 and index them.
+
+    Values that cannot be parsed, such as the empty dates written by older
+    builds, are left untouched. The distinct dates are parsed into a
+    temporary old -> new table and a single UPDATE rewrites the bills
+    through it, so bills is scanned once rather than once per distinct date.
+    """
+    def renamed():
+        for (value,) in conn.execute('SELECT DISTINCT date FROM bills').fetchall():
+            try:
+                iso = to_iso_date(value)
+            except ValueError:
+                continue
+            if iso != value:
+                yield value, iso
+
+    conn.execute('CREATE TEMP TABLE iso_dates (date TEXT PRIMARY KEY, iso TEXT NOT NULL) WITHOUT ROWID')
+    conn.executemany('INSERT INTO iso_dates (date, iso) VALUES (?, ?)', renamed())
+    conn.execute('''
+        UPDATE bills SET date = (SELECT iso FROM iso_dates WHERE iso_dates.date = bills.date)
+        WHERE date IN (SELECT date FROM iso_dates)
+    ''')
+    conn.execute('DROP TABLE temp.iso_dates')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bills_customer_date ON bills (customer_key, date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bills_date ON bills (date)')
+
+
+def _ledger_daily(conn: sqlite3.Connection):
+    """Per-customer daily debit/credit totals with a running balance.
+
+    ``balance`` is the customer's debit minus credit up to and including
+    ``date``, so the balance as of any day is a single index seek.
+    """
+    conn.execute('''
+        CREATE TABLE ledger_daily (
+            customer_key TEXT NOT NULL,
+            date TEXT NOT NULL,
+            debit REAL NOT NULL DEFAULT 0,
+            credit REAL NOT NULL DEFAULT 0,
+            balance REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (customer_key, date)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX idx_ledger_daily_date ON ledger_daily (date)')
+    conn.execute('''
+        INSERT INTO ledger_daily (customer_key, date, debit, credit, balance)
+        SELECT customer_key, date, debit, credit,
+               SUM(debit - credit) OVER (PARTITION BY customer_key ORDER BY date)
+        FROM (
+            SELECT customer_key, date,
+                   SUM(CASE WHEN transaction_type = 'Debit' THEN total_amount ELSE 0 END) AS debit,
+                   SUM(CASE WHEN transaction_type = 'Debit' THEN 0 ELSE total_amount END) AS credit
+            FROM bills
+            GROUP BY customer_key, date
+        )
+    ''')
+
+
+def _bill_sequence(conn: sqlite3.Connection):
+    """Database-side bill number counter, replacing ``Bill Number.txt``."""
+    conn.execute('''
+        CREATE TABLE bill_sequence (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bill_sequence (name, next_value)
+        SELECT 'bill_number', COALESCE(MAX(bill_number), 0) + 1 FROM bills
+    ''')
+
+
+def _integer_money(conn: sqlite3.Connection):
+    """Store money as INTEGER paise instead of REAL rupees.
+
+    bills and bill_items are rebuilt with ``*_paise`` columns. The new
+    bill_items references the new bills table, so the old tables can be
+    dropped without cascading; the rename then points the foreign key back at
+    ``bills``. The daily ledger is recomputed from the converted totals.
+    """
+    conn.execute('''
+        CREATE TABLE bills_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bill_number INTEGER NOT NULL UNIQUE,
+            customer_key TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total_paise INTEGER NOT NULL,
+            transaction_type TEXT NOT NULL,
+            remarks TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bills_new (id, bill_number, customer_key, date, total_paise, transaction_type, remarks)
+        SELECT id, bill_number, customer_key, date, CAST(ROUND(total_amount * 100) AS INTEGER), transaction_type, remarks
+        FROM bills
+    ''')
+    conn.execute('''
+        CREATE TABLE bill_items_new (
+            id INTEGER PRIMARY KEY,
+            bill_id INTEGER NOT NULL REFERENCES bills_new(id) ON DELETE CASCADE,
+            line_no INTEGER NOT NULL,
+            product_id INTEGER REFERENCES products(id),
+            name TEXT NOT NULL,
+            quantity NUMERIC NOT NULL,
+            price_paise INTEGER NOT NULL,
+            total_paise INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            remarks TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO bill_items_new (id, bill_id, line_no, product_id, name, quantity, price_paise, total_paise, type, remarks)
+        SELECT id, bill_id, line_no, product_id, name, quantity,
+               CAST(ROUND(price * 100) AS INTEGER), CAST(ROUND(total * 100) AS INTEGER), type, remarks
+        FROM bill_items
+    ''')
+    conn.execute('DROP TABLE bill_items')
+    conn.execute('DROP TABLE bills')
+    conn.execute('ALTER TABLE bills_new RENAME TO bills')
+    conn.execute('ALTER TABLE bill_items_new RENAME TO bill_items')
+    conn.execute('CREATE INDEX idx_bills_customer_date ON bills (customer_key, date)')
+    conn.execute('CREATE INDEX idx_bills_date ON bills (date)')
+    conn.execute('CREATE INDEX idx_bill_items_bill ON bill_items (bill_id, line_no)')
+    conn.execute('CREATE INDEX idx_bill_items_product ON bill_items (product_id)')
+    conn.execute('CREATE INDEX idx_bill_items_name ON bill_items (name)')
+
+    conn.execute('DROP TABLE ledger_daily')
+    conn.execute('''
+        CREATE TABLE ledger_daily (
+            customer_key TEXT NOT NULL,
+            date TEXT NOT NULL,
+            debit_paise INTEGER NOT NULL DEFAULT 0,
+            credit_paise INTEGER NOT NULL DEFAULT 0,
+            balance_paise INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (customer_key, date)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX idx_ledger_daily_date ON ledger_daily (date)')
+    conn.execute('''
+        INSERT INTO ledger_daily (customer_key, date, debit_paise, credit_paise, balance_paise)
+        SELECT customer_key, date, debit, credit,
+               SUM(debit - credit) OVER (PARTITION BY customer_key ORDER BY date)
+        FROM (
+            SELECT customer_key, date,
+                   SUM(CASE WHEN transaction_type = 'Debit' THEN total_paise ELSE 0 END) AS debit,
+                   SUM(CASE WHEN transaction_type = 'Debit' THEN 0 ELSE total_paise END) AS credit
+            FROM bills
+            GROUP BY customer_key, date
+        )
+    ''')
+
+
+def _soft_delete(conn: sqlite3.Connection):
+    """Flag deleted bills with ``deleted_at`` instead of removing their rows.
+
+    Deleted bills are left out of every query and reversed out of the daily
+    ledger, and their numbers are never reused. The customer index serves
+    the bill browser's customer filter in bill number order.
+    """
+    conn.execute('ALTER TABLE bills ADD COLUMN deleted_at TEXT')
+    conn.execute('CREATE INDEX idx_bills_customer_number ON bills (customer_key, bill_number)')
+
+
+MIGRATIONS = [
+    (1, _normalize_bill_items),
+    (2, _iso_dates),
+    (3, _ledger_daily),
+    (4, _bill_sequence),
+    (5, _integer_money),
+    (6, _soft_delete),
+]
+
+# Line items as migration 1 wrote them from the legacy JSON (REAL rupees);
+# migration 5 converts them to paise.
+_LEGACY_ITEM_SQL = '''
+    INSERT INTO bill_items (bill_id, line_no, product_id, name, quantity, price, total, type, remarks)
+    VALUES (?, ?, (SELECT id FROM products WHERE name = ?), ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _legacy_item_row(bill_id: int, line_no: int, item: dict) -> tuple:
+    name = item.get("name", "")
+    return (
+        bill_id,
+        line_no,
+        name,
+        name,
+        item.get("quantity", 0),
+        item.get("price", 0.0),
+        item.get("total", 0.0),
+        item.get("type", "Debit"),
+        item.get("remarks"),
+    )
+
+
+def apply_migrations(conn: sqlite3.Connection):
+    """Bring the schema up to date. Must be called inside a transaction."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, migrate in MIGRATIONS:
+        if target > version:
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {target}')
@@ -0,0 +1,242 @@
+"""
+Benchmarks of the database layer on synthetic bills.db files built in a temporary folder.
+
+pool: per-call latency of get_bill, save_bill and get_products through the
+shared ConnectionPool, against a fresh sqlite3 connection per call (how
+DBManager worked before the pool), at each database size.
+
+ingest: bills per second through save_bills (at each batch size) into a
+fresh database, against one save_bill call per bill. The bills are built
+before the clock starts. The request's target is 50k bills/s.
+
+columnar: loads a year of bills (--bills of them) with get_bills, as
+slotted Bill and LineItem objects, and with get_bills_columnar, as one
+BillBatch of array columns, then totals product sales from each. Each runs
+in its own process, which reports load time, aggregation time and peak RSS
+growth.
+
+Usage:
+    python -m business_management.db_benchmark pool
+    python -m business_management.db_benchmark pool --sizes 10000 100000 1000000 --calls 3000
+    python -m business_management.db_benchmark ingest --bills 200000 --batch-sizes 1000 10000
+    python -m business_management.db_benchmark columnar --bills 300000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+from business_management.models.bill import Bill, LineItem
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+CUSTOMERS = ("kvs", "anand", "sri", "ravi", "meena", "lakshmi", "bala", "devi")
+PRODUCTS = ("Ragi", "Kambu", "Cholam", "Salt", "Sugar", "Toor Dal", "Rice", "Oil")
+FIRST_DAY = datetime.date(2020, 1, 1)
+
+def synthetic_bills(count: int, days: int = 5 * 365, seed: int = 0) -> Iterator[Bill]:
+    """count numbered bills spread over days, mostly debits with 1-4 lines, the rest single-line credits"""
+    rng = random.Random(seed)
+    for number in range(1, count + 1):
+        customer = rng.choice(CUSTOMERS)
+        date = (FIRST_DAY + datetime.timedelta(days=rng.randrange(days))).isoformat()
+        if rng.random() < 0.8:
+            items = []
+            for _ in range(rng.randint(1, 4)):
+                price, quantity = rng.randint(500, 20000), rng.randint(1, 10)
+                items.append(LineItem(rng.choice(PRODUCTS), price, quantity, price * quantity))
+            yield Bill(number, customer, date, items, sum(item.total for item in items), "Debit")
+        else:
+            amount = rng.randint(1000, 500000)
+            yield Bill(number, customer, date, [LineItem("Cash", 0, 0, amount, "Credit", "Cash")], amount, "Credit", "Cash")
+
+def build_database(path: str, count: int) -> DBManager:
+    db = DBManager(path)
+    db.save_bills(synthetic_bills(count), batch_size=10000)
+    for name in PRODUCTS:
+        db.add_product(name)
+    return db
+
+class FreshConnections:
+    """Stands in for DBManager's pool: a new default sqlite3 connection for every call, as before the pool"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def connection(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, isolation_level=None)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True):
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+def time_calls(db: DBManager, count: int, calls: int, first_new: int) -> dict:
+    """Microseconds per call of get_bill (random numbers), save_bill and get_products"""
+    rng = random.Random(1)
+    numbers = [rng.randint(1, count) for _ in range(calls)]
+    report = {}
+    start = time.perf_counter()
+    for number in numbers:
+        db.get_bill(number)
+    report["get_bill"] = (time.perf_counter() - start) / calls * 1e6
+
+    saves = max(1, calls // 10)
+    start = time.perf_counter()
+    for offset in range(saves):
+        db.save_bill(Bill(first_new + offset, "kvs", "2025-01-02", [LineItem("Ragi", 4000, 1, 4000)], 4000, "Debit"))
+    report["save_bill"] = (time.perf_counter() - start) / saves * 1e6
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        db.get_products()
+    report["get_products"] = (time.perf_counter() - start) / calls * 1e6
+    return report
+
+def bench_pool(args):
+    print(f"{'bills':>9} {'mode':<7}{'get_bill':>14}{'save_bill':>14}{'get_products':>16}")
+    with tempfile.TemporaryDirectory() as folder:
+        for count in args.sizes:
+            path = os.path.join(folder, f"bills_{count}.db")
+            build_database(path, count)
+            for mode in ("fresh", "pooled"):
+                db = DBManager(path)
+                if mode == "fresh":
+                    db._pool = FreshConnections(path)
+                first_new = count + 1 + (0 if mode == "fresh" else args.calls)
+                report = time_calls(db, count, args.calls, first_new)
+                print(f"{count:>9} {mode:<7}" + "".join(f"{report[name]:>11.1f} us" for name in ("get_bill", "save_bill"))
+                      + f"{report['get_products']:>13.1f} us")
+            ConnectionPool.for_path(path).close()
+
+def bench_ingest(args):
+    bills = list(synthetic_bills(args.bills))
+    lines = sum(len(bill.items) for bill in bills)
+    print(f"{len(bills)} bills, {lines} lines, over {len({bill.date for bill in bills})} days")
+    # A paper ledger is entered in date order; scanner output and merges arrive back-dated,
+    # which makes every batch carry its change into the later days of the ledger
+    orders = {"in date order": sorted(bills, key=lambda bill: bill.date), "random dates": bills}
+    with tempfile.TemporaryDirectory() as folder:
+        runs = [("save_bill", "random dates", None)] + [
+            (f"save_bills batch {size}", order, size) for order in orders for size in args.batch_sizes]
+        for name, order, batch_size in runs:
+            path = os.path.join(folder, f"{len(os.listdir(folder))}.db")
+            db = DBManager(path)
+            # One call per bill takes a commit each: a sample is enough
+            sample = orders[order] if batch_size else orders[order][:args.single_bills]
+            start = time.perf_counter()
+            if batch_size:
+                result = db.save_bills(sample, batch_size=batch_size)
+                assert result.saved == len(sample) and not result.conflicts
+            else:
+                for bill in sample:
+                    db.save_bill(bill)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<24}{order:<15}{len(sample) / elapsed:>10,.0f} bills/s  "
+                  f"({len(sample)} bills in {elapsed:.2f} s)")
+            ConnectionPool.for_path(path).close()
+
+def object_product_sales(bills):
+    """BillBatch.product_sales over Bill objects"""
+    quantities, totals = defaultdict(float), defaultdict(int)
+    for bill in bills:
+        if bill.transaction_type == "Debit":
+            for item in bill.items:
+                quantities[item.name] += item.quantity
+                totals[item.name] += item.total
+    return sorted(((name, quantities[name], totals[name]) for name in totals), key=lambda sale: sale[2], reverse=True)
+
+def measure_columnar(mode: str, db_path: str) -> dict:
+    """Load the year in this process: seconds, aggregation ms and peak RSS above the baseline"""
+    db = DBManager(db_path, read_only=True)
+    start_date, end_date = FIRST_DAY.isoformat(), (FIRST_DAY + datetime.timedelta(days=364)).isoformat()
+    db.get_bill_numbers()  # open the connection before the baseline
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    start = time.perf_counter()
+    if mode == "objects":
+        bills = db.get_bills(start_date, end_date)
+    else:
+        bills = db.get_bills_columnar(start_date, end_date)
+    report = {"load_s": time.perf_counter() - start}
+    if resource:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        report["peak_mb"] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) * scale / 2 ** 20
+    start = time.perf_counter()
+    sales = object_product_sales(bills) if mode == "objects" else bills.product_sales()
+    report["aggregate_ms"] = (time.perf_counter() - start) * 1000
+    report["sales_paise"] = sum(total for _, _, total in sales)
+    report["bills"] = len(bills)
+    ConnectionPool.for_path(db_path).close()
+    return report
+
+def bench_columnar(args):
+    if args.mode:
+        print(json.dumps(measure_columnar(args.mode, args.db)))
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bills.db")
+        db = DBManager(path)
+        db.save_bills(synthetic_bills(args.bills, days=365), batch_size=10000)
+        ConnectionPool.for_path(path).close()
+        reports = {}
+        for mode in ("objects", "columnar"):
+            reports[mode] = json.loads(subprocess.run(
+                [sys.executable, "-m", "business_management.db_benchmark", "columnar", "--mode", mode, "--db", path],
+                check=True, stdout=subprocess.PIPE, text=True).stdout)
+    assert reports["objects"]["sales_paise"] == reports["columnar"]["sales_paise"], "the two loads disagree"
+    print(f"{reports['objects']['bills']} bills over a year")
+    print(f"{'load':<10}{'time':>9}{'product sales':>16}{'peak RSS growth':>18}")
+    for mode, report in reports.items():
+        rss = f"{report['peak_mb']:>15.1f} MB" if "peak_mb" in report else f"{'-':>18}"
+        print(f"{mode:<10}{report['load_s']:>7.2f} s{report['aggregate_ms']:>13.0f} ms{rss}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the database layer on synthetic bills")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pool = commands.add_parser("pool", help="Per-call latency, pooled vs a fresh connection per call")
+    pool.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Bills in each database")
+    pool.add_argument("--calls", type=int, default=2000, help="get_bill/get_products calls (a tenth as many saves)")
+    pool.set_defaults(run=bench_pool)
+
+    ingest = commands.add_parser("ingest", help="Bulk save_bills throughput against save_bill")
+    ingest.add_argument("--bills", type=int, default=200000, help="Bills to save per run")
+    ingest.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000], help="save_bills batch sizes")
+    ingest.add_argument("--single-bills", type=int, default=2000, help="Bills saved one save_bill call at a time")
+    ingest.set_defaults(run=bench_ingest)
+
+    columnar = commands.add_parser("columnar", help="Memory of a year of bills as objects against a BillBatch")
+    columnar.add_argument("--bills", type=int, default=300000, help="Bills in the year")
+    # Child processes, one per load, so each reports its own peak memory
+    columnar.add_argument("--mode", choices=("objects", "columnar"), help=argparse.SUPPRESS)
+    columnar.add_argument("--db", help=argparse.SUPPRESS)
+    columnar.set_defaults(run=bench_columnar)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Compare an image scan chained through bytes with the same steps on one ImageBuffer.
+
+Each ImageService method decodes its input and encodes its output, so a scan
+that preprocesses, finds text regions, crops one and makes a preview pays a
+decode and a PNG encode per step. The ImageBuffer chain decodes once and
+encodes once. Both run on a 12 MP (4000x3000) synthetic photo unless --image
+is given, each mode in its own process so its peak memory can be reported.
+
+It also times ImageBuffer.enhance against the PIL ImageEnhance/ImageFilter
+chain it replaced, and reports how far their pixels differ.
+
+Usage:
+    python -m business_management.image_benchmark --repeat 5
+    python -m business_management.image_benchmark --image invoice.jpg
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from business_management.services.image_service import ImageBuffer, ImageService
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+STAGES = ("preprocess", "regions", "crop", "preview", "encode")
+PREVIEW_SIZE = (800, 600)
+
+def synthetic_photo(path: str, width: int = 4000, height: int = 3000):
+    """A JPEG like a phone photo of an invoice: lit paper, sensor noise, rows of dark 'text'"""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(0)
+    shade = np.linspace(170, 230, width, dtype=np.float32)[None, :] + np.linspace(0, 20, height, dtype=np.float32)[:, None]
+    image = np.clip(shade + rng.normal(0, 6, (height, width)), 0, 255).astype(np.uint8)
+    for top in range(300, height - 300, 120):
+        for left in range(300, width - 600, 700):
+            cv2.rectangle(image, (left, top), (left + int(rng.integers(200, 550)), top + 40), 40, -1)
+    cv2.imwrite(path, cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+def largest(regions):
+    return max(regions, key=lambda box: box[2] * box[3])
+
+def run_bytes(image_data: bytes) -> dict:
+    """Every step through ImageService: decode in, encode out"""
+    times = {}
+    start = time.perf_counter()
+    processed = ImageService.preprocess_image(image_data)
+    times["preprocess"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    regions = ImageService.detect_text_regions(processed)
+    times["regions"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ImageService.crop_image_region(processed, largest(regions))
+    times["crop"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ImageService.resize_image(processed, PREVIEW_SIZE)
+    times["preview"] = time.perf_counter() - start
+    times["encode"] = 0.0  # every step above already encoded its result
+    return times
+
+def run_buffer(image_data: bytes) -> dict:
+    """The same steps on one ImageBuffer, encoding the results once at the end"""
+    times = {}
+    start = time.perf_counter()
+    processed = ImageBuffer.decode(image_data, grayscale=True).enhance()
+    times["preprocess"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    regions = processed.text_regions()
+    times["regions"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crop = processed.crop(largest(regions))
+    times["crop"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preview = processed.resize(PREVIEW_SIZE)
+    times["preview"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processed.encode()
+    crop.encode()
+    preview.encode()
+    times["encode"] = time.perf_counter() - start
+    return times
+
+MODES = {"bytes": run_bytes, "buffer": run_buffer}
+
+def pil_enhance(gray):
+    """The PIL chain ImageBuffer.enhance replaced, as the reference for its output"""
+    import numpy as np
+    from PIL import Image, ImageEnhance, ImageFilter
+    image = Image.fromarray(gray)
+    image = ImageEnhance.Contrast(image).enhance(1.5)
+    image = ImageEnhance.Sharpness(image).enhance(1.2)
+    image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
+    return np.asarray(image)
+
+def compare_enhance(image_path: str, repeat: int) -> dict:
+    """Median time of the PIL chain and of enhance on the decoded photo, and their pixel differences"""
+    import numpy as np
+    with open(image_path, 'rb') as f:
+        gray = ImageBuffer.decode(f.read(), grayscale=True).pixels
+    report = {}
+    for name, enhance in (("pil", lambda: pil_enhance(gray)), ("fused", lambda: ImageBuffer(gray).enhance().pixels)):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            report[name + "_pixels"] = enhance()
+            times.append(time.perf_counter() - start)
+        report[name] = statistics.median(times)
+    diff = np.abs(report.pop("pil_pixels").astype(np.int16) - report.pop("fused_pixels"))
+    report.update(mean_diff=float(diff.mean()), max_diff=int(diff.max()), within_2=float((diff <= 2).mean()))
+    return report
+
+def measure(mode: str, image_path: str, repeat: int) -> dict:
+    """Run one mode repeat times in this process: median seconds per stage, and peak RSS"""
+    # Loaded up front so the libraries themselves don't count towards the peak
+    importlib.import_module("cv2")
+    importlib.import_module("numpy")
+    with open(image_path, 'rb') as f:
+        image_data = f.read()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    runs = [MODES[mode](image_data) for _ in range(repeat)]
+    report = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+    if resource:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        report["peak_mb"] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) * scale / 2 ** 20
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark chaining image steps through bytes vs one ImageBuffer")
+    parser.add_argument("--image", help="Photo to use instead of a synthetic 12 MP one")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode (median reported)")
+    # Child processes: each starts with the peak RSS of the process that ran it, so the
+    # parent stays small and even the synthetic photo is drawn in a child of its own
+    parser.add_argument("--mode", choices=sorted(MODES) + ["photo", "enhance"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode == "photo":
+        synthetic_photo(args.image)
+        return
+    if args.mode == "enhance":
+        print(json.dumps(compare_enhance(args.image, args.repeat)))
+        return
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.image, args.repeat)))
+        return
+
+    def child(mode: str, image_path: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-m", "business_management.image_benchmark", "--mode", mode,
+             "--image", image_path, "--repeat", str(args.repeat)],
+            check=True, stdout=subprocess.PIPE, text=True).stdout
+
+    with tempfile.TemporaryDirectory() as folder:
+        image_path = args.image
+        if not image_path:
+            image_path = os.path.join(folder, "photo.jpg")
+            child("photo", image_path)
+        reports = {mode: json.loads(child(mode, image_path)) for mode in MODES}
+        enhance = json.loads(child("enhance", image_path))
+
+    print(f"{'stage':<12}" + "".join(f"{mode:>12}" for mode in MODES))
+    for stage in STAGES:
+        print(f"{stage:<12}" + "".join(f"{reports[mode][stage] * 1000:>9.1f} ms" for mode in MODES))
+    totals = {mode: sum(reports[mode][stage] for stage in STAGES) for mode in MODES}
+    print(f"{'total':<12}" + "".join(f"{totals[mode] * 1000:>9.1f} ms" for mode in MODES))
+    if resource:
+        print(f"{'peak memory':<12}" + "".join(f"{reports[mode]['peak_mb']:>9.1f} MB" for mode in MODES))
+    print(f"\nenhance: PIL chain {enhance['pil'] * 1000:.1f} ms, fused {enhance['fused'] * 1000:.1f} ms "
+          f"({enhance['pil'] / enhance['fused']:.1f}x); pixel difference mean {enhance['mean_diff']:.2f}, "
+          f"max {enhance['max_diff']}, {enhance['within_2']:.2%} within 2 levels")
+
+if __name__ == "__main__":
+    main()
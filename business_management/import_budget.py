@@ -0,0 +1,88 @@
+"""
+Check that importing the app stays cheap: no heavy AI dependencies and an import-time budget.
+
+Runs ``python -X importtime`` in fresh interpreters and fails (exit code 1)
+if the module pulls in any of the deferred dependencies or its cumulative
+import time exceeds the budget. Meant for CI and for checking a change that
+touches imports.
+
+Usage:
+    python -m business_management.import_budget
+    python -m business_management.import_budget --budget-ms 80 --module business_management.main
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Must only be imported once an AI feature is used (see utils.lazy_import)
+DEFERRED_MODULES = ("cv2", "numpy", "PIL", "requests", "torch", "tensorflow", "easyocr", "pytesseract")
+DEFAULT_MODULE = "business_management.main"
+DEFAULT_BUDGET_MS = 80
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+def measure(module: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Import module in a fresh interpreter
+
+    Returns:
+        Tuple of (cumulative import time of module in ms, cumulative
+        microseconds of every module imported along the way)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        if match.group(4) == "site" and not match.group(3):
+            cumulative.clear()  # interpreter startup, not part of the import being measured
+        else:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative.get(module, 0) / 1000, cumulative
+
+def check(module: str = DEFAULT_MODULE, budget_ms: float = DEFAULT_BUDGET_MS, runs: int = 3) -> List[str]:
+    """
+    Problems found importing module (empty if it is within budget)
+
+    The fastest of runs is compared against the budget to filter out noise
+    from a busy machine.
+    """
+    timings, imported = [], {}
+    for _ in range(runs):
+        elapsed, imported = measure(module)
+        timings.append(elapsed)
+    problems = []
+    heavy = sorted({name.split(".")[0] for name in imported} & set(DEFERRED_MODULES))
+    if heavy:
+        problems.append(f"import {module} loads deferred modules: {', '.join(heavy)}")
+    if min(timings) > budget_ms:
+        slowest = sorted(((us, name) for name, us in imported.items() if name != module), reverse=True)[:10]
+        details = "\n".join(f"    {us / 1000:8.1f} ms  {name}" for us, name in slowest)
+        problems.append(f"import {module} took {min(timings):.1f} ms (budget {budget_ms:.0f} ms); "
+                        f"largest cumulative imports:\n{details}")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the app")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Cumulative import time budget")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to try (the fastest counts)")
+    args = parser.parse_args(argv)
+
+    problems = check(args.module, args.budget_ms, args.runs)
+    for problem in problems:
+        print(f"FAILED {problem}", file=sys.stderr)
+    if not problems:
+        print(f"import {args.module} is within {args.budget_ms:.0f} ms and loads no deferred modules")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,21 @@
+import importlib
 import sys
 from PyQt5.QtWidgets import QApplication, QStackedWidget, QWidget, QVBoxLayout, QHBoxLayout, QPushButton
-from business_management.ui.enhanced_bill_generator import EnhancedBillGeneratorWidget
-from business_management.ui.statement_generator import StatementGeneratorWidget
-from business_management.ui.product_master import ProductMasterWidget
-from business_management.ui.bill_delete import BillDeleteWidget
+from PyQt5.QtCore import QTimer
+from business_management.ui.components.item_entry import CompletionThread
+from business_management.database.connection_pool import ConnectionPool
+from business_management.services.data_service import DataService
+from business_management.services.http_client import HttpTransport
+from business_management.ui.product_master import ensure_initial_products
+
+# (attribute, module, widget class) of each page, in navigation order. Pages
+# are imported and built the first time they are shown.
+PAGES = (
+    ("bill_gen", "business_management.ui.enhanced_bill_generator", "EnhancedBillGeneratorWidget"),
+    ("statement_gen", "business_management.ui.statement_generator", "StatementGeneratorWidget"),
+    ("product_master", "business_management.ui.product_master", "ProductMasterWidget"),
+    ("bill_delete", "business_management.ui.bill_delete", "BillDeleteWidget"),
+)
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -49,31 +61,43 @@ class MainWindow(QWidget):
         nav_layout.addWidget(self.btn_delete)
         layout.addLayout(nav_layout)
         
-        # Stacked widget for different views
+        # Stacked widget for different views; only the bill generator is built up front
         self.stacked_widget = QStackedWidget()
-        
-        # Enhanced bill generator with AI features
-        self.bill_gen = EnhancedBillGeneratorWidget()
-        self.statement_gen = StatementGeneratorWidget()
-        self.product_master = ProductMasterWidget()
-        self.bill_delete = BillDeleteWidget()
-        
-        self.stacked_widget.addWidget(self.bill_gen)
-        self.stacked_widget.addWidget(self.statement_gen)
-        self.stacked_widget.addWidget(self.product_master)
-        self.stacked_widget.addWidget(self.bill_delete)
+        self.bill_gen = self.statement_gen = self.product_master = self.bill_delete = None
+        self.show_page("bill_gen")
         
         layout.addWidget(self.stacked_widget)
         self.setLayout(layout)
         
         # Connect navigation buttons
-        self.btn_bill.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.bill_gen))
-        self.btn_statement.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.statement_gen))
-        self.btn_product.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.product_master))
-        self.btn_delete.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.bill_delete))
+        self.btn_bill.clicked.connect(lambda: self.show_page("bill_gen"))
+        self.btn_statement.clicked.connect(lambda: self.show_page("statement_gen"))
+        self.btn_product.clicked.connect(lambda: self.show_page("product_master"))
+        self.btn_delete.clicked.connect(lambda: self.show_page("bill_delete"))
+
+        # Seed the product master (formerly done by building its page at
+        # startup) once the window has painted; pages showing products get
+        # the new ones through DataService.product_added.
+        QTimer.singleShot(0, lambda: ensure_initial_products(DataService.instance()))
+
+    def show_page(self, name):
+        """Switch to a page, importing and building it on first use"""
+        page = getattr(self, name)
+        if page is None:
+            module, class_name = next((module, class_name) for attr, module, class_name in PAGES if attr == name)
+            page = getattr(importlib.import_module(module), class_name)()
+            setattr(self, name, page)
+            self.stacked_widget.addWidget(page)
+        self.stacked_widget.setCurrentWidget(page)
 
 if __name__ == "__main__":
+    # Batch invoice scanning preprocesses on spawned worker processes
+    import multiprocessing
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(CompletionThread.stop_all)
+    app.aboutToQuit.connect(ConnectionPool.close_all)
+    app.aboutToQuit.connect(HttpTransport.close_all)
     
     # Set application style
     app.setStyleSheet("""
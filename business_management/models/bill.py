@@ -1,12 +1,201 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+class LineItem(NamedTuple):
+    """One line of a bill. price and total are integer paise."""
+    name: str
+    price: int
+    quantity: Union[int, float]
+    total: int
+    type: str = "Debit"
+    remarks: Optional[str] = None
 
-@dataclass
 class Bill:
-    bill_number: int
-    customer_key: str
-    date: str
-    items: List[Dict[str, Any]]
-    total_amount: float
-    transaction_type: str
-    remarks: str = ""
+    """
+    A bill with its line items; total_amount is integer paise
+
+    Slotted (no per-instance __dict__) since reports load bills by the
+    thousand. Written out rather than as a dataclass because slots=True
+    needs Python 3.10.
+    """
+
+    __slots__ = ("bill_number", "customer_key", "date", "items", "total_amount", "transaction_type", "remarks")
+
+    def __init__(self, bill_number: Optional[int], customer_key: str, date: str, items: List[LineItem],
+                 total_amount: int, transaction_type: str, remarks: str = ""):
+        self.bill_number = bill_number  # None until DBManager.save_bill allocates one
+        self.customer_key = customer_key
+        self.date = date
+        self.items = items
+        self.total_amount = total_amount
+        self.transaction_type = transaction_type
+        self.remarks = remarks
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self.__slots__, self._fields()))
+        return f"Bill({fields})"
+
+class _Categories:
+    """String column stored as small integer codes plus the distinct values"""
+
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def append(self, value: str):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+    def code(self, value: str) -> Optional[int]:
+        return self._index.get(value)
+
+class BillBatch:
+    """
+    Bills (and optionally their lines) stored column by column
+
+    Each column is an array of machine integers/doubles rather than a list
+    of Bill/LineItem objects, so a year of bills costs a few bytes per
+    field. Dates are YYYYMMDD integers (0 for a date that isn't ISO, such
+    as an empty legacy date, whose text is kept in other_dates), money is
+    paise, and repeated strings (customers, transaction types, product
+    names) are stored as codes into a list of distinct values. The arrays
+    support the buffer protocol, so numpy.frombuffer can wrap them without
+    copying. Item remarks, set on few lines, are kept by line in item_remarks.
+
+    Line columns are parallel to each other; item_rows[i] is the bill row
+    that line i belongs to. Lines must be added right after their bill, so
+    a bill's lines are the slice item_starts[row]:item_starts[row + 1].
+    """
+
+    __slots__ = ("bill_numbers", "dates", "other_dates", "totals", "customers", "types", "remarks", "item_starts",
+                 "item_rows", "item_names", "quantities", "prices", "item_totals", "item_types", "item_remarks")
+
+    def __init__(self):
+        self.bill_numbers = array("q")
+        self.dates = array("i")
+        # row -> the stored date, for the rare dates that aren't ISO (0 in dates)
+        self.other_dates: Dict[int, str] = {}
+        self.totals = array("q")
+        self.customers = _Categories()
+        self.types = _Categories()
+        self.remarks: List[str] = []
+        self.item_starts = array("I", [0])
+        self.item_rows = array("I")
+        self.item_names = _Categories()
+        self.quantities = array("d")
+        self.prices = array("q")
+        self.item_totals = array("q")
+        self.item_types = _Categories()
+        # line -> remarks, for the few lines (credits) that have any
+        self.item_remarks: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.bill_numbers)
+
+    def add_bill(self, bill_number: int, customer_key: str, date: str, total: int,
+                 transaction_type: str, remarks: Optional[str]) -> int:
+        row = len(self.bill_numbers)
+        self.bill_numbers.append(bill_number)
+        self.customers.append(customer_key)
+        number = _date_number(date)
+        if not number:
+            self.other_dates[row] = date
+        self.dates.append(number)
+        self.totals.append(total)
+        self.types.append(transaction_type)
+        self.remarks.append(remarks or "")
+        self.item_starts.append(len(self.item_rows))
+        return row
+
+    def add_item(self, row: int, name: str, quantity, price: int, total: int, item_type: str,
+                 remarks: Optional[str] = None):
+        if remarks is not None:
+            self.item_remarks[len(self.item_rows)] = remarks
+        self.item_rows.append(row)
+        self.item_names.append(name)
+        self.quantities.append(quantity)
+        self.prices.append(price)
+        self.item_totals.append(total)
+        self.item_types.append(item_type)
+        self.item_starts[-1] = len(self.item_rows)
+
+    def date(self, row: int) -> str:
+        value = self.dates[row]
+        if not value:
+            return self.other_dates[row]
+        return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
+
+    def bill(self, row: int, with_items: bool = True) -> Bill:
+        """Materialize one row as a Bill"""
+        items = []
+        if with_items:
+            items = [self.item(i) for i in range(self.item_starts[row], self.item_starts[row + 1])]
+        return Bill(self.bill_numbers[row], self.customers[row], self.date(row), items,
+                    self.totals[row], self.types[row], self.remarks[row])
+
+    def item(self, i: int) -> LineItem:
+        quantity = self.quantities[i]
+        if quantity.is_integer():
+            quantity = int(quantity)
+        return LineItem(self.item_names[i], self.prices[i], quantity, self.item_totals[i], self.item_types[i],
+                        self.item_remarks.get(i))
+
+    def __iter__(self) -> Iterator[Bill]:
+        """Bills without their items, one at a time."""
+        for row in range(len(self)):
+            yield self.bill(row, with_items=False)
+
+    def totals_by_type(self) -> Dict[str, int]:
+        """transaction type -> sum of bill totals (paise)"""
+        sums = [0] * len(self.types.values)
+        for code, total in zip(self.types.codes, self.totals):
+            sums[code] += total
+        return dict(zip(self.types.values, sums))
+
+    def balances_by_customer(self) -> Dict[str, int]:
+        """customer -> debits minus credits (paise)"""
+        sign = [1 if value == "Debit" else -1 for value in self.types.values]
+        sums = [0] * len(self.customers.values)
+        for customer, code, total in zip(self.customers.codes, self.types.codes, self.totals):
+            sums[customer] += sign[code] * total
+        return dict(zip(self.customers.values, sums))
+
+    def product_sales(self) -> List[Tuple[str, float, int]]:
+        """(name, total quantity, total paise) per product on debit bills, best sellers first"""
+        debit = self.types.code("Debit")
+        names = self.item_names.values
+        quantities, totals, sold = [0.0] * len(names), [0] * len(names), set()
+        bill_types = self.types.codes
+        for row, name, quantity, total in zip(self.item_rows, self.item_names.codes, self.quantities, self.item_totals):
+            if bill_types[row] == debit:
+                quantities[name] += quantity
+                totals[name] += total
+                sold.add(name)
+        return sorted(((names[code], quantities[code], totals[code]) for code in sold),
+                      key=lambda sale: sale[2], reverse=True)
+
+def _date_number(date: str) -> int:
+    """ISO date as a YYYYMMDD integer, or 0 if it is not an ISO date (see BillBatch.other_dates)"""
+    if len(date) != 10 or date[4] != "-" or date[7] != "-":
+        return 0
+    digits = date[:4] + date[5:7] + date[8:]
+    return int(digits) if digits.isascii() and digits.isdigit() else 0
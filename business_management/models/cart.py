@@ -0,0 +1,161 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from business_management.models.bill import LineItem
+
+# Listener events. "inserting"/"removing"/"resetting" fire before the list
+# changes and "inserted"/"removed"/"reset" after, so Qt models can wrap the
+# change in begin*/end* calls; "updated" fires after a line was modified.
+CartListener = Callable[[str, Optional[int]], None]
+
+class Cart:
+    """
+    Lines of the bill being edited
+
+    Lines are LineItems with money in paise. Adding a name that is already
+    on the bill (case-insensitively) merges into that line through a
+    casefolded name -> row index, and the bill total (paise) is kept up to
+    date as lines change, so neither needs a pass over the lines.
+    Every change can be undone and redone.
+    """
+
+    def __init__(self, items: Iterable[LineItem] = ()):
+        self.items: List[LineItem] = []
+        self.total = 0
+        self._rows: Dict[str, int] = {}
+        self._undo: List[tuple] = []
+        self._redo: List[tuple] = []
+        self._listeners: List[CartListener] = []
+        self._reset(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add_listener(self, listener: CartListener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: CartListener):
+        self._listeners.remove(listener)
+
+    def find(self, name: str) -> Optional[int]:
+        return self._rows.get(name.strip().casefold())
+
+    def add(self, item: LineItem) -> int:
+        """Add a line, or merge its quantity and total into the line with the same name; returns the row"""
+        row = self.find(item.name)
+        if row is None:
+            row = self._add(item)
+            self._record(("add", row, item))
+        else:
+            self._merge(row, item.quantity, item.total)
+            self._record(("merge", row, item.quantity, item.total))
+        return row
+
+    def remove(self, row: int):
+        item = self._remove(row)
+        self._record(("remove", row, item))
+
+    def replace(self, items: Iterable[LineItem]):
+        """Replace all lines at once (e.g. from a scanned invoice), merging duplicates"""
+        old_items = self.items
+        self._reset(items)
+        self._record(("replace", old_items, self.items))
+
+    def clear(self):
+        if self.items:
+            self.replace(())
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> bool:
+        if not self._undo:
+            return False
+        change = self._undo.pop()
+        kind = change[0]
+        if kind == "add":
+            self._remove(change[1])
+        elif kind == "merge":
+            self._merge(change[1], -change[2], -change[3])
+        elif kind == "remove":
+            self._add(change[2], change[1])
+        else:
+            self._reset(change[1])
+        self._redo.append(change)
+        return True
+
+    def redo(self) -> bool:
+        if not self._redo:
+            return False
+        change = self._redo.pop()
+        kind = change[0]
+        if kind == "add":
+            self._add(change[2], change[1])
+        elif kind == "merge":
+            self._merge(change[1], change[2], change[3])
+        elif kind == "remove":
+            self._remove(change[1])
+        else:
+            self._reset(change[2])
+        self._undo.append(change)
+        return True
+
+    def _record(self, change: tuple):
+        self._undo.append(change)
+        self._redo.clear()
+
+    def _notify(self, event: str, row: Optional[int] = None):
+        for listener in self._listeners:
+            listener(event, row)
+
+    def _add(self, item: LineItem, row: Optional[int] = None) -> int:
+        row = len(self.items) if row is None else row
+        self._notify("inserting", row)
+        self.items.insert(row, item)
+        self.total += item.total
+        if row == len(self.items) - 1:
+            self._rows[item.name.strip().casefold()] = row
+        else:
+            self._reindex(row)
+        self._notify("inserted", row)
+        return row
+
+    def _merge(self, row: int, quantity, total: int):
+        item = self.items[row]
+        self.items[row] = item._replace(quantity=item.quantity + quantity, total=item.total + total)
+        self.total += total
+        self._notify("updated", row)
+
+    def _remove(self, row: int) -> LineItem:
+        self._notify("removing", row)
+        item = self.items.pop(row)
+        self.total -= item.total
+        del self._rows[item.name.strip().casefold()]
+        self._reindex(row)
+        self._notify("removed", row)
+        return item
+
+    def _reset(self, items: Iterable[LineItem]):
+        self._notify("resetting")
+        self.items = []
+        self.total = 0
+        self._rows = {}
+        for item in items:
+            key = item.name.strip().casefold()
+            row = self._rows.get(key)
+            if row is None:
+                self._rows[key] = len(self.items)
+                self.items.append(item)
+            else:
+                line = self.items[row]
+                self.items[row] = line._replace(quantity=line.quantity + item.quantity, total=line.total + item.total)
+            self.total += item.total
+        self._notify("reset")
+
+    def _reindex(self, start: int):
+        for row in range(start, len(self.items)):
+            self._rows[self.items[row].name.strip().casefold()] = row
@@ -0,0 +1,202 @@
+"""
+Benchmarks of invoice and statement rendering, written into a temporary folder.
+
+statement: seconds and peak memory to render one customer's statement of
+--transactions rows (500k by default) with StatementService, which streams
+rows from a cursor through the cached template into the file, against the
+approach it replaced: get_bills into a list, the rows concatenated into one
+string, the template read and str.format-ed per call. Each runs in its own
+process so its peak memory can be reported.
+
+invoice: microseconds per invoice to write --invoices invoices (10k by
+default) of --lines lines each with InvoiceService, which keeps the
+template compiled and checks only its mtime, against reading the template
+and str.format-ing it for every invoice as the bill generators did, to a
+file per invoice and to os.devnull. Both must write the same files.
+
+Usage:
+    python -m business_management.render_benchmark statement
+    python -m business_management.render_benchmark statement --transactions 1000000
+    python -m business_management.render_benchmark invoice --invoices 10000 --lines 20
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterator
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+from business_management.models.bill import Bill, LineItem
+from business_management.resources.customers import CUSTOMERS
+from business_management.services.invoice_service import INVOICE_TEMPLATE_PATH, InvoiceService
+from business_management.services.statement_service import STATEMENT_TEMPLATE_PATH, StatementService
+from business_management.utils.money import format_rupees
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+CUSTOMER = "kvs"
+FIRST_DAY = datetime.date(2024, 1, 1)
+DAYS = 366
+
+def statement_bills(count: int) -> Iterator[Bill]:
+    """count bills for one customer over a year in date order, one in four a credit"""
+    for number in range(count):
+        date = (FIRST_DAY + datetime.timedelta(days=number * DAYS // count)).isoformat()
+        amount = 100 + number % 50000
+        if number % 4:
+            yield Bill(None, CUSTOMER, date, [], amount, "Debit")
+        else:
+            yield Bill(None, CUSTOMER, date, [], amount, "Credit", "Cash")
+
+def legacy_statement(db: DBManager, output_path: str, start_date: str, end_date: str, customer_key: str):
+    """How StatementGeneratorWidget rendered before StatementService, with amounts in paise"""
+    bills = db.get_bills(start_date, end_date, customer_key, include_items=False)
+    opening_balance = db.get_opening_balance(start_date, customer_key)
+    total_debit, total_credit = db.get_ledger_totals(start_date, end_date, customer_key)
+    item_rows = ""
+    for bill in bills:
+        particulars = "To Sales" if bill.transaction_type == "Debit" else f"By {bill.remarks}"
+        debit = format_rupees(bill.total_amount) if bill.transaction_type == "Debit" else ""
+        credit = format_rupees(bill.total_amount) if bill.transaction_type == "Credit" else ""
+        item_rows += f"<tr><td>{bill.date}</td><td>{particulars}</td><td>{bill.transaction_type}</td><td>{bill.bill_number}</td><td>{debit}</td><td>{credit}</td></tr>"
+    closing_balance = opening_balance + total_debit - total_credit
+    with open(STATEMENT_TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        template = f.read()
+    html_content = template.format(
+        customer_name=customer_key,
+        start_date=start_date,
+        end_date=end_date,
+        opening_balance=StatementService.format_balance(opening_balance),
+        item_rows=item_rows,
+        total_debit=format_rupees(total_debit),
+        total_credit=format_rupees(total_credit),
+        closing_balance=StatementService.format_balance(closing_balance)
+    )
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write(html_content)
+
+def measure_statement(mode: str, db_path: str, output_path: str) -> dict:
+    """Render once in this process: seconds, peak RSS above the baseline, and the file size"""
+    db = DBManager(db_path)
+    start_date = FIRST_DAY.isoformat()
+    end_date = (FIRST_DAY + datetime.timedelta(days=DAYS - 1)).isoformat()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    start = time.perf_counter()
+    if mode == "streamed":
+        StatementService(db).render(output_path, start_date, end_date, CUSTOMER)
+    else:
+        legacy_statement(db, output_path, start_date, end_date, CUSTOMER)
+    report = {"seconds": time.perf_counter() - start, "file_mb": os.path.getsize(output_path) / 2 ** 20}
+    if resource:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        report["peak_mb"] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) * scale / 2 ** 20
+    ConnectionPool.for_path(db_path).close()
+    return report
+
+def bench_statement(args):
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "bills.db")
+        db = DBManager(db_path)
+        start = time.perf_counter()
+        result = db.save_bills(statement_bills(args.transactions), batch_size=10000)
+        print(f"{result.saved} transactions for one customer saved in {time.perf_counter() - start:.1f} s")
+        ConnectionPool.for_path(db_path).close()
+
+        print(f"{'mode':<10}{'time':>11}{'rows/s':>12}{'peak memory':>14}{'file':>11}")
+        for mode in ("streamed", "legacy"):
+            report = json.loads(subprocess.run(
+                [sys.executable, "-m", "business_management.render_benchmark", "statement", "--mode", mode,
+                 "--db", db_path, "--output", os.path.join(folder, f"{mode}.html")],
+                check=True, stdout=subprocess.PIPE, text=True).stdout)
+            peak = f"{report['peak_mb']:>11.1f} MB" if "peak_mb" in report else f"{'-':>14}"
+            print(f"{mode:<10}{report['seconds']:>9.2f} s{result.saved / report['seconds']:>12,.0f}{peak}"
+                  f"{report['file_mb']:>8.1f} MB")
+
+def legacy_invoice(bill: Bill, output_path: str):
+    """How the bill generators wrote an invoice before InvoiceService, with amounts in paise"""
+    with open(INVOICE_TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        template = f.read()
+    customer = CUSTOMERS.get(bill.customer_key, {"name": bill.customer_key, "address": ""})
+    item_rows = ""
+    for idx, item in enumerate(bill.items):
+        item_rows += (f"<tr><td>{idx + 1}</td><td>{item.name.split()[0]}</td><td>{item.quantity} kg</td>"
+                      f"<td>{format_rupees(item.price)}</td><td colspan='2'>{format_rupees(item.total)}</td></tr>")
+    html_content = template.format(
+        bill_number=bill.bill_number,
+        customer_name=customer["name"],
+        customer_address=customer["address"],
+        date=bill.date,
+        item_rows=item_rows,
+        total=format_rupees(bill.total_amount)
+    )
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write(html_content)
+
+def bench_invoice(args):
+    customer_key = next(iter(CUSTOMERS))
+    bills = []
+    for number in range(1, args.invoices + 1):
+        items = [LineItem(f"Ragi{line} (ராகி)", 4000 + line, line + 1, (4000 + line) * (line + 1))
+                 for line in range(args.lines)]
+        bills.append(Bill(number, customer_key, "2025-06-19", items, sum(item.total for item in items), "Debit"))
+    service = InvoiceService()
+    with tempfile.TemporaryDirectory() as folder:
+        modes = (("cached", service.render), ("legacy", legacy_invoice))
+        for mode, _ in modes:
+            os.mkdir(os.path.join(folder, mode))
+
+        def path(mode: str, bill: Bill) -> str:
+            # A new file per bill, as the app writes them: on ext4, truncating and
+            # rewriting one file flushes it every time, which would swamp the rendering
+            return os.path.join(folder, mode, f"temp_invoice_{bill.bill_number}.html")
+
+        print(f"{len(bills)} invoices of {args.lines} lines")
+        # os.devnull leaves out the file system, so only reading and rendering the template count
+        for target in ("files", os.devnull):
+            for mode, render in modes:
+                start = time.perf_counter()
+                for bill in bills:
+                    render(bill, path(mode, bill) if target == "files" else target)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:<8}to {target:<11}{elapsed / len(bills) * 1e6:>8.1f} us/invoice  ({elapsed:.2f} s)")
+        for bill in bills:
+            with open(path("cached", bill), encoding="utf-8") as cached, \
+                    open(path("legacy", bill), encoding="utf-8") as legacy:
+                assert cached.read() == legacy.read(), f"invoice {bill.bill_number} differs from the old output"
+
+def run_statement(args):
+    if args.mode:
+        print(json.dumps(measure_statement(args.mode, args.db, args.output)))
+    else:
+        bench_statement(args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark invoice and statement rendering")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    statement = commands.add_parser("statement", help="Streamed statement against the list + str.format one")
+    statement.add_argument("--transactions", type=int, default=500000, help="Bills on the customer's statement")
+    # Child processes, one per mode, so each reports its own peak memory
+    statement.add_argument("--mode", choices=("streamed", "legacy"), help=argparse.SUPPRESS)
+    statement.add_argument("--db", help=argparse.SUPPRESS)
+    statement.add_argument("--output", help=argparse.SUPPRESS)
+    statement.set_defaults(run=run_statement)
+
+    invoice = commands.add_parser("invoice", help="Cached template against reading and formatting it per invoice")
+    invoice.add_argument("--invoices", type=int, default=10000, help="Invoices to write per mode")
+    invoice.add_argument("--lines", type=int, default=20, help="Lines on each invoice")
+    invoice.set_defaults(run=bench_invoice)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
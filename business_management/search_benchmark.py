@@ -0,0 +1,89 @@
+"""
+Latency of the item completer's product search against the fuzzywuzzy function it replaced.
+
+A catalogue of --products names (the shop's products plus random romanized
+ones) is indexed once. The queries are what a user types: every keystroke
+prefix of a word from a random product, the same words with two letters
+swapped, and Tamil, romanized and English spellings of the shop's
+products. Each query is timed through ProductSearchIndex.search, and each
+typed word through the CompletionCache the completer thread uses, one
+keystroke at a time. The old get_fuzzy_matches scores every name with
+fuzzywuzzy, so it runs only --old-queries of the queries. The request's
+target is under 1 ms per query.
+
+Usage:
+    python -m business_management.search_benchmark
+    python -m business_management.search_benchmark --products 100000 --words 500 --old-queries 20
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+from typing import List
+from business_management.resources.suggestions import INITIAL_PRODUCTS
+from business_management.utils.product_index import CompletionCache, ProductSearchIndex
+
+LETTERS = "aaaeiioouubcdghjklmmnnprrsstvy"
+SHOP_QUERIES = ("ragi", "ராகி", "ragi maavu", "ராகி மாவு", "ragi flour", "kambu", "cholam", "sakkarai",
+                "country sugar", "kollu", "rgai", "kmabu", "idiyappam", "puttu", "சோளம்", "arisi")
+
+def catalogue(count: int, seed: int = 0) -> List[str]:
+    """The shop's products, then random names of one to four romanized words up to count"""
+    rng = random.Random(seed)
+    names = list(INITIAL_PRODUCTS)
+    while len(names) < count:
+        words = ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 9))) for _ in range(rng.randint(1, 4))]
+        names.append(" ".join(words) + f" {len(names)}")
+    return names
+
+def swapped(word: str, rng: random.Random) -> str:
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def summary(times: List[float]) -> str:
+    times = sorted(seconds * 1000 for seconds in times)
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    return (f"mean {statistics.mean(times):7.3f} ms  median {statistics.median(times):7.3f} ms  "
+            f"p95 {p95:7.3f} ms  max {times[-1]:8.3f} ms  ({len(times)} queries)")
+
+def timed(search, query: str) -> float:
+    start = time.perf_counter()
+    search(query)
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark product search against the old fuzzywuzzy completer")
+    parser.add_argument("--products", type=int, default=100000, help="Names in the catalogue")
+    parser.add_argument("--words", type=int, default=500, help="Random product words typed one keystroke at a time")
+    parser.add_argument("--old-queries", type=int, default=20, help="Queries run through the old function")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    names = catalogue(args.products)
+    start = time.perf_counter()
+    index = ProductSearchIndex(names)
+    print(f"{len(index)} products indexed in {time.perf_counter() - start:.1f} s")
+    # The first full collection walks every object of the new index (about a
+    # second at 100k names); run it now so it doesn't land inside one query
+    gc.collect()
+
+    typed = [rng.choice(name.casefold().replace("(", " ").replace(")", " ").split())
+             for name in rng.sample(names, args.words)]
+    queries = [word[:end] for word in typed for end in range(1, len(word) + 1)]
+    queries += [swapped(word, rng) for word in typed] + list(SHOP_QUERIES)
+
+    print(f"{'index.search':<16}" + summary([timed(index.search, query) for query in queries]))
+    cache = CompletionCache(index)
+    keystrokes = [timed(cache.search, word[:end]) for word in typed for end in range(1, len(word) + 1)]
+    print(f"{'keystrokes':<16}" + summary(keystrokes) + f", {cache.hits} narrowed from the cache")
+
+    from business_management.utils.fuzzy_completer import get_fuzzy_matches
+    sample = rng.sample(queries, min(args.old_queries, len(queries)))
+    print(f"{'fuzzywuzzy':<16}" + summary([timed(lambda query: get_fuzzy_matches(query, names), query)
+                                           for query in sample]))
+
+if __name__ == "__main__":
+    main()
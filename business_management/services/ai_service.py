@@ -1,66 +1,142 @@
-import requests
-import json
-import base64
-from typing import Dict, List, Optional, Tuple
-import cv2
-import numpy as np
-from PIL import Image
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 import io
+from business_management.services.http_client import HttpTransport
+from business_management.services.image_service import PREPROCESS_VERSION
+from business_management.services.result_cache import ResultCache
+from business_management.utils.lazy_import import lazy_import
+
+# Imported on first use, so opening the app doesn't pay for PIL
+Image = lazy_import("PIL.Image")
+
+# Base URL of the deployed AI API (deployment/api/main.py). Without one the
+# service answers with the built-in mock responses.
+AI_API_URL = os.environ.get("AI_API_URL", "")
+
+# Routes of deployment/api/main.py
+HANDWRITING_PATH = "/api/v1/handwriting/recognize"
+INVOICE_PATH = "/api/v1/invoice/analyze"
+TRANSLATE_PATH = "/api/v1/translate"
+HEALTH_PATH = "/health"
+
+# (connect, read) timeouts in seconds per route: model calls can take a
+# while, a translation or health check should not.
+TIMEOUTS = {
+    HANDWRITING_PATH: (3.05, 30.0),
+    INVOICE_PATH: (3.05, 60.0),
+    TRANSLATE_PATH: (3.05, 10.0),
+    HEALTH_PATH: (3.05, 5.0),
+}
+
+# Model version per cached operation, part of the result cache key; bump
+# one when its model changes so cached answers from the old model are dropped
+MODEL_VERSIONS = {
+    "handwriting": "1",
+    "ocr": "1",
+    "invoice": "1",
+}
 
 class AIService:
     """Service for AI-powered features including handwriting recognition and OCR"""
     
-    def __init__(self):
-        # These would be deployed AI model endpoints
-        self.handwriting_api_url = "https://api.handwriting-recognition.com/v1/recognize"
-        self.ocr_api_url = "https://api.ocr-service.com/v1/extract"
-        self.translation_api_url = "https://api.translation-service.com/v1/translate"
-        self.invoice_analysis_url = "https://api.invoice-analysis.com/v1/analyze"
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[HttpTransport] = None,
+                 cache: Optional[ResultCache] = None):
+        # Every AIService for the same API shares one pooled, keep-alive transport,
+        # so the per-request worker threads don't each open a new connection.
+        base_url = AI_API_URL if base_url is None else base_url
+        self.transport = transport or (HttpTransport.shared(base_url) if base_url else None)
+        # With a cache, image results are looked up by the image's hash first
+        self.cache = cache
+
+    def _cache_key(self, operation: str, image_data: bytes, preprocessed: bool, params: Optional[Dict] = None) -> bytes:
+        backend = self.transport.base_url if self.transport else "mock"
+        stage = PREPROCESS_VERSION if preprocessed else "raw"
+        version = f"{MODEL_VERSIONS[operation]}|{backend}|{stage}"
+        return ResultCache.key(operation, version, ResultCache.digest(image_data), params)
+
+    def _cached(self, operation: str, image_data: bytes, preprocess: Optional[Callable[[bytes], bytes]],
+                compute: Callable[[bytes], Dict], params: Optional[Dict] = None) -> Dict:
+        """
+        compute(image) on image_data, preprocessed first if preprocess is
+        given, answered from the cache when this exact image was seen before
+        """
+        def run():
+            return compute(preprocess(image_data) if preprocess else image_data)
+
+        if self.cache is None:
+            return run()
+        key = self._cache_key(operation, image_data, preprocess is not None, params)
+        result = self.cache.get(key)
+        if result is None:
+            result = run()
+            if "error" not in result:
+                self.cache.put(key, operation, result)
+        return result
+
+    def is_cached(self, operation: str, image_data: bytes, preprocessed: bool = True,
+                  params: Optional[Dict] = None) -> bool:
+        """
+        Whether the matching method would answer image_data from the cache
+        (operation is a MODEL_VERSIONS key; preprocessed means a preprocess
+        callable will be passed), without counting a hit or miss
+        """
+        return self.cache is not None and self.cache.contains(
+            self._cache_key(operation, image_data, preprocessed, params))
+
+    def _post(self, path: str, **kwargs) -> Dict:
+        return self.transport.post(path, TIMEOUTS[path], **kwargs)
+
+    def health(self) -> Dict:
+        if self.transport is None:
+            return {"status": "mock"}
+        return self.transport.get(HEALTH_PATH, TIMEOUTS[HEALTH_PATH])
         
-    def recognize_handwriting(self, image_data: bytes, language: str = "auto") -> Dict:
+    def recognize_handwriting(self, image_data: bytes, language: str = "auto",
+                              preprocess: Optional[Callable[[bytes], bytes]] = None) -> Dict:
         """
         Recognize handwriting from image data
         
         Args:
             image_data: Raw image bytes
             language: Target language (tamil, english, auto)
+            preprocess: Applied to image_data before recognition, unless the result is cached
             
         Returns:
             Dictionary with recognized text and confidence scores
         """
+        def recognize(image: bytes) -> Dict:
+            if self.transport is None:
+                return self._mock_handwriting_response()
+            # Sent as a multipart upload, as the API expects (no base64 inflation)
+            return self._post(HANDWRITING_PATH, files={"file": ("handwriting.png", image, "image/png")},
+                              params={"language": language})
+
         try:
-            # Convert image to base64 for API
-            image_b64 = base64.b64encode(image_data).decode('utf-8')
-            
-            payload = {
-                "image": image_b64,
-                "language": language,
-                "output_format": "structured"
-            }
-            
-            # In a real deployment, this would call the actual AI service
-            # For now, return mock data
-            return self._mock_handwriting_response()
+            return self._cached("handwriting", image_data, preprocess, recognize, {"language": language})
             
         except Exception as e:
             return {"error": str(e), "text": "", "confidence": 0.0}
     
-    def extract_text_ocr(self, image_data: bytes) -> Dict:
+    def extract_text_ocr(self, image_data: bytes, preprocess: Optional[Callable[[bytes], bytes]] = None) -> Dict:
         """
         Extract text using OCR from images
         
         Args:
             image_data: Raw image bytes
+            preprocess: Applied to image_data before OCR, unless the result is cached
             
         Returns:
             Dictionary with extracted text and bounding boxes
         """
-        try:
+        def extract(data: bytes) -> Dict:
             # Convert to PIL Image
-            image = Image.open(io.BytesIO(image_data))
+            image = Image.open(io.BytesIO(data))
             
             # Mock OCR response - in production this would use EasyOCR or Tesseract
             return self._mock_ocr_response()
+
+        try:
+            return self._cached("ocr", image_data, preprocess, extract)
             
         except Exception as e:
             return {"error": str(e), "text": "", "regions": []}
@@ -78,31 +154,31 @@ class AIService:
             Dictionary with translated text
         """
         try:
-            payload = {
-                "text": text,
-                "source": source_lang,
-                "target": target_lang
-            }
-            
-            # Mock translation response
-            return self._mock_translation_response(text, target_lang)
+            if self.transport is None:
+                return self._mock_translation_response(text, target_lang)
+            return self._post(TRANSLATE_PATH, params={"text": text, "source_lang": source_lang, "target_lang": target_lang})
             
         except Exception as e:
             return {"error": str(e), "translated_text": text}
     
-    def analyze_invoice_image(self, image_data: bytes) -> Dict:
+    def analyze_invoice_image(self, image_data: bytes, preprocess: Optional[Callable[[bytes], bytes]] = None) -> Dict:
         """
         Analyze invoice image and extract structured data
         
         Args:
             image_data: Raw image bytes
+            preprocess: Applied to image_data before analysis, unless the result is cached
             
         Returns:
             Dictionary with extracted invoice data
         """
+        def analyze(image: bytes) -> Dict:
+            if self.transport is None:
+                return self._mock_invoice_analysis()
+            return self._post(INVOICE_PATH, files={"file": ("invoice.png", image, "image/png")})
+
         try:
-            # This would use a specialized invoice analysis model
-            return self._mock_invoice_analysis()
+            return self._cached("invoice", image_data, preprocess, analyze)
             
         except Exception as e:
             return {"error": str(e), "items": [], "total": 0.0}
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+from business_management.services.ai_service import AIService
+from business_management.services.image_service import ImageService
+
+# Files picked up when a whole folder is scanned
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif')
+DEFAULT_MODEL_WORKERS = 4
+
+def default_preprocess_workers() -> int:
+    # Leave a core for the UI and the model calls
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def image_files(folder: str) -> List[str]:
+    """The invoice images directly inside folder, by name"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+def _preprocess(image_data: bytes):
+    """Runs in a pool process: the preprocessed image and the seconds it took"""
+    start = time.perf_counter()
+    return ImageService.preprocess_image(image_data), time.perf_counter() - start
+
+@dataclass
+class BatchScanResult:
+    path: str
+    result: Dict = field(default_factory=dict)
+    # Milliseconds per stage: read, preprocess, model, and total from the
+    # file being read to the result (queue waits included)
+    timings: Dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.result.get("error")
+
+class BatchScanner:
+    """
+    Runs invoice analysis over many images as a pipeline
+
+    Images are read in order and fed to two pools: preprocessing
+    (ImageService.preprocess_image, CPU-bound) runs on a process pool so it
+    isn't serialized by the GIL, and the model calls, which mostly wait on
+    the network, run on a thread pool of model_workers. Images already in
+    the AI service's result cache skip both. At most max_pending images are
+    read but not finished, so a folder of hundreds of photos doesn't all
+    sit in memory while the model catches up.
+
+    on_result is called with a BatchScanResult as each image finishes, in
+    completion order and from a worker thread.
+    """
+
+    def __init__(self, ai_service: AIService, preprocess_workers: Optional[int] = None,
+                 model_workers: int = DEFAULT_MODEL_WORKERS, max_pending: Optional[int] = None):
+        self.ai_service = ai_service
+        self.preprocess_workers = preprocess_workers or default_preprocess_workers()
+        self.model_workers = model_workers
+        self.max_pending = max_pending or 2 * (self.preprocess_workers + self.model_workers)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop reading new images; the ones in flight still finish"""
+        self._cancelled.set()
+
+    def run(self, paths: Iterable[str], on_result: Callable[[BatchScanResult], None]) -> int:
+        """Scan every path, blocking until all are done; returns how many were scanned"""
+        self._cancelled.clear()
+        slots = threading.BoundedSemaphore(self.max_pending)
+        pending: List[Future] = []
+        scanned = 0
+        # spawn, not fork: forking a process that runs Qt and worker threads isn't safe
+        processes = ProcessPoolExecutor(self.preprocess_workers, multiprocessing.get_context("spawn"))
+        threads = ThreadPoolExecutor(self.model_workers, thread_name_prefix="invoice-model")
+
+        def finish(item: BatchScanResult, started: float):
+            item.timings["total"] = (time.perf_counter() - started) * 1000
+            try:
+                on_result(item)
+            finally:
+                slots.release()
+
+        def analyze(item: BatchScanResult, image_data: bytes, processed: bytes, started: float):
+            start = time.perf_counter()
+            # The raw image keys the cache; preprocessing is already done
+            item.result = self.ai_service.analyze_invoice_image(image_data, preprocess=lambda _: processed)
+            item.timings["model"] = (time.perf_counter() - start) * 1000
+            finish(item, started)
+
+        def preprocessed(item: BatchScanResult, image_data: bytes, future: Future, started: float):
+            try:
+                processed, seconds = future.result()
+            except Exception as e:
+                item.result = {"error": f"Preprocessing failed: {e}", "items": [], "total": 0.0}
+                finish(item, started)
+                return
+            item.timings["preprocess"] = seconds * 1000
+            pending.append(threads.submit(analyze, item, image_data, processed, started))
+
+        try:
+            for path in paths:
+                slots.acquire()
+                if self._cancelled.is_set():
+                    slots.release()
+                    break
+                scanned += 1
+                item = BatchScanResult(path)
+                started = time.perf_counter()
+                try:
+                    with open(path, 'rb') as f:
+                        image_data = f.read()
+                except OSError as e:
+                    item.result = {"error": str(e), "items": [], "total": 0.0}
+                    finish(item, started)
+                    continue
+                item.timings["read"] = (time.perf_counter() - started) * 1000
+                if self.ai_service.is_cached("invoice", image_data):
+                    item.cached = True
+                    item.result = self.ai_service.analyze_invoice_image(image_data, preprocess=ImageService.preprocess_image)
+                    finish(item, started)
+                    continue
+                try:
+                    future = processes.submit(_preprocess, image_data)
+                except Exception as e:  # BrokenProcessPool: a worker died
+                    item.result = {"error": f"Preprocessing failed: {e}", "items": [], "total": 0.0}
+                    finish(item, started)
+                    continue
+                future.add_done_callback(
+                    lambda future, item=item, image_data=image_data, started=started:
+                        preprocessed(item, image_data, future, started))
+            # Every slot back means every image has finished
+            for _ in range(self.max_pending):
+                slots.acquire()
+        finally:
+            processes.shutdown()
+            threads.shutdown()
+        for future in pending:
+            future.result()  # re-raise anything on_result raised
+        return scanned
@@ -0,0 +1,111 @@
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+from business_management.database.db_manager import DEFAULT_DB_PATH, DBManager
+from business_management.models.bill import Bill
+from business_management.resources.customers import CUSTOMERS
+
+class DataService(QObject):
+    """
+    The application's one view of the database
+
+    Every page shares this object (DataService.instance()) instead of
+    opening its own DBManager, so they all work on the same file. Product
+    names, customer keys and bill numbers are cached in memory, each loaded
+    on first use and then kept current by the mutating methods here, which
+    emit a signal describing the change. Pages apply that change to their
+    widgets instead of re-running the full query whenever they are shown.
+
+    Mutations must go through this service (not db_manager directly) for
+    the caches and signals to stay in step. Reads such as get_bill and the
+    statement queries use db_manager as before.
+    """
+
+    # name, and its row in products()
+    product_added = pyqtSignal(str, int)
+    # the saved Bill, with bill_number allocated
+    bill_saved = pyqtSignal(object)
+    # numbers of the bills just deleted together
+    bills_deleted = pyqtSignal(list)
+    # a customer key seen for the first time, appended to customers()
+    customer_added = pyqtSignal(str)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "DataService":
+        """The shared service, opened on DEFAULT_DB_PATH the first time it is asked for"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, parent=None):
+        super().__init__(parent)
+        self.db_manager = DBManager(db_path)
+        self._products: Optional[List[str]] = None
+        self._bill_numbers: Optional[List[int]] = None
+        self._customers: Optional[List[str]] = None
+
+    def products(self) -> List[str]:
+        """Product names in the database's order (ORDER BY name). Do not modify."""
+        if self._products is None:
+            self._products = self.db_manager.get_products()
+        return self._products
+
+    def bill_numbers(self) -> List[int]:
+        """Bill numbers in ascending order. Do not modify."""
+        if self._bill_numbers is None:
+            self._bill_numbers = self.db_manager.get_bill_numbers()
+        return self._bill_numbers
+
+    def customers(self) -> List[str]:
+        """Known customers followed by any other customer that has bills. Do not modify."""
+        if self._customers is None:
+            known = set(CUSTOMERS)
+            self._customers = list(CUSTOMERS) + [key for key in self.db_manager.get_customer_keys() if key not in known]
+        return self._customers
+
+    def add_product(self, name: str) -> bool:
+        """Add a product; False if it already exists."""
+        name = name.strip()
+        if not self.db_manager.add_product(name):
+            return False
+        products = self.products()
+        row = bisect_left(products, name)
+        products.insert(row, name)
+        self.product_added.emit(name, row)
+        return True
+
+    def ensure_products(self, names: Iterable[str]):
+        """Add whichever of names are not products yet"""
+        existing = set(self.products())
+        for name in names:
+            if name not in existing:
+                self.add_product(name)
+
+    def save_bill(self, bill: Bill):
+        """Save a bill (see DBManager.save_bill) and announce it"""
+        self.db_manager.save_bill(bill)
+        if self._bill_numbers is not None:
+            insort(self._bill_numbers, bill.bill_number)
+        if self._customers is not None and bill.customer_key not in self._customers:
+            self._customers.append(bill.customer_key)
+            self.customer_added.emit(bill.customer_key)
+        self.bill_saved.emit(bill)
+
+    def delete_bill(self, bill_number: int) -> bool:
+        """Delete a bill; False if there is no such bill."""
+        return bool(self.delete_bills([bill_number]))
+
+    def delete_bills(self, bill_numbers: Iterable[int]) -> List[int]:
+        """Delete bills in one transaction (see DBManager.delete_bills); returns those deleted."""
+        deleted = self.db_manager.delete_bills(bill_numbers)
+        if not deleted:
+            return deleted
+        if self._bill_numbers is not None:
+            for bill_number in deleted:
+                row = bisect_left(self._bill_numbers, bill_number)
+                if row < len(self._bill_numbers) and self._bill_numbers[row] == bill_number:
+                    del self._bill_numbers[row]
+        self.bills_deleted.emit(deleted)
+        return deleted
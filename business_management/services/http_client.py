@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from typing import Dict, Tuple, Union
+from business_management.utils.lazy_import import lazy_import
+
+# Imported on first request, so opening the app doesn't pay for requests
+requests = lazy_import("requests")
+urllib3_exceptions = lazy_import("urllib3.exceptions")
+
+# (connect, read) seconds; see HttpTransport.request
+Timeout = Union[float, Tuple[float, float]]
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 30.0)
+# Responses worth retrying: the server is overloaded, restarting or behind a failing proxy
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# The ones that say the server did not act on the request; a proxy's 502/504
+# may come after the server behind it already has
+UNPROCESSED_STATUSES = frozenset({429, 503})
+# Methods safe to send again when the server may already have acted on the
+# first request (a read timeout, a dropped connection, a 502/504)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+def never_sent(error) -> bool:
+    """Whether a requests exception means no connection was made, so the server never saw the request"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, urllib3_exceptions.NewConnectionError)
+
+class HttpTransport:
+    """
+    Keep-alive HTTP client shared by every caller of one API
+
+    One HTTPAdapter (and so one urllib3 connection pool) serves all
+    threads; each thread gets its own Session mounted on it, since
+    Session objects are not meant to be shared between threads. Only the
+    thread holds its Session, so it goes when a short-lived worker thread
+    does. A call therefore reuses an open TCP/TLS connection instead of
+    setting one up, and responses are requested gzip-compressed.
+
+    IDEMPOTENT_METHODS are retried on any connection error or timeout and
+    on RETRY_STATUSES. Other methods (POST) are only sent again when the
+    connection could not be made or the server answered
+    UNPROCESSED_STATUSES: after a read timeout, a connection dropped
+    mid-request or a proxy's 502/504 the server may already have acted on
+    it (started a model run, say). There are at most retries + 1 attempts,
+    sleeping a random time between 0 and backoff * 2**attempt (capped at
+    max_backoff, "full jitter") or the server's Retry-After in between, so
+    clients that failed together don't retry in lockstep.
+    """
+
+    _shared: Dict[str, "HttpTransport"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, base_url: str, pool_size: int = 8, retries: int = 3,
+                 backoff: float = 0.25, max_backoff: float = 4.0):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    @classmethod
+    def shared(cls, base_url: str) -> "HttpTransport":
+        """The process-wide transport for base_url"""
+        key = base_url.rstrip("/")
+        with cls._shared_lock:
+            transport = cls._shared.get(key)
+            if transport is None or transport._closed:
+                transport = cls._shared[key] = cls(key)
+            return transport
+
+    @classmethod
+    def close_all(cls):
+        with cls._shared_lock:
+            transports = list(cls._shared.values())
+            cls._shared.clear()
+        for transport in transports:
+            transport.close()
+
+    def _session(self):
+        if self._closed:
+            raise RuntimeError(f"HTTP transport for {self.base_url} is closed")
+        session = getattr(self._local, "session", None)
+        if session is None:
+            with self._adapter_lock:
+                if self._adapter is None:
+                    # Retries are done in request() so they can be jittered the same way on any urllib3
+                    self._adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session = requests.Session()
+                session.mount("http://", self._adapter)
+                session.mount("https://", self._adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            self._local.session = session
+        return session
+
+    def _delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, path: str, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs) -> Dict:
+        """
+        Send a request to base_url + path and return the decoded JSON body
+
+        kwargs are passed to requests (params, json, data, files, ...).
+        Raises requests.RequestException (HTTPError for error statuses) once
+        the retries are used up, or straight away when a method not in
+        IDEMPOTENT_METHODS may have reached the server.
+        """
+        session = self._session()
+        url = self.base_url + path
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+        for attempt in range(self.retries + 1):
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries or not (idempotent or never_sent(e)):
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            if response.status_code in retry_statuses and attempt < self.retries:
+                response.close()
+                time.sleep(self._delay(attempt, response))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def get(self, path: str, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs) -> Dict:
+        return self.request("GET", path, timeout, **kwargs)
+
+    def post(self, path: str, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs) -> Dict:
+        return self.request("POST", path, timeout, **kwargs)
+
+    def close(self):
+        """Close every pooled connection; later requests raise RuntimeError"""
+        with self._adapter_lock:
+            self._closed = True
+            adapter, self._adapter = self._adapter, None
+        # The sessions only hold connections through the shared adapter
+        if adapter is not None:
+            adapter.close()
@@ -0,0 +1,47 @@
+import html
+import os
+from business_management.resources.customers import CUSTOMERS
+from business_management.services.template_service import templates
+from business_management.utils.money import format_rupees
+
+INVOICE_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'invoice_template.html')
+
+class InvoiceService:
+    """Renders bills into the HTML invoice template"""
+
+    def __init__(self, template_path: str = INVOICE_TEMPLATE_PATH):
+        self.template_path = template_path
+
+    @staticmethod
+    def item_rows(items):
+        for idx, item in enumerate(items):
+            yield (f"<tr><td>{idx + 1}</td><td>{html.escape(item.name.split()[0])}</td><td>{item.quantity} kg</td>"
+                   f"<td>{format_rupees(item.price)}</td><td colspan='2'>{format_rupees(item.total)}</td></tr>")
+
+    def output_path(self, bill) -> str:
+        return os.path.join(os.path.dirname(self.template_path), f"temp_invoice_{bill.bill_number}.html")
+
+    def render(self, bill, output_path=None) -> str:
+        """
+        Write the invoice for a bill
+
+        Args:
+            bill: Saved bill (with its bill number)
+            output_path: Destination file (default: temp_invoice_<number>.html next to the template)
+
+        Returns:
+            Path of the written file
+        """
+        output_path = output_path or self.output_path(bill)
+        customer = CUSTOMERS.get(bill.customer_key, {"name": bill.customer_key, "address": ""})
+        templates.render_to_file(
+            self.template_path,
+            output_path,
+            bill_number=bill.bill_number,
+            customer_name=html.escape(customer["name"]),
+            customer_address=html.escape(customer["address"]),
+            date=bill.date,
+            item_rows=self.item_rows(bill.items),
+            total=format_rupees(bill.total_amount)
+        )
+        return output_path
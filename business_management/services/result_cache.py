@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from business_management.database.connection_pool import ConnectionPool
+
+# Next to bills.db; the cache can be deleted at any time
+RESULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_results.db')
+# Total size of the stored results (JSON bytes) before the least recently used are evicted
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# A hit only rewrites last_used when it is older than this (seconds), so
+# repeated hits on the same image don't each cost a write
+TOUCH_INTERVAL = 60.0
+
+# total_bytes is kept by triggers so eviction never has to SUM the table,
+# and stays right when several processes write to the same file
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS results (
+        key BLOB PRIMARY KEY,
+        operation TEXT NOT NULL,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_used REAL NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)",
+    "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_size (id, total_bytes) VALUES (0, 0)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+        UPDATE cache_size SET total_bytes = total_bytes + NEW.size WHERE id = 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+        UPDATE cache_size SET total_bytes = total_bytes - OLD.size WHERE id = 0;
+    END
+    ''',
+)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    # Read from the database, so they include other processes' entries
+    entries: int = 0
+    total_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    Persistent cache of AI results, addressed by the image they came from
+
+    The key is the SHA-256 of the raw image bytes together with the
+    operation, a version string (model, backend and preprocessing, bumped
+    whenever any of them would change the answer) and the call's params, so
+    the same scan picked again is answered from disk without preprocessing
+    it or calling the model. Results are stored as JSON in an SQLite file
+    and the least recently used are evicted once their total size passes
+    max_bytes. AIService looks results up and stores them (never error
+    results) around its model calls.
+
+    hits/misses/stores/evictions are counted for this process; see stats().
+    """
+
+    _shared: Dict[str, "ResultCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str = RESULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self._pool = ConnectionPool.for_path(self.path)
+        self._stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._initialize()
+
+    @classmethod
+    def shared(cls, path: str = RESULT_CACHE_PATH) -> "ResultCache":
+        """The process-wide cache on path"""
+        key = os.path.abspath(path)
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls._shared[key] = cls(key)
+            return cache
+
+    def _initialize(self):
+        with self._pool.schema_lock:
+            if self._pool.schema_ready:
+                return
+            with self._pool.transaction() as conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+            self._pool.schema_ready = True
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self._stats, name, getattr(self._stats, name) + amount)
+
+    @staticmethod
+    def digest(image_data: bytes) -> bytes:
+        return hashlib.sha256(image_data).digest()
+
+    @staticmethod
+    def key(operation: str, version: str, image_digest: bytes, params: Optional[Dict] = None) -> bytes:
+        """Cache key for operation on the image whose SHA-256 is image_digest"""
+        prefix = json.dumps([operation, version, params or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(prefix.encode("utf-8") + b"\0" + image_digest).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        row = self._pool.connection().execute(
+            "SELECT value, last_used FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            self._pool.connection().execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def contains(self, key: bytes) -> bool:
+        """Whether key is cached; not counted as a hit or miss"""
+        return self._pool.connection().execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, key: bytes, operation: str, result: Dict):
+        value = json.dumps(result, ensure_ascii=False)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._pool.transaction() as conn:
+            # DELETE then INSERT rather than INSERT OR REPLACE: REPLACE's
+            # implicit delete doesn't fire the delete trigger
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            conn.execute("INSERT INTO results (key, operation, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                         (key, operation, value, size, time.time()))
+            evicted = self._evict(conn)
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _evict(self, conn) -> int:
+        """Delete the least recently used results until the total fits in max_bytes"""
+        excess = conn.execute("SELECT total_bytes FROM cache_size WHERE id = 0").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return 0
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", keys)
+        return len(keys)
+
+    def invalidate(self, operations: Optional[Iterable[str]] = None):
+        """Drop the results of operations (all results if None)"""
+        with self._pool.transaction() as conn:
+            if operations is None:
+                conn.execute("DELETE FROM results")
+            else:
+                conn.executemany("DELETE FROM results WHERE operation = ?", ((op,) for op in operations))
+
+    def stats(self) -> CacheStats:
+        entries, total = self._pool.connection().execute(
+            "SELECT (SELECT COUNT(*) FROM results), total_bytes FROM cache_size WHERE id = 0").fetchone()
+        with self._stats_lock:
+            return CacheStats(self._stats.hits, self._stats.misses, self._stats.stores,
+                              self._stats.evictions, entries, total)
@@ -0,0 +1,90 @@
+import html
+import os
+from itertools import chain
+from typing import Dict, Optional
+from business_management.database.db_manager import DBManager
+from business_management.resources.customers import CUSTOMERS
+from business_management.services.template_service import templates
+from business_management.utils.money import format_amount, format_rupees
+
+STATEMENT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'statement_template.html')
+
+class StatementService:
+    """Renders ledger statements from the database straight to an HTML file"""
+
+    def __init__(self, db_manager: DBManager, template_path: str = STATEMENT_TEMPLATE_PATH):
+        self.db_manager = db_manager
+        self.template_path = template_path
+
+    @staticmethod
+    def customer_name(customer_key: Optional[str]) -> str:
+        if not customer_key:
+            return "All Customers"
+        return CUSTOMERS.get(customer_key, {}).get("name", customer_key)
+
+    @staticmethod
+    def format_balance(balance: int) -> str:
+        balance_type = "Debit" if balance >= 0 else "Credit"
+        return f"Rs. {format_amount(abs(balance))} {balance_type}"
+
+    @staticmethod
+    def format_row(bill) -> str:
+        if bill.transaction_type == "Debit":
+            particulars, debit, credit = "To Sales", format_rupees(bill.total_amount), ""
+        else:
+            particulars, debit, credit = f"By {html.escape(bill.remarks)}", "", format_rupees(bill.total_amount)
+        return f"<tr><td>{bill.date}</td><td>{particulars}</td><td>{bill.transaction_type}</td><td>{bill.bill_number}</td><td>{debit}</td><td>{credit}</td></tr>\n"
+
+    def render(self, output_path: str, start_date: str, end_date: str, customer_key: Optional[str] = None,
+               display_start: Optional[str] = None, display_end: Optional[str] = None,
+               chunk_size: int = 1000) -> Optional[Dict]:
+        """
+        Stream a statement for the date range into output_path
+
+        Rows are pulled from a database cursor chunk_size at a time and streamed
+        through the cached template into the file, so memory use does not grow
+        with the number of transactions. Balances come from the daily ledger.
+
+        Args:
+            output_path: HTML file to write
+            start_date, end_date: Inclusive ISO date range
+            customer_key: Restrict to one customer, or None for all
+            display_start, display_end: Dates as shown in the heading (default: the ISO dates)
+
+        Returns:
+            Summary dict (rows, totals and balances in paise), or None if there are no transactions
+        """
+        bills = self.db_manager.iter_bills(start_date, end_date, customer_key, chunk_size)
+        first = next(bills, None)
+        if first is None:
+            return None
+
+        opening_balance = self.db_manager.get_opening_balance(start_date, customer_key)
+        total_debit, total_credit = self.db_manager.get_ledger_totals(start_date, end_date, customer_key)
+        closing_balance = opening_balance + total_debit - total_credit
+        counter = {"rows": 0}
+
+        def item_rows():
+            for bill in chain((first,), bills):
+                counter["rows"] += 1
+                yield self.format_row(bill)
+
+        templates.render_to_file(
+            self.template_path,
+            output_path,
+            customer_name=html.escape(self.customer_name(customer_key)),
+            start_date=display_start or start_date,
+            end_date=display_end or end_date,
+            opening_balance=self.format_balance(opening_balance),
+            item_rows=item_rows(),
+            total_debit=format_rupees(total_debit),
+            total_credit=format_rupees(total_credit),
+            closing_balance=self.format_balance(closing_balance)
+        )
+        return {
+            "rows": counter["rows"],
+            "opening_balance": opening_balance,
+            "total_debit": total_debit,
+            "total_credit": total_credit,
+            "closing_balance": closing_balance
+        }
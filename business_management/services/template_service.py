@@ -0,0 +1,74 @@
+import io
+import os
+import threading
+from string import Formatter
+from typing import Dict, Tuple
+
+class CompiledTemplate:
+    """
+    A str.format-style template parsed once into literal text and fields
+
+    Templates keep the str.format syntax ({name}, {name:.2f}, {{ and }} for
+    literal braces), so existing HTML templates work unchanged. A field whose
+    value is a non-string iterable (a list or generator of row strings) is
+    streamed into the output with writelines instead of being joined first.
+    """
+
+    _CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+    def __init__(self, source: str):
+        self.parts = [
+            (literal, field_name, format_spec or "", conversion)
+            for literal, field_name, format_spec, conversion in Formatter().parse(source)
+        ]
+
+    def render_to(self, out, **context):
+        """Write the rendered template to a text stream"""
+        write = out.write
+        for literal, field_name, format_spec, conversion in self.parts:
+            if literal:
+                write(literal)
+            if field_name is None:
+                continue
+            value = context[field_name]
+            if conversion:
+                value = self._CONVERSIONS[conversion](value)
+            if not isinstance(value, str) and hasattr(value, "__iter__"):
+                out.writelines(value)
+            elif format_spec:
+                write(format(value, format_spec))
+            else:
+                write(str(value))
+
+    def render(self, **context) -> str:
+        buffer = io.StringIO()
+        self.render_to(buffer, **context)
+        return buffer.getvalue()
+
+class TemplateService:
+    """Loads templates from disk once and recompiles them only when the file changes"""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CompiledTemplate:
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            template = CompiledTemplate(f.read())
+        with self._lock:
+            self._cache[path] = (mtime, template)
+        return template
+
+    def render_to_file(self, path: str, output_path: str, **context):
+        template = self.get(path)
+        with open(output_path, "w", encoding="utf-8") as file:
+            template.render_to(file, **context)
+
+# Shared by invoice and statement rendering
+templates = TemplateService()
@@ -1,16 +1,25 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QMessageBox, QTextEdit
-from business_management.database.db_manager import DBManager
-import os
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'bills.db')
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QMessageBox, QTextEdit,
+    QLineEdit, QCheckBox, QDateEdit, QTableView, QHeaderView, QAbstractItemView
+)
+from typing import Optional
+from PyQt5.QtCore import QDate
+from PyQt5.QtGui import QIntValidator, QDoubleValidator
+from business_management.database.db_manager import BillFilter
+from business_management.services.data_service import DataService
+from business_management.ui.components.bill_browser import BillBrowserModel
+from business_management.utils.money import format_rupees, to_paise
 
 class BillDeleteWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.db_manager = DBManager(DB_PATH)
+        self.data_service = DataService.instance()
+        self.db_manager = self.data_service.db_manager
         self.setWindowTitle("Delete Bill Record")
+        self.model = BillBrowserModel(self.data_service, parent=self)
         self.init_ui()
-        self.refresh_bill_numbers()
+        self.apply_filter()
+        self.data_service.customer_added.connect(self.customer_combo.addItem)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -18,58 +27,114 @@ class BillDeleteWidget(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold;")
         layout.addWidget(title)
 
-        bill_select_layout = QHBoxLayout()
-        bill_label = QLabel("Select Bill Number:")
-        self.bill_combo = QComboBox()
-        self.bill_combo.currentIndexChanged.connect(self.display_bill_details)
-        bill_select_layout.addWidget(bill_label)
-        bill_select_layout.addWidget(self.bill_combo)
-        layout.addLayout(bill_select_layout)
+        # Filters, applied in the database
+        filter_layout = QHBoxLayout()
+        self.number_entry = QLineEdit()
+        self.number_entry.setPlaceholderText("Bill No")
+        self.number_entry.setValidator(QIntValidator(1, 2 ** 31 - 1, self))
+        filter_layout.addWidget(self.number_entry)
+        self.customer_combo = QComboBox()
+        self.customer_combo.addItem("")
+        self.customer_combo.addItems(self.data_service.customers())
+        filter_layout.addWidget(QLabel("Customer:"))
+        filter_layout.addWidget(self.customer_combo)
+        self.date_check = QCheckBox("Dates:")
+        filter_layout.addWidget(self.date_check)
+        self.start_date_edit = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.end_date_edit = QDateEdit(QDate.currentDate())
+        for date_edit in (self.start_date_edit, self.end_date_edit):
+            date_edit.setCalendarPopup(True)
+            date_edit.setEnabled(False)
+            self.date_check.toggled.connect(date_edit.setEnabled)
+            filter_layout.addWidget(date_edit)
+        self.min_total_entry = QLineEdit()
+        self.min_total_entry.setPlaceholderText("Min ₹")
+        self.max_total_entry = QLineEdit()
+        self.max_total_entry.setPlaceholderText("Max ₹")
+        for entry in (self.min_total_entry, self.max_total_entry):
+            validator = QDoubleValidator(0, 1e12, 2, self)
+            validator.setNotation(QDoubleValidator.StandardNotation)
+            entry.setValidator(validator)
+            filter_layout.addWidget(entry)
+        for entry in (self.number_entry, self.min_total_entry, self.max_total_entry):
+            entry.returnPressed.connect(self.apply_filter)
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.apply_filter)
+        filter_layout.addWidget(self.search_button)
+        layout.addLayout(filter_layout)
+
+        # Bills load a page at a time as the table scrolls
+        self.bill_table = QTableView()
+        self.bill_table.setModel(self.model)
+        self.bill_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.bill_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.bill_table.verticalHeader().setVisible(False)
+        self.bill_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.bill_table.selectionModel().currentRowChanged.connect(self.display_bill_details)
+        layout.addWidget(self.bill_table, 2)
 
         self.details_text = QTextEdit()
         self.details_text.setReadOnly(True)
-        layout.addWidget(self.details_text)
+        layout.addWidget(self.details_text, 1)
 
-        self.delete_button = QPushButton("Delete Bill")
-        self.delete_button.clicked.connect(self.delete_bill)
+        self.delete_button = QPushButton("Delete Selected Bills")
+        self.delete_button.clicked.connect(self.delete_bills)
         layout.addWidget(self.delete_button)
 
         self.setLayout(layout)
 
-    def refresh_bill_numbers(self):
-        import sqlite3
-        with sqlite3.connect(self.db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT bill_number FROM bills ORDER BY bill_number ASC')
-            bill_numbers = [str(row[0]) for row in cursor.fetchall()]
-        self.bill_combo.clear()
-        self.bill_combo.addItems(bill_numbers)
-        if bill_numbers:
-            self.display_bill_details()
-        else:
-            self.details_text.setText("")
+    def current_filter(self) -> Optional[BillFilter]:
+        """The filter the bar describes, or None (after telling the user) if a total is incomplete"""
+        for entry in (self.min_total_entry, self.max_total_entry):
+            # The validator still lets partial input such as "." through
+            if entry.text() and not entry.hasAcceptableInput():
+                QMessageBox.warning(self, "Invalid Amount", f"'{entry.text()}' is not a valid amount.")
+                entry.setFocus()
+                return None
+        bill_filter = BillFilter(customer_key=self.customer_combo.currentText() or None)
+        if self.number_entry.text():
+            bill_filter.bill_number = int(self.number_entry.text())
+        if self.date_check.isChecked():
+            bill_filter.start_date = self.start_date_edit.date().toString("yyyy-MM-dd")
+            bill_filter.end_date = self.end_date_edit.date().toString("yyyy-MM-dd")
+        if self.min_total_entry.text():
+            bill_filter.min_total = to_paise(self.min_total_entry.text())
+        if self.max_total_entry.text():
+            bill_filter.max_total = to_paise(self.max_total_entry.text())
+        return bill_filter
+
+    def apply_filter(self):
+        bill_filter = self.current_filter()
+        if bill_filter is None:
+            return
+        self.model.set_filter(bill_filter)
+        self.details_text.setText("")
+        if self.model.rowCount():
+            self.bill_table.selectRow(0)
 
-    def display_bill_details(self):
-        bill_number = self.bill_combo.currentText()
-        if not bill_number:
+    def display_bill_details(self, current, previous=None):
+        if not current.isValid():
             self.details_text.setText("")
             return
-        bill = self.db_manager.get_bill(int(bill_number))
+        bill = self.model.details(current.row())
         if bill:
-            details = f"Bill Number: {bill.bill_number}\nCustomer: {bill.customer_key}\nDate: {bill.date}\nTotal: {bill.total_amount}\nType: {bill.transaction_type}\nRemarks: {bill.remarks}\nItems: {bill.items}"
+            lines = "\n".join(f"  {item.name} x {item.quantity} @ {format_rupees(item.price)} = {format_rupees(item.total)}"
+                              for item in bill.items)
+            details = f"Bill Number: {bill.bill_number}\nCustomer: {bill.customer_key}\nDate: {bill.date}\nTotal: {format_rupees(bill.total_amount)}\nType: {bill.transaction_type}\nRemarks: {bill.remarks}\nItems:\n{lines}"
             self.details_text.setText(details)
         else:
             self.details_text.setText("Bill not found.")
 
-    def delete_bill(self):
-        bill_number = self.bill_combo.currentText()
-        if not bill_number:
+    def delete_bills(self):
+        rows = sorted(index.row() for index in self.bill_table.selectionModel().selectedRows())
+        if not rows:
             return
-        confirm = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to delete bill {bill_number}?", QMessageBox.Yes | QMessageBox.No)
+        bill_numbers = [self.model.bill_number(row) for row in rows]
+        described = f"bill {bill_numbers[0]}" if len(bill_numbers) == 1 else f"{len(bill_numbers)} bills"
+        confirm = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to delete {described}?", QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
-            success = self.db_manager.delete_bill(int(bill_number))
-            if success:
-                QMessageBox.information(self, "Deleted", f"Bill {bill_number} deleted successfully.")
-                self.refresh_bill_numbers()
+            deleted = self.data_service.delete_bills(bill_numbers)
+            if len(deleted) == len(bill_numbers):
+                QMessageBox.information(self, "Deleted", f"Deleted {described} successfully.")
             else:
-                QMessageBox.warning(self, "Error", f"Failed to delete bill {bill_number}.") 
\ No newline at end of file
+                QMessageBox.warning(self, "Error", f"Deleted {len(deleted)} of {len(bill_numbers)} bills; the rest no longer exist.")
@@ -1,44 +1,49 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QDoubleSpinBox, QSpinBox, QMessageBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QDoubleSpinBox, QSpinBox, QMessageBox, QShortcut
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+from PyQt5.QtGui import QFont, QKeySequence
 from business_management.resources.customers import CUSTOMERS
 from business_management.resources.suggestions import SUGGESTIONS
 from business_management.ui.components.item_entry import ItemEntryWidget
 from business_management.ui.components.item_list import ItemListWidget
-from business_management.database.db_manager import DBManager
-from business_management.models.bill import Bill
+from business_management.models.bill import Bill, LineItem
+from business_management.models.cart import Cart
+from business_management.services.data_service import DataService
+from business_management.services.invoice_service import InvoiceService
+from business_management.utils.money import format_rupees, to_paise
 import os
 import json
 import webbrowser
 import datetime
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'bills.db')
-
 class BillGeneratorWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.font1 = QFont("Arial", 12)
-        self.items = []
-        self.db_manager = DBManager(DB_PATH)
+        self.cart = Cart()
+        self.data_service = DataService.instance()
+        self.db_manager = self.data_service.db_manager
         self.bill_number_path = os.path.join(os.path.dirname(__file__), '../../Bill Number.txt')
-        self.template_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../business_management/templates/invoice_template.html'))
-        self.bill_number = self.get_current_bill_number()
-        self.suggestions = self.db_manager.get_products()
+        self.invoice_service = InvoiceService()
+        self.import_legacy_bill_number()
         self.init_ui()
-
-    def get_current_bill_number(self):
+        self.cart.add_listener(self.on_cart_changed)
+        self.data_service.product_added.connect(self.on_product_added)
+        # Undo/redo bill lines; text fields keep their own undo while focused
+        for sequence, slot in ((QKeySequence.Undo, self.cart.undo), (QKeySequence.Redo, self.cart.redo)):
+            shortcut = QShortcut(sequence, self)
+            shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+            shortcut.activated.connect(slot)
+
+    def import_legacy_bill_number(self):
+        # Older builds kept the next bill number in a text file; bill numbers are now
+        # allocated by the database, which must never hand out one below it.
         try:
             with open(self.bill_number_path, "r") as file:
-                return int(file.read().strip())
+                self.db_manager.seed_bill_number(int(file.read().strip()))
         except (FileNotFoundError, ValueError):
-            return 1
-
-    def update_bill_number(self):
-        self.bill_number += 1
-        with open(self.bill_number_path, "w") as file:
-            file.write(str(self.bill_number))
+            pass
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -99,12 +104,13 @@ class BillGeneratorWidget(QWidget):
         self.credit_amount_entry.hide()
 
         # Item entry (custom component)
-        self.item_entry_widget = ItemEntryWidget()
+        self.item_entry_widget = ItemEntryWidget(product_index=self.db_manager.product_index,
+                                                 suggestions=self.data_service.products())
         self.item_entry_widget.item_added.connect(self.add_item)
         main_layout.addWidget(self.item_entry_widget)
 
         # Item list (custom component)
-        self.item_list_widget = ItemListWidget()
+        self.item_list_widget = ItemListWidget(cart=self.cart)
         self.item_list_widget.item_removed.connect(self.remove_item_by_index)
         main_layout.addWidget(self.item_list_widget)
 
@@ -135,39 +141,25 @@ class BillGeneratorWidget(QWidget):
         self.generate_button.clicked.connect(self.generate_bill)
         self.clear_button.clicked.connect(self.clear_form)
         self.update_transaction_fields()
-        self.update_items_list()
         self.update_total()
 
     def add_item(self, item):
         if self.transaction_type_combo.currentText() == "Debit":
-            # Check if item already exists (by name)
-            for existing in self.items:
-                if existing["name"].lower() == item["name"].lower():
-                    existing["quantity"] += item["quantity"]
-                    existing["total"] += item["total"]
-                    self.update_items_list()
-                    self.update_total()
-                    # Set focus to item name text area after adding
-                    self.item_entry_widget.item_name_combo.setFocus()
-                    return
-            self.items.append(item)
-            self.update_items_list()
-            self.update_total()
+            # Lines with the same name (case-insensitive) are merged by the cart
+            self.cart.add(item)
             # Set focus to item name text area after adding
             self.item_entry_widget.item_name_combo.setFocus()
 
     def remove_item_by_index(self, index):
-        if 0 <= index < len(self.items):
-            del self.items[index]
-            self.update_items_list()
-            self.update_total()
+        if 0 <= index < len(self.cart):
+            self.cart.remove(index)
 
-    def update_items_list(self):
-        self.item_list_widget.update_items(self.items)
+    def on_cart_changed(self, event, row):
+        if event in ("inserted", "removed", "updated", "reset"):
+            self.update_total()
 
     def update_total(self):
-        total = sum(item["total"] for item in self.items)
-        self.total_display.setText(f"₹{total:.2f}")
+        self.total_display.setText(format_rupees(self.cart.total))
 
     def update_transaction_fields(self):
         transaction_type = self.transaction_type_combo.currentText()
@@ -178,9 +170,7 @@ class BillGeneratorWidget(QWidget):
             self.credit_amount_label.show()
             self.credit_amount_entry.show()
             self.remarks_entry.show()
-            self.items.clear()
-            self.update_items_list()
-            self.update_total()
+            self.cart.clear()
         else:
             self.item_entry_widget.show()
             self.item_list_widget.show()
@@ -191,11 +181,9 @@ class BillGeneratorWidget(QWidget):
             self.credit_amount_entry.setValue(0.0)
 
     def clear_form(self):
-        self.items = []
-        self.update_items_list()
+        self.cart.clear()
         self.item_entry_widget.clear_fields()
-        self.total_display.setText("₹0.00")
-        self.date_entry.clear()
+        self.date_entry.setText(datetime.datetime.now().strftime('%Y-%m-%d'))
         self.customer_combo.setCurrentIndex(0)
         self.transaction_type_combo.setCurrentIndex(0)
         self.remarks_entry.clear()
@@ -204,7 +192,7 @@ class BillGeneratorWidget(QWidget):
 
     def generate_bill(self):
         transaction_type = self.transaction_type_combo.currentText()
-        if transaction_type == "Debit" and not self.items:
+        if transaction_type == "Debit" and not self.cart.items:
             QMessageBox.critical(self, "Error", "Please add items to the bill for a Debit transaction.")
             return
         elif transaction_type == "Credit" and self.credit_amount_entry.value() <= 0:
@@ -216,20 +204,20 @@ class BillGeneratorWidget(QWidget):
             date = self.date_entry.text()
             remarks = self.remarks_entry.text().strip()
             if transaction_type == "Debit":
-                items = self.items
-                total_amount = sum(item["total"] for item in items)
+                items = list(self.cart.items)
+                total_amount = self.cart.total
             else:
-                items = [{
-                    "name": remarks if remarks else "Credit Entry",
-                    "price": 0.0,
-                    "quantity": 0,
-                    "total": self.credit_amount_entry.value(),
-                    "type": "Credit",
-                    "remarks": remarks
-                }]
-                total_amount = self.credit_amount_entry.value()
+                total_amount = to_paise(self.credit_amount_entry.value())
+                items = [LineItem(
+                    name=remarks if remarks else "Credit Entry",
+                    price=0,
+                    quantity=0,
+                    total=total_amount,
+                    type="Credit",
+                    remarks=remarks
+                )]
             bill = Bill(
-                bill_number=self.bill_number,
+                bill_number=None,
                 customer_key=customer_key,
                 date=date,
                 items=items,
@@ -237,9 +225,8 @@ class BillGeneratorWidget(QWidget):
                 transaction_type=transaction_type,
                 remarks=remarks
             )
-            # Save to DB
-            self.db_manager.save_bill(bill)
-            self.update_bill_number()
+            # Save to DB (allocates the bill number)
+            self.data_service.save_bill(bill)
             # Generate HTML invoice for Debit
             if transaction_type == "Debit":
                 self.generate_html_invoice(bill)
@@ -249,33 +236,11 @@ class BillGeneratorWidget(QWidget):
             QMessageBox.critical(self, "Error", f"Failed to record transaction: {str(e)}")
 
     def generate_html_invoice(self, bill):
-        # Load template
         try:
-            with open(self.template_path, "r", encoding="utf-8") as f:
-                template = f.read()
-            customer = CUSTOMERS.get(bill.customer_key, {"name": bill.customer_key, "address": ""})
-            item_rows = ""
-            for idx, item in enumerate(bill.items):
-                item_rows += f"<tr><td>{idx+1}</td><td>{item['name'].split()[0]}</td><td>{item['quantity']} kg</td><td>₹{item['price']:.2f}</td><td colspan='2'>₹{item['total']:.2f}</td></tr>"
-            html_content = template.format(
-                bill_number=bill.bill_number,
-                customer_name=customer["name"],
-                customer_address=customer["address"],
-                date=bill.date,
-                item_rows=item_rows,
-                total=f"₹{bill.total_amount:.2f}"
-            )
-            temp_html_path = os.path.join(os.path.dirname(self.template_path), f"temp_invoice_{bill.bill_number}.html")
-            with open(temp_html_path, "w", encoding="utf-8") as file:
-                file.write(html_content)
-            webbrowser.open(temp_html_path)
+            webbrowser.open(self.invoice_service.render(bill))
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to generate invoice: {str(e)}")
 
-    def refresh_suggestions(self):
-        self.suggestions = self.db_manager.get_products()
-        self.item_entry_widget.set_suggestions(self.suggestions)
-
-    def showEvent(self, event):
-        super().showEvent(event)
-        self.refresh_suggestions()
+    def on_product_added(self, name, row):
+        # The shared product index already has it; only the combo box needs the new row
+        self.item_entry_widget.insert_suggestion(row, name)
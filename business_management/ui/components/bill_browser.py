@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from business_management.database.db_manager import BillFilter
+from business_management.models.bill import Bill
+from business_management.utils.helpers import to_iso_date
+from business_management.utils.money import format_rupees
+
+# Bills fetched per page as the view scrolls
+PAGE_SIZE = 200
+# Rows either side of the selected one whose details are loaded with it
+PREFETCH_ROWS = 5
+# Bills (with items) kept for the details pane
+DETAIL_CACHE_SIZE = 256
+
+class BillBrowserModel(QAbstractTableModel):
+    """Table model over the saved bills matching a BillFilter, newest first
+
+    Rows are loaded a page at a time through canFetchMore/fetchMore, which
+    views call as they scroll, using DBManager.browse_bills' keyset
+    pagination. Details (with items) for the selected row and its
+    neighbours are loaded together in one query and kept in a small cache,
+    so stepping through the list does not hit the database for every row.
+    The data service's bill_saved and bills_deleted signals are applied as
+    row inserts/removals.
+    """
+
+    HEADERS = ("Bill No", "Date", "Customer", "Type", "Total")
+    TOTAL_COLUMN = 4
+
+    def __init__(self, data_service, page_size: int = PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.data_service = data_service
+        self.db_manager = data_service.db_manager
+        self.page_size = page_size
+        self.bill_filter = BillFilter()
+        self.bills: List[Bill] = []  # bill_number descending
+        self._exhausted = False
+        self._details: "OrderedDict[int, Bill]" = OrderedDict()
+        data_service.bill_saved.connect(self.on_bill_saved)
+        data_service.bills_deleted.connect(self.on_bills_deleted)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.bills)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.DisplayRole:
+            bill = self.bills[index.row()]
+            if column == 0:
+                return str(bill.bill_number)
+            if column == 1:
+                return bill.date
+            if column == 2:
+                return bill.customer_key
+            if column == 3:
+                return bill.transaction_type
+            return format_rupees(bill.total_amount)
+        if role == Qt.TextAlignmentRole and column in (0, self.TOTAL_COLUMN):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        before = self.bills[-1].bill_number if self.bills else None
+        page = self.db_manager.browse_bills(self.bill_filter, before, self.page_size)
+        self._exhausted = len(page) < self.page_size
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.bills), len(self.bills) + len(page) - 1)
+            self.bills.extend(page)
+            self.endInsertRows()
+
+    def set_filter(self, bill_filter: BillFilter):
+        """Show the bills matching bill_filter, starting again from the first page"""
+        self.beginResetModel()
+        self.bill_filter = bill_filter
+        self.bills = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def bill_number(self, row: int) -> int:
+        return self.bills[row].bill_number
+
+    def details(self, row: int) -> Optional[Bill]:
+        """The bill at row with its items, loading it and its neighbours if not cached"""
+        bill_number = self.bills[row].bill_number
+        bill = self._details.get(bill_number)
+        if bill is None:
+            self.prefetch(row)
+            bill = self._details.get(bill_number)
+        else:
+            self._details.move_to_end(bill_number)
+        return bill
+
+    def prefetch(self, row: int, radius: int = PREFETCH_ROWS):
+        """Load details for the rows within radius of row that are not cached yet"""
+        wanted = [bill.bill_number for bill in self.bills[max(row - radius, 0):row + radius + 1]
+                  if bill.bill_number not in self._details]
+        if not wanted:
+            return
+        self._details.update(self.db_manager.get_bills_by_number(wanted))
+        while len(self._details) > DETAIL_CACHE_SIZE:
+            self._details.popitem(last=False)
+
+    def _row_for(self, bill_number: int) -> int:
+        """First row whose bill number is not above bill_number (rows are in descending order)"""
+        low, high = 0, len(self.bills)
+        while low < high:
+            middle = (low + high) // 2
+            if self.bills[middle].bill_number > bill_number:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def on_bill_saved(self, bill: Bill):
+        if not self.bill_filter.matches(bill):
+            return
+        row = self._row_for(bill.bill_number)
+        # Below the last loaded row it will arrive with a later page
+        if row == len(self.bills) and not self._exhausted:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        # As browse_bills would return it: no items, date as stored
+        self.bills.insert(row, Bill(bill.bill_number, bill.customer_key, to_iso_date(bill.date), [],
+                                    bill.total_amount, bill.transaction_type, bill.remarks))
+        self.endInsertRows()
+
+    def on_bills_deleted(self, bill_numbers: Iterable[int]):
+        rows = []
+        for bill_number in bill_numbers:
+            self._details.pop(bill_number, None)
+            row = self._row_for(bill_number)
+            if row < len(self.bills) and self.bills[row].bill_number == bill_number:
+                rows.append(row)
+        # Remove runs of adjacent rows together, from the bottom up so earlier rows keep their place
+        rows.sort(reverse=True)
+        start = 0
+        while start < len(rows):
+            end = start
+            while end + 1 < len(rows) and rows[end + 1] == rows[end] - 1:
+                end += 1
+            first, last = rows[end], rows[start]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.bills[first:last + 1]
+            self.endRemoveRows()
+            start = end + 1
@@ -1,15 +1,102 @@
+import atexit
+import threading
+import weakref
 from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QComboBox, QDoubleSpinBox, QSpinBox, QPushButton, QLineEdit, QCompleter
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QThread, QTimer
 from PyQt5.QtGui import QFont
+from PyQt5 import sip
+from business_management.models.bill import LineItem
 from business_management.resources.suggestions import SUGGESTIONS
-from business_management.utils.fuzzy_completer import get_fuzzy_matches
+from business_management.utils.money import line_total, to_paise
+from business_management.utils.product_index import CompletionCache, ProductSearchIndex
+
+# Keystrokes closer together than this are coalesced into one query.
+COMPLETION_DEBOUNCE_MS = 120
+
+class CompletionThread(QThread):
+    """Thread answering completer queries off the GUI thread
+
+    Only the latest request is kept: a query that is superseded before the
+    thread gets to it is dropped, and results are tagged with the request's
+    generation so the widget can ignore any that arrive late. The index
+    is shared with the GUI thread, so everything read from it here goes
+    through its lock (search_candidates, names).
+    """
+
+    results_ready = pyqtSignal(int, str, list)
+
+    _running = weakref.WeakSet()
+
+    def __init__(self, product_index, parent=None):
+        super().__init__(parent)
+        self.cache = CompletionCache(product_index)
+        self._pending = None
+        self._stopped = False
+        self._condition = threading.Condition()
+        CompletionThread._running.add(self)
+
+    def request(self, generation, text):
+        with self._condition:
+            self._pending = (generation, text)
+            self._condition.notify()
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self.wait()
+
+    @classmethod
+    def stop_all(cls):
+        for thread in list(cls._running):
+            # Qt may already have destroyed it (e.g. with its widget at exit)
+            if not sip.isdeleted(thread):
+                thread.stop()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                generation, text = self._pending
+                self._pending = None
+            matches = self.cache.search(text) if text.strip() else self.cache.index.names()
+            with self._condition:
+                stale = self._pending is not None
+            if not stale:
+                self.results_ready.emit(generation, text, matches)
+
+# A QThread that is still running when it is destroyed aborts the process.
+atexit.register(CompletionThread.stop_all)
 
 class ItemEntryWidget(QWidget):
-    item_added = pyqtSignal(dict)
+    """
+    Item name, price and quantity entry with a type-ahead product completer
+
+    product_index is usually DBManager.product_index, shared by every bill
+    page and kept up to date by DBManager.add_product; the widget only
+    searches it and never changes it.
+    """
+
+    item_added = pyqtSignal(object)  # LineItem
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, product_index=None, suggestions=None):
         super().__init__(parent)
+        self.product_index = product_index if product_index is not None else ProductSearchIndex(SUGGESTIONS)
+        # Names for the drop-down, in display order; defaults to the index's names
+        self.suggestions = list(suggestions) if suggestions is not None else self.product_index.names()
         self.font = QFont("Arial", 12)
+        self.completion_generation = 0
+        self.completion_thread = CompletionThread(self.product_index)
+        self.completion_thread.results_ready.connect(self.on_completions_ready)
+        self.completion_timer = QTimer(self)
+        self.completion_timer.setSingleShot(True)
+        self.completion_timer.setInterval(COMPLETION_DEBOUNCE_MS)
+        self.completion_timer.timeout.connect(self.request_completions)
         self.init_ui()
 
     def init_ui(self):
@@ -22,10 +109,11 @@ class ItemEntryWidget(QWidget):
         self.item_name_combo = QComboBox()
         self.item_name_combo.setFont(self.font)
         self.item_name_combo.setEditable(True)
-        self.item_name_combo.addItems([""] + SUGGESTIONS)
-        self.completer = QCompleter(SUGGESTIONS, self)
+        self.item_name_combo.addItems([""] + self.suggestions)
+        self.completer = QCompleter(self.suggestions, self)
         self.completer.setCaseSensitivity(Qt.CaseInsensitive)
-        self.completer.setFilterMode(Qt.MatchContains)
+        # The model already holds the ranked matches; don't let Qt re-filter them.
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
         self.item_name_combo.setCompleter(self.completer)
         self.item_name_combo.lineEdit().textEdited.connect(self.update_fuzzy_completer)
         layout.addWidget(item_name_label)
@@ -60,24 +148,26 @@ class ItemEntryWidget(QWidget):
         self.setLayout(layout)
 
     def update_fuzzy_completer(self, text):
-        filtered = get_fuzzy_matches(text, SUGGESTIONS)
-        self.completer.model().setStringList(filtered)
+        # Restart the debounce timer; matching runs once typing pauses
+        self.completion_timer.start()
+
+    def request_completions(self):
+        self.completion_generation += 1
+        self.completion_thread.request(self.completion_generation, self.item_name_combo.currentText())
+
+    def on_completions_ready(self, generation, text, matches):
+        if generation != self.completion_generation or text != self.item_name_combo.currentText():
+            return
+        self.completer.model().setStringList(matches)
         self.completer.complete()
 
     def emit_item_added(self):
         item_name = self.item_name_combo.currentText().strip()
-        price = self.price_entry.value()
+        price = to_paise(self.price_entry.value())
         quantity = self.quantity_entry.value()
         if not item_name or price <= 0 or quantity <= 0:
             return
-        item = {
-            "name": item_name,
-            "price": price,
-            "quantity": quantity,
-            "total": price * quantity,
-            "type": "Debit"
-        }
-        self.item_added.emit(item)
+        self.item_added.emit(LineItem(item_name, price, quantity, line_total(price, quantity)))
         self.clear_fields()
 
     def clear_fields(self):
@@ -87,6 +177,13 @@ class ItemEntryWidget(QWidget):
         self.quantity_entry.setValue(1)
 
     def set_suggestions(self, suggestions):
+        """Replace the drop-down's names (the search index is fed by DBManager.add_product)"""
+        self.suggestions = list(suggestions)
         self.item_name_combo.clear()
-        self.item_name_combo.addItems([""] + suggestions)
-        self.completer.model().setStringList(suggestions)
+        self.item_name_combo.addItems([""] + self.suggestions)
+        self.completer.model().setStringList(self.suggestions)
+
+    def insert_suggestion(self, row, name):
+        """Show one more product at row of the suggestions, without rebuilding the list"""
+        self.suggestions.insert(row, name)
+        self.item_name_combo.insertItem(row + 1, name)  # row 0 is the blank entry
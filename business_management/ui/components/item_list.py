@@ -1,40 +1,148 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QHBoxLayout, QLabel, QPushButton
-from PyQt5.QtCore import pyqtSignal
-from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QTableView, QHeaderView, QStyledItemDelegate, QStyle,
+    QStyleOptionButton, QApplication, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtGui import QFont, QColor, QPalette
+from business_management.models.cart import Cart
+from business_management.utils.money import format_rupees
+
+class ItemListModel(QAbstractTableModel):
+    """Table model over the lines of a Cart (name, price, quantity, total)
+
+    The model listens to the cart and turns each change into row-level
+    insert/remove/dataChanged notifications, so views only lay out and
+    repaint the rows involved.
+    """
+
+    HEADERS = ("Item", "Price", "Qty", "Total", "")
+    REMOVE_COLUMN = 4
+
+    def __init__(self, cart, parent=None):
+        super().__init__(parent)
+        self.cart = cart
+        cart.add_listener(self.on_cart_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cart.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.DisplayRole:
+            item = self.cart.items[index.row()]
+            if column == 0:
+                return item.name
+            if column == 1:
+                return format_rupees(item.price)
+            if column == 2:
+                return str(item.quantity)
+            if column == 3:
+                return format_rupees(item.total)
+            return "✖"
+        if role == Qt.TextAlignmentRole and column in (1, 2, 3):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ToolTipRole and column == self.REMOVE_COLUMN:
+            return "Remove item"
+        return None
+
+    def on_cart_changed(self, event, row):
+        if event == "inserting":
+            self.beginInsertRows(QModelIndex(), row, row)
+        elif event == "inserted":
+            self.endInsertRows()
+        elif event == "removing":
+            self.beginRemoveRows(QModelIndex(), row, row)
+        elif event == "removed":
+            self.endRemoveRows()
+        elif event == "updated":
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        elif event == "resetting":
+            self.beginResetModel()
+        elif event == "reset":
+            self.endResetModel()
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """Paints a remove button in each row instead of creating a widget per row"""
+
+    remove_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Built once: styles cache button pixmaps by palette, and a fresh
+        # palette per paint would fill the pixmap cache with duplicates.
+        self.palette = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = index.data()
+        button.state = QStyle.State_Enabled
+        if option.state & QStyle.State_MouseOver:
+            button.state |= QStyle.State_MouseOver
+        if self.palette is None:
+            self.palette = QPalette(option.palette)
+            self.palette.setColor(QPalette.ButtonText, QColor("red"))
+        button.palette = self.palette
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton \
+                and option.rect.contains(event.pos()):
+            self.remove_requested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
 
 class ItemListWidget(QWidget):
     item_removed = pyqtSignal(int)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, cart=None):
         super().__init__(parent)
         self.font = QFont("Arial", 12)
-        self.items = []
+        self.cart = cart if cart is not None else Cart()
         self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout()
-        self.list_widget = QListWidget()
-        self.list_widget.setFont(self.font)
-        layout.addWidget(self.list_widget)
+        self.model = ItemListModel(self.cart, self)
+        self.table_view = QTableView()
+        self.table_view.setFont(self.font)
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table_view.setShowGrid(False)
+        self.table_view.setFocusPolicy(Qt.NoFocus)
+        self.table_view.setMouseTracking(True)
+        # Fixed row heights let the view lay out only the visible rows
+        vertical_header = self.table_view.verticalHeader()
+        vertical_header.hide()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(28)
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(ItemListModel.REMOVE_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(ItemListModel.REMOVE_COLUMN, 40)
+        self.remove_delegate = RemoveButtonDelegate(self.table_view)
+        self.remove_delegate.remove_requested.connect(self.item_removed)
+        self.table_view.setItemDelegateForColumn(ItemListModel.REMOVE_COLUMN, self.remove_delegate)
+        layout.addWidget(self.table_view)
         self.setLayout(layout)
 
+    @property
+    def items(self):
+        return self.cart.items
+
     def update_items(self, items):
-        self.items = items
-        self.list_widget.clear()
-        for idx, item in enumerate(items):
-            widget = QWidget()
-            h_layout = QHBoxLayout()
-            h_layout.setContentsMargins(0, 0, 0, 0)
-            label = QLabel(f"{item['name']} - ₹{item['price']:.2f} x {item['quantity']} = ₹{item['total']:.2f}")
-            label.setFont(self.font)
-            remove_btn = QPushButton("✖")
-            remove_btn.setFixedSize(24, 24)
-            remove_btn.setStyleSheet("color: red; font-weight: bold;")
-            remove_btn.clicked.connect(lambda _, i=idx: self.item_removed.emit(i))
-            h_layout.addWidget(label)
-            h_layout.addWidget(remove_btn)
-            widget.setLayout(h_layout)
-            list_item = QListWidgetItem(self.list_widget)
-            list_item.setSizeHint(widget.sizeHint())
-            self.list_widget.addItem(list_item)
-            self.list_widget.setItemWidget(list_item, widget)
+        """Replace the cart's lines with items"""
+        self.cart.replace(items)
@@ -1,49 +1,53 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, 
     QPushButton, QDoubleSpinBox, QSpinBox, QMessageBox, QTabWidget,
-    QGroupBox, QCheckBox
+    QGroupBox, QCheckBox, QShortcut
 )
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont
+from PyQt5.QtGui import QFont, QKeySequence
 from business_management.resources.customers import CUSTOMERS
 from business_management.ui.components.item_entry import ItemEntryWidget
 from business_management.ui.components.item_list import ItemListWidget
-from business_management.ui.handwriting_widget import HandwritingWidget
-from business_management.ui.invoice_scanner import InvoiceScannerWidget
-from business_management.ui.ai_assistant import AIAssistantWidget
-from business_management.database.db_manager import DBManager
-from business_management.models.bill import Bill
+from business_management.models.bill import Bill, LineItem
+from business_management.models.cart import Cart
+from business_management.services.data_service import DataService
+from business_management.services.invoice_service import InvoiceService
+from business_management.utils.money import format_rupees, to_paise
+from business_management.utils.transliteration import parse_item_text
+import math
 import os
 import webbrowser
 import datetime
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'bills.db')
-
 class EnhancedBillGeneratorWidget(QWidget):
     """Enhanced bill generator with AI features"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.font1 = QFont("Arial", 12)
-        self.items = []
-        self.db_manager = DBManager(DB_PATH)
+        self.cart = Cart()
+        self.data_service = DataService.instance()
+        self.db_manager = self.data_service.db_manager
         self.bill_number_path = os.path.join(os.path.dirname(__file__), '../../Bill Number.txt')
-        self.template_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../business_management/templates/invoice_template.html'))
-        self.bill_number = self.get_current_bill_number()
-        self.suggestions = self.db_manager.get_products()
+        self.invoice_service = InvoiceService()
+        self.import_legacy_bill_number()
         self.init_ui()
+        self.cart.add_listener(self.on_cart_changed)
+        self.data_service.product_added.connect(self.on_product_added)
+        # Undo/redo bill lines; text fields keep their own undo while focused
+        for sequence, slot in ((QKeySequence.Undo, self.cart.undo), (QKeySequence.Redo, self.cart.redo)):
+            shortcut = QShortcut(sequence, self)
+            shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+            shortcut.activated.connect(slot)
 
-    def get_current_bill_number(self):
+    def import_legacy_bill_number(self):
+        # Older builds kept the next bill number in a text file; bill numbers are now
+        # allocated by the database, which must never hand out one below it.
         try:
             with open(self.bill_number_path, "r") as file:
-                return int(file.read().strip())
+                self.db_manager.seed_bill_number(int(file.read().strip()))
         except (FileNotFoundError, ValueError):
-            return 1
-
-    def update_bill_number(self):
-        self.bill_number += 1
-        with open(self.bill_number_path, "w") as file:
-            file.write(str(self.bill_number))
+            pass
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -61,22 +65,44 @@ class EnhancedBillGeneratorWidget(QWidget):
         self.bill_tab = self.create_bill_tab()
         self.tab_widget.addTab(self.bill_tab, "Bill Generator")
         
-        # Handwriting Recognition Tab
+        # AI tabs (handwriting, invoice scanner, assistant) start as empty
+        # pages and are built the first time they are opened: their modules
+        # import cv2, numpy, PIL and requests, which would slow down startup.
+        self.handwriting_widget = self.scanner_widget = self.ai_assistant = None
+        self.lazy_tabs = {}
+        for title, factory in (("Handwriting Recognition", self.create_handwriting_tab),
+                               ("Invoice Scanner", self.create_scanner_tab),
+                               ("AI Assistant", self.create_assistant_tab)):
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.lazy_tabs[self.tab_widget.addTab(page, title)] = factory
+        self.tab_widget.currentChanged.connect(self.build_tab)
+        
+        main_layout.addWidget(self.tab_widget)
+        self.setLayout(main_layout)
+
+    def build_tab(self, index):
+        factory = self.lazy_tabs.pop(index, None)
+        if factory is not None:
+            self.tab_widget.widget(index).layout().addWidget(factory())
+
+    def create_handwriting_tab(self):
+        from business_management.ui.handwriting_widget import HandwritingWidget
         self.handwriting_widget = HandwritingWidget()
         self.handwriting_widget.text_recognized.connect(self.on_handwriting_recognized)
-        self.tab_widget.addTab(self.handwriting_widget, "Handwriting Recognition")
-        
-        # Invoice Scanner Tab
+        return self.handwriting_widget
+
+    def create_scanner_tab(self):
+        from business_management.ui.invoice_scanner import InvoiceScannerWidget
         self.scanner_widget = InvoiceScannerWidget()
         self.scanner_widget.invoice_data_ready.connect(self.on_invoice_data_ready)
-        self.tab_widget.addTab(self.scanner_widget, "Invoice Scanner")
-        
-        # AI Assistant Tab
+        return self.scanner_widget
+
+    def create_assistant_tab(self):
+        from business_management.ui.ai_assistant import AIAssistantWidget
         self.ai_assistant = AIAssistantWidget()
-        self.tab_widget.addTab(self.ai_assistant, "AI Assistant")
-        
-        main_layout.addWidget(self.tab_widget)
-        self.setLayout(main_layout)
+        return self.ai_assistant
 
     def create_bill_tab(self):
         """Create the traditional bill generator tab"""
@@ -171,12 +197,13 @@ class EnhancedBillGeneratorWidget(QWidget):
         layout.addWidget(ai_group)
 
         # Item entry (custom component)
-        self.item_entry_widget = ItemEntryWidget()
+        self.item_entry_widget = ItemEntryWidget(product_index=self.db_manager.product_index,
+                                                 suggestions=self.data_service.products())
         self.item_entry_widget.item_added.connect(self.add_item)
         layout.addWidget(self.item_entry_widget)
 
         # Item list (custom component)
-        self.item_list_widget = ItemListWidget()
+        self.item_list_widget = ItemListWidget(cart=self.cart)
         self.item_list_widget.item_removed.connect(self.remove_item_by_index)
         layout.addWidget(self.item_list_widget)
 
@@ -208,7 +235,6 @@ class EnhancedBillGeneratorWidget(QWidget):
         
         # Initialize
         self.update_transaction_fields()
-        self.update_items_list()
         self.update_total()
         
         widget.setLayout(layout)
@@ -219,93 +245,102 @@ class EnhancedBillGeneratorWidget(QWidget):
         # Switch back to bill generator tab
         self.tab_widget.setCurrentIndex(0)
         
-        # Try to parse the text and add as item
-        # This is a simple implementation - in production, you'd use more sophisticated parsing
-        words = text.split()
-        if len(words) >= 2:
-            item_name = " ".join(words[:-1])  # All words except last
-            try:
-                quantity = int(words[-1])  # Last word as quantity
-                
-                # Set the item name in the entry widget
-                self.item_entry_widget.item_name_combo.setEditText(item_name)
-                self.item_entry_widget.quantity_entry.setValue(quantity)
-                
-                QMessageBox.information(
-                    self, 
-                    "Handwriting Recognized", 
-                    f"Added item: {item_name} (Qty: {quantity})\nPlease set the price and add to bill."
-                )
-            except ValueError:
-                # If last word is not a number, just set the item name
-                self.item_entry_widget.item_name_combo.setEditText(text)
-                QMessageBox.information(
-                    self, 
-                    "Handwriting Recognized", 
-                    f"Added item name: {text}\nPlease set quantity and price."
-                )
+        # Split off the quantity (and its unit), then map the name, in any
+        # script or spelling, onto a product from the master list
+        item_name, quantity, unit = parse_item_text(text)
+        if item_name:
+            item_name = self.item_entry_widget.product_index.resolve(item_name) or item_name
+            self.item_entry_widget.item_name_combo.setEditText(item_name)
+        else:
+            item_name = self.item_entry_widget.item_name_combo.currentText()
+        quantity_box = self.item_entry_widget.quantity_entry
+        if quantity is not None:
+            written = f"{quantity:g} {unit}" if unit else f"{quantity:g}"
+        if quantity is not None and quantity.is_integer() and quantity_box.minimum() <= quantity <= quantity_box.maximum():
+            quantity_box.setValue(int(quantity))
+            QMessageBox.information(
+                self, 
+                "Handwriting Recognized", 
+                f"Added item: {item_name} (Qty: {written})\nPlease set the price and add to bill."
+            )
+        elif quantity is not None:
+            # The quantity box only holds whole numbers; rounding would bill the wrong amount
+            QMessageBox.information(
+                self, 
+                "Handwriting Recognized", 
+                f"Added item name: {item_name}\nRecognized quantity {written} can't be entered as a whole number; please set quantity and price."
+            )
+        else:
+            QMessageBox.information(
+                self, 
+                "Handwriting Recognized", 
+                f"Added item name: {item_name}\nPlease set quantity and price."
+            )
 
     def on_invoice_data_ready(self, invoice_data):
         """Handle invoice data from scanner"""
         # Switch back to bill generator tab
         self.tab_widget.setCurrentIndex(0)
         
-        # Clear existing items
-        self.items.clear()
-        
-        # Add items from scanned invoice
+        # The model's JSON is not validated upstream: skip lines that don't parse rather than lose the invoice
+        items, skipped = [], []
         for item_data in invoice_data.get("items", []):
-            item = {
-                "name": item_data.get("name", ""),
-                "price": item_data.get("rate", 0.0),
-                "quantity": item_data.get("quantity", 1),
-                "total": item_data.get("amount", 0.0),
-                "type": "Debit"
-            }
-            self.items.append(item)
-        
-        # Update UI
-        self.update_items_list()
-        self.update_total()
+            try:
+                items.append(self.scanned_item(item_data))
+            except (ValueError, TypeError, AttributeError):
+                skipped.append(item_data.get("name") if isinstance(item_data, dict) else None)
+
+        # Replace the bill's lines with the scanned ones (undoable as one step)
+        self.cart.replace(items)
         
         # Set other fields if available
         if "date" in invoice_data:
             self.date_entry.setText(invoice_data["date"])
         
+        message = f"Loaded {len(items)} items from scanned invoice."
+        if skipped:
+            names = ", ".join(str(name) for name in skipped if name)
+            message += f"\nSkipped {len(skipped)} unreadable line(s){': ' + names if names else ''}; please add them by hand."
         QMessageBox.information(
             self, 
             "Invoice Data Loaded", 
-            f"Loaded {len(invoice_data.get('items', []))} items from scanned invoice."
+            message
+        )
+
+    @staticmethod
+    def scanned_item(item_data: dict) -> LineItem:
+        """One scanned invoice line as a LineItem; raises ValueError if its numbers don't parse"""
+        quantity = item_data.get("quantity", 1)
+        if isinstance(quantity, str):
+            quantity = float(quantity)
+        if isinstance(quantity, bool) or not isinstance(quantity, (int, float)) or not math.isfinite(quantity):
+            raise ValueError(f"Not a quantity: {quantity!r}")
+        if isinstance(quantity, float) and quantity.is_integer():
+            quantity = int(quantity)
+        return LineItem(
+            name=str(item_data.get("name") or ""),
+            price=to_paise(item_data.get("rate", 0.0)),
+            quantity=quantity,
+            total=to_paise(item_data.get("amount", 0.0))
         )
 
     def add_item(self, item):
         if self.transaction_type_combo.currentText() == "Debit":
-            # Check if item already exists (by name)
-            for existing in self.items:
-                if existing["name"].lower() == item["name"].lower():
-                    existing["quantity"] += item["quantity"]
-                    existing["total"] += item["total"]
-                    self.update_items_list()
-                    self.update_total()
-                    self.item_entry_widget.item_name_combo.setFocus()
-                    return
-            self.items.append(item)
-            self.update_items_list()
-            self.update_total()
+            # Lines with the same name (case-insensitive) are merged by the cart
+            self.cart.add(item)
+            # Set focus to item name text area after adding
             self.item_entry_widget.item_name_combo.setFocus()
 
     def remove_item_by_index(self, index):
-        if 0 <= index < len(self.items):
-            del self.items[index]
-            self.update_items_list()
-            self.update_total()
+        if 0 <= index < len(self.cart):
+            self.cart.remove(index)
 
-    def update_items_list(self):
-        self.item_list_widget.update_items(self.items)
+    def on_cart_changed(self, event, row):
+        if event in ("inserted", "removed", "updated", "reset"):
+            self.update_total()
 
     def update_total(self):
-        total = sum(item["total"] for item in self.items)
-        self.total_display.setText(f"₹{total:.2f}")
+        self.total_display.setText(format_rupees(self.cart.total))
 
     def update_transaction_fields(self):
         transaction_type = self.transaction_type_combo.currentText()
@@ -316,9 +351,7 @@ class EnhancedBillGeneratorWidget(QWidget):
             self.credit_amount_label.show()
             self.credit_amount_entry.show()
             self.remarks_entry.show()
-            self.items.clear()
-            self.update_items_list()
-            self.update_total()
+            self.cart.clear()
         else:
             self.item_entry_widget.show()
             self.item_list_widget.show()
@@ -329,11 +362,9 @@ class EnhancedBillGeneratorWidget(QWidget):
             self.credit_amount_entry.setValue(0.0)
 
     def clear_form(self):
-        self.items = []
-        self.update_items_list()
+        self.cart.clear()
         self.item_entry_widget.clear_fields()
-        self.total_display.setText("₹0.00")
-        self.date_entry.clear()
+        self.date_entry.setText(datetime.datetime.now().strftime('%Y-%m-%d'))
         self.customer_combo.setCurrentIndex(0)
         self.transaction_type_combo.setCurrentIndex(0)
         self.remarks_entry.clear()
@@ -342,7 +373,7 @@ class EnhancedBillGeneratorWidget(QWidget):
 
     def generate_bill(self):
         transaction_type = self.transaction_type_combo.currentText()
-        if transaction_type == "Debit" and not self.items:
+        if transaction_type == "Debit" and not self.cart.items:
             QMessageBox.critical(self, "Error", "Please add items to the bill for a Debit transaction.")
             return
         elif transaction_type == "Credit" and self.credit_amount_entry.value() <= 0:
@@ -354,20 +385,20 @@ class EnhancedBillGeneratorWidget(QWidget):
             date = self.date_entry.text()
             remarks = self.remarks_entry.text().strip()
             if transaction_type == "Debit":
-                items = self.items
-                total_amount = sum(item["total"] for item in items)
+                items = list(self.cart.items)
+                total_amount = self.cart.total
             else:
-                items = [{
-                    "name": remarks if remarks else "Credit Entry",
-                    "price": 0.0,
-                    "quantity": 0,
-                    "total": self.credit_amount_entry.value(),
-                    "type": "Credit",
-                    "remarks": remarks
-                }]
-                total_amount = self.credit_amount_entry.value()
+                total_amount = to_paise(self.credit_amount_entry.value())
+                items = [LineItem(
+                    name=remarks if remarks else "Credit Entry",
+                    price=0,
+                    quantity=0,
+                    total=total_amount,
+                    type="Credit",
+                    remarks=remarks
+                )]
             bill = Bill(
-                bill_number=self.bill_number,
+                bill_number=None,
                 customer_key=customer_key,
                 date=date,
                 items=items,
@@ -375,9 +406,8 @@ class EnhancedBillGeneratorWidget(QWidget):
                 transaction_type=transaction_type,
                 remarks=remarks
             )
-            # Save to DB
-            self.db_manager.save_bill(bill)
-            self.update_bill_number()
+            # Save to DB (allocates the bill number)
+            self.data_service.save_bill(bill)
             # Generate HTML invoice for Debit
             if transaction_type == "Debit":
                 self.generate_html_invoice(bill)
@@ -387,33 +417,11 @@ class EnhancedBillGeneratorWidget(QWidget):
             QMessageBox.critical(self, "Error", f"Failed to record transaction: {str(e)}")
 
     def generate_html_invoice(self, bill):
-        # Load template
         try:
-            with open(self.template_path, "r", encoding="utf-8") as f:
-                template = f.read()
-            customer = CUSTOMERS.get(bill.customer_key, {"name": bill.customer_key, "address": ""})
-            item_rows = ""
-            for idx, item in enumerate(bill.items):
-                item_rows += f"<tr><td>{idx+1}</td><td>{item['name'].split()[0]}</td><td>{item['quantity']} kg</td><td>₹{item['price']:.2f}</td><td colspan='2'>₹{item['total']:.2f}</td></tr>"
-            html_content = template.format(
-                bill_number=bill.bill_number,
-                customer_name=customer["name"],
-                customer_address=customer["address"],
-                date=bill.date,
-                item_rows=item_rows,
-                total=f"₹{bill.total_amount:.2f}"
-            )
-            temp_html_path = os.path.join(os.path.dirname(self.template_path), f"temp_invoice_{bill.bill_number}.html")
-            with open(temp_html_path, "w", encoding="utf-8") as file:
-                file.write(html_content)
-            webbrowser.open(temp_html_path)
+            webbrowser.open(self.invoice_service.render(bill))
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to generate invoice: {str(e)}")
 
-    def refresh_suggestions(self):
-        self.suggestions = self.db_manager.get_products()
-        self.item_entry_widget.set_suggestions(self.suggestions)
-
-    def showEvent(self, event):
-        super().showEvent(event)
-        self.refresh_suggestions()
\ No newline at end of file
+    def on_product_added(self, name, row):
+        # The shared product index already has it; only the combo box needs the new row
+        self.item_entry_widget.insert_suggestion(row, name)
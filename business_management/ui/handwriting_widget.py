@@ -8,6 +8,7 @@ from PyQt5.QtGui import QFont, QPixmap, QImage
 import os
 from business_management.services.ai_service import AIService
 from business_management.services.image_service import ImageService
+from business_management.services.result_cache import ResultCache
 
 class HandwritingRecognitionThread(QThread):
     """Thread for handwriting recognition processing"""
@@ -19,16 +20,15 @@ class HandwritingRecognitionThread(QThread):
         super().__init__()
         self.image_data = image_data
         self.language = language
-        self.ai_service = AIService()
+        # Recognizing the same image again is answered from the result cache
+        self.ai_service = AIService(cache=ResultCache.shared())
         self.image_service = ImageService()
     
     def run(self):
         try:
-            # Preprocess image
-            processed_image = self.image_service.preprocess_image(self.image_data)
-            
-            # Recognize handwriting
-            result = self.ai_service.recognize_handwriting(processed_image, self.language)
+            # Preprocess (skipped on a cache hit) and recognize handwriting
+            result = self.ai_service.recognize_handwriting(self.image_data, self.language,
+                                                           preprocess=self.image_service.preprocess_image)
             
             self.result_ready.emit(result)
             
@@ -1,14 +1,19 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox, 
-    QProgressBar, QGroupBox, QLineEdit, QComboBox
+    QProgressBar, QGroupBox, QLineEdit, QComboBox, QSpinBox, QHeaderView
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QPixmap
 from business_management.services.ai_service import AIService
+from business_management.services.batch_scan import (
+    DEFAULT_MODEL_WORKERS, BatchScanner, BatchScanResult, default_preprocess_workers, image_files
+)
 from business_management.services.image_service import ImageService
+from business_management.services.result_cache import ResultCache
 from business_management.models.bill import Bill
 import json
+import os
 
 class InvoiceScanThread(QThread):
     """Thread for invoice scanning and analysis"""
@@ -19,27 +24,49 @@ class InvoiceScanThread(QThread):
     def __init__(self, image_data):
         super().__init__()
         self.image_data = image_data
-        self.ai_service = AIService()
+        # Rescanning the same invoice is answered from the result cache
+        self.ai_service = AIService(cache=ResultCache.shared())
         self.image_service = ImageService()
     
     def run(self):
         try:
-            # Preprocess image
-            processed_image = self.image_service.preprocess_image(self.image_data)
-            
-            # Analyze invoice
-            result = self.ai_service.analyze_invoice_image(processed_image)
+            # Preprocess (skipped on a cache hit) and analyze invoice
+            result = self.ai_service.analyze_invoice_image(self.image_data, preprocess=self.image_service.preprocess_image)
             
             self.result_ready.emit(result)
             
         except Exception as e:
             self.error_occurred.emit(str(e))
 
+class BatchScanThread(QThread):
+    """Thread running a BatchScanner over many invoice images"""
+    
+    result_ready = pyqtSignal(object)  # BatchScanResult, as each image finishes
+    batch_finished = pyqtSignal(int)  # images scanned
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, paths, preprocess_workers, model_workers):
+        super().__init__()
+        self.paths = paths
+        self.scanner = BatchScanner(AIService(cache=ResultCache.shared()), preprocess_workers, model_workers)
+    
+    def run(self):
+        try:
+            self.batch_finished.emit(self.scanner.run(self.paths, self.result_ready.emit))
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+    
+    def cancel(self):
+        self.scanner.cancel()
+
 class InvoiceScannerWidget(QWidget):
     """Widget for scanning and analyzing invoice images"""
     
     invoice_data_ready = pyqtSignal(dict)  # Signal to emit extracted invoice data
     
+    BATCH_COLUMNS = ["File", "Vendor", "Invoice #", "Total", "Confidence", "Status",
+                     "Read ms", "Preprocess ms", "Model ms", "Total ms"]
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.font = QFont("Arial", 12)
@@ -47,6 +74,8 @@ class InvoiceScannerWidget(QWidget):
         self.current_image_data = None
         self.scan_thread = None
         self.extracted_data = None
+        self.batch_thread = None
+        self.batch_results = []
         self.init_ui()
     
     def init_ui(self):
@@ -86,6 +115,54 @@ class InvoiceScannerWidget(QWidget):
         upload_group.setLayout(upload_layout)
         layout.addWidget(upload_group)
         
+        # Batch scanning: results are listed as they finish; pick one to review it below
+        batch_group = QGroupBox("Batch Scan")
+        batch_layout = QVBoxLayout()
+        
+        batch_btn_layout = QHBoxLayout()
+        self.batch_files_btn = QPushButton("Scan Files...")
+        self.batch_files_btn.setFont(self.font)
+        self.batch_files_btn.clicked.connect(self.select_batch_files)
+        self.batch_folder_btn = QPushButton("Scan Folder...")
+        self.batch_folder_btn.setFont(self.font)
+        self.batch_folder_btn.clicked.connect(self.select_batch_folder)
+        self.batch_stop_btn = QPushButton("Stop")
+        self.batch_stop_btn.setFont(self.font)
+        self.batch_stop_btn.clicked.connect(self.stop_batch)
+        self.batch_stop_btn.setEnabled(False)
+        batch_btn_layout.addWidget(self.batch_files_btn)
+        batch_btn_layout.addWidget(self.batch_folder_btn)
+        batch_btn_layout.addWidget(self.batch_stop_btn)
+        batch_btn_layout.addStretch()
+        batch_btn_layout.addWidget(QLabel("Preprocess workers:"))
+        self.preprocess_workers_spin = QSpinBox()
+        self.preprocess_workers_spin.setRange(1, 64)
+        self.preprocess_workers_spin.setValue(default_preprocess_workers())
+        batch_btn_layout.addWidget(self.preprocess_workers_spin)
+        batch_btn_layout.addWidget(QLabel("Model workers:"))
+        self.model_workers_spin = QSpinBox()
+        self.model_workers_spin.setRange(1, 64)
+        self.model_workers_spin.setValue(DEFAULT_MODEL_WORKERS)
+        batch_btn_layout.addWidget(self.model_workers_spin)
+        batch_layout.addLayout(batch_btn_layout)
+        
+        self.batch_progress = QProgressBar()
+        self.batch_progress.setVisible(False)
+        batch_layout.addWidget(self.batch_progress)
+        
+        self.batch_table = QTableWidget()
+        self.batch_table.setColumnCount(len(self.BATCH_COLUMNS))
+        self.batch_table.setHorizontalHeaderLabels(self.BATCH_COLUMNS)
+        self.batch_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.batch_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.batch_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.batch_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.batch_table.currentCellChanged.connect(self.review_batch_result)
+        batch_layout.addWidget(self.batch_table)
+        
+        batch_group.setLayout(batch_layout)
+        layout.addWidget(batch_group)
+        
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -227,6 +304,18 @@ class InvoiceScannerWidget(QWidget):
             QMessageBox.critical(self, "Error", f"Invoice analysis failed: {result['error']}")
             return
         
+        self.show_result(result)
+        
+        # Show confidence score
+        confidence = result.get("confidence", 0.0)
+        QMessageBox.information(
+            self, 
+            "Scan Complete", 
+            f"Invoice analysis completed!\nConfidence: {confidence:.1%}"
+        )
+    
+    def show_result(self, result):
+        """Fill the form with an analysis result"""
         # Store extracted data
         self.extracted_data = result
         
@@ -253,15 +342,109 @@ class InvoiceScannerWidget(QWidget):
         # Enable action buttons
         self.create_bill_btn.setEnabled(True)
         self.export_btn.setEnabled(True)
-        
-        # Show confidence score
-        confidence = result.get("confidence", 0.0)
+    
+    def select_batch_files(self):
+        """Pick several invoice images to scan together"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, 
+            "Select Invoice Images", 
+            "", 
+            "Image Files (*.png *.jpg *.jpeg *.bmp *.tiff *.tif)"
+        )
+        if file_paths:
+            self.start_batch(file_paths)
+    
+    def select_batch_folder(self):
+        """Scan every invoice image in a folder"""
+        folder = QFileDialog.getExistingDirectory(self, "Select Invoice Folder")
+        if not folder:
+            return
+        file_paths = image_files(folder)
+        if not file_paths:
+            QMessageBox.warning(self, "Warning", "No invoice images found in that folder.")
+            return
+        self.start_batch(file_paths)
+    
+    def start_batch(self, file_paths):
+        """Scan file_paths in the background, listing each result as it finishes"""
+        if self.batch_thread is not None and self.batch_thread.isRunning():
+            QMessageBox.warning(self, "Warning", "A batch scan is already running.")
+            return
+        self.batch_results = []
+        self.batch_table.setRowCount(0)
+        self.batch_progress.setRange(0, len(file_paths))
+        self.batch_progress.setValue(0)
+        self.batch_progress.setVisible(True)
+        self.batch_files_btn.setEnabled(False)
+        self.batch_folder_btn.setEnabled(False)
+        self.batch_stop_btn.setEnabled(True)
+        
+        self.batch_thread = BatchScanThread(list(file_paths), self.preprocess_workers_spin.value(),
+                                            self.model_workers_spin.value())
+        self.batch_thread.result_ready.connect(self.on_batch_result)
+        self.batch_thread.batch_finished.connect(self.on_batch_finished)
+        self.batch_thread.error_occurred.connect(self.on_batch_error)
+        self.batch_thread.start()
+    
+    def stop_batch(self):
+        """Stop queueing images; those already in progress still finish"""
+        if self.batch_thread is not None:
+            self.batch_thread.cancel()
+        self.batch_stop_btn.setEnabled(False)
+    
+    def on_batch_result(self, item: BatchScanResult):
+        """Append a finished image to the review table"""
+        self.batch_results.append(item)
+        row = self.batch_table.rowCount()
+        self.batch_table.insertRow(row)
+        result = item.result
+        status = f"Error: {item.error}" if item.error else ("Cached" if item.cached else "OK")
+        timings = [item.timings.get(stage) for stage in ("read", "preprocess", "model", "total")]
+        values = [os.path.basename(item.path), result.get("vendor", ""), str(result.get("invoice_number", "")),
+                  f"₹{result.get('total', 0.0):.2f}", f"{result.get('confidence', 0.0):.1%}", status]
+        values += ["" if ms is None else f"{ms:.0f}" for ms in timings]
+        for column, value in enumerate(values):
+            cell = QTableWidgetItem(value)
+            if column == 0:
+                cell.setToolTip(item.path)
+            self.batch_table.setItem(row, column, cell)
+        self.batch_progress.setValue(len(self.batch_results))
+    
+    def review_batch_result(self, row, column=0, previous_row=-1, previous_column=-1):
+        """Show the selected batch result in the form for review"""
+        if row == previous_row or not 0 <= row < len(self.batch_results):
+            return
+        item = self.batch_results[row]
+        if item.error:
+            return
+        self.show_result(item.result)
+        self.current_image_data = None
+        self.scan_btn.setEnabled(False)
+        if not item.path.lower().endswith('.pdf'):
+            pixmap = QPixmap(item.path)
+            self.image_label.setPixmap(pixmap.scaled(400, 250, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    
+    def on_batch_finished(self, scanned):
+        """Report a finished (or stopped) batch"""
+        self.end_batch()
+        failed = sum(1 for item in self.batch_results if item.error)
+        cached = sum(1 for item in self.batch_results if item.cached)
         QMessageBox.information(
             self, 
-            "Scan Complete", 
-            f"Invoice analysis completed!\nConfidence: {confidence:.1%}"
+            "Batch Scan Complete", 
+            f"Scanned {scanned} invoices: {scanned - failed} analyzed ({cached} from cache), {failed} failed."
         )
     
+    def on_batch_error(self, error_message):
+        self.end_batch()
+        QMessageBox.critical(self, "Batch Scan Error", error_message)
+    
+    def end_batch(self):
+        self.batch_progress.setVisible(False)
+        self.batch_files_btn.setEnabled(True)
+        self.batch_folder_btn.setEnabled(True)
+        self.batch_stop_btn.setEnabled(False)
+    
     def on_scan_error(self, error_message):
         """Handle scan error"""
         self.progress_bar.setVisible(False)
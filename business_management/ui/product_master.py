@@ -1,24 +1,19 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
-from business_management.database.db_manager import DBManager
-import os
+from business_management.services.data_service import DataService
 from business_management.resources.suggestions import INITIAL_PRODUCTS
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'bills.db')
-
-def ensure_initial_products(db_manager):
-    existing = set(db_manager.get_products())
-    for prod in INITIAL_PRODUCTS:
-        if prod not in existing:
-            db_manager.add_product(prod)
+def ensure_initial_products(data_service):
+    data_service.ensure_products(INITIAL_PRODUCTS)
 
 class ProductMasterWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Product Master List")
-        self.db_manager = DBManager(DB_PATH)
-        ensure_initial_products(self.db_manager)
+        self.data_service = DataService.instance()
+        ensure_initial_products(self.data_service)
         self.init_ui()
         self.refresh_products()
+        self.data_service.product_added.connect(self.on_product_added)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -41,16 +36,17 @@ class ProductMasterWidget(QWidget):
 
     def refresh_products(self):
         self.product_list.clear()
-        products = self.db_manager.get_products()
-        self.product_list.addItems(products)
+        self.product_list.addItems(self.data_service.products())
+
+    def on_product_added(self, name, row):
+        self.product_list.insertItem(row, name)
 
     def add_product(self):
         name = self.product_input.text().strip()
         if not name:
             QMessageBox.warning(self, "Input Error", "Product name cannot be empty.")
             return
-        if self.db_manager.add_product(name):
-            self.refresh_products()
+        if self.data_service.add_product(name):
             self.product_input.clear()
         else:
             QMessageBox.warning(self, "Duplicate", f'Product "{name}" already exists!') 
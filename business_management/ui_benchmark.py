@@ -0,0 +1,228 @@
+"""
+Qt benchmarks of the UI, run on the offscreen platform unless QT_QPA_PLATFORM is set.
+
+item-list: adds --lines lines (5,000 by default) to the bill's item list one
+at a time, letting the view paint after each, then merges quantities into
+and removes lines as the bill widgets do. The table model only inserts and
+paints the rows involved; the QListWidget it replaced rebuilt a widget,
+layout, label and button for every line on every change, so it adds only
+--legacy-lines lines. Each list runs in its own process and reports
+milliseconds per add and peak RSS growth.
+
+startup: time-to-first-paint of MainWindow in a fresh process, on a copy of
+the app's bills.db: from before PyQt5 and the app are imported until the
+window's first paint event. Pages and AI tabs are built on first use; the
+eager run builds all of them, imports cv2, numpy, PIL and requests and
+seeds the products before showing the window, as startup used to. Medians
+of --repeat runs of each, with the import and MainWindow() times, and
+which of the heavy modules were loaded by then.
+
+Usage:
+    python -m business_management.ui_benchmark item-list
+    python -m business_management.ui_benchmark item-list --lines 20000 --legacy-lines 500
+    python -m business_management.ui_benchmark startup --repeat 9
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20 if resource else 0.0
+
+def legacy_item_list():
+    """The QListWidget item list before ItemListModel: every change rebuilds a widget per line"""
+    from PyQt5.QtGui import QFont
+    from PyQt5.QtWidgets import QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton, QVBoxLayout, QWidget
+    from business_management.utils.money import format_rupees
+
+    class LegacyItemList(QWidget):
+        def __init__(self):
+            super().__init__()
+            self.font = QFont("Arial", 12)
+            self.list_widget = QListWidget()
+            self.list_widget.setFont(self.font)
+            layout = QVBoxLayout()
+            layout.addWidget(self.list_widget)
+            self.setLayout(layout)
+
+        def update_items(self, items):
+            self.list_widget.clear()
+            for item in items:
+                widget = QWidget()
+                h_layout = QHBoxLayout()
+                h_layout.setContentsMargins(0, 0, 0, 0)
+                label = QLabel(f"{item.name} - {format_rupees(item.price)} x {item.quantity} = {format_rupees(item.total)}")
+                label.setFont(self.font)
+                remove_btn = QPushButton("✖")
+                remove_btn.setFixedSize(24, 24)
+                remove_btn.setStyleSheet("color: red; font-weight: bold;")
+                h_layout.addWidget(label)
+                h_layout.addWidget(remove_btn)
+                widget.setLayout(h_layout)
+                list_item = QListWidgetItem(self.list_widget)
+                list_item.setSizeHint(widget.sizeHint())
+                self.list_widget.addItem(list_item)
+                self.list_widget.setItemWidget(list_item, widget)
+
+    return LegacyItemList()
+
+def measure_item_list(mode: str, lines: int, edits: int) -> dict:
+    """Add lines one at a time, then merge into and remove edits lines, painting after each change"""
+    from PyQt5.QtWidgets import QApplication
+    from business_management.models.bill import LineItem
+    from business_management.models.cart import Cart
+    from business_management.ui.components.item_list import ItemListWidget
+
+    app = QApplication([])
+    cart = Cart()
+    widget = ItemListWidget(cart=cart) if mode == "model" else legacy_item_list()
+    widget.resize(800, 600)
+    widget.show()
+    app.processEvents()
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    for number in range(lines):
+        cart.add(LineItem(f"Item {number}", 1250, 2, 2500))
+        if mode == "legacy":
+            widget.update_items(cart.items)
+        app.processEvents()
+    report = {"add_ms": (time.perf_counter() - start) / lines * 1000, "rss_mb": peak_rss_mb() - baseline}
+
+    edits = min(edits, lines)
+    start = time.perf_counter()
+    for number in range(edits):
+        cart.add(LineItem(f"Item {number}", 1250, 1, 1250))
+        if mode == "legacy":
+            widget.update_items(cart.items)
+        app.processEvents()
+    for _ in range(edits):
+        cart.remove(0)
+        if mode == "legacy":
+            widget.update_items(cart.items)
+        app.processEvents()
+    report["edit_ms"] = (time.perf_counter() - start) / (2 * edits) * 1000 if edits else 0.0
+    return report
+
+def child(args, *extra) -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    completed = subprocess.run([sys.executable, "-m", "business_management.ui_benchmark", args.command, *extra],
+                               check=True, stdout=subprocess.PIPE, text=True, env=env)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+def bench_item_list(args):
+    if args.mode:
+        print(json.dumps(measure_item_list(args.mode, args.lines, args.edits)))
+        return
+    print(f"{'list':<8}{'lines':>7}{'per add':>12}{'per edit':>12}{'peak RSS growth':>18}")
+    for mode, lines in (("model", args.lines), ("legacy", args.legacy_lines)):
+        report = child(args, "--mode", mode, "--lines", str(lines), "--edits", str(args.edits))
+        rss = f"{report['rss_mb']:>12.1f} MB" if resource else f"{'-':>15}"
+        print(f"{mode:<8}{lines:>7}{report['add_ms']:>9.2f} ms{report['edit_ms']:>9.2f} ms{rss:>18}")
+
+# What the AI tabs' modules used to import at the top
+HEAVY_MODULES = ("cv2", "numpy", "PIL", "requests")
+
+def measure_startup(mode: str, db_path: str) -> dict:
+    """Import the app, build MainWindow and show it: milliseconds to each step, from before the imports"""
+    start = time.perf_counter()
+    from PyQt5.QtCore import QEvent, QObject
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([])
+    import business_management.main as main_module
+    from business_management.services.data_service import DataService
+    from business_management.ui.product_master import ensure_initial_products
+    report = {"import_ms": (time.perf_counter() - start) * 1000}
+    DataService._instance = DataService(db_path)
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Paint and "paint_ms" not in report:
+                report["paint_ms"] = (time.perf_counter() - start) * 1000
+            return False
+
+    constructed = time.perf_counter()
+    if mode == "eager":
+        for module in HEAVY_MODULES:
+            importlib.import_module(module)
+    window = main_module.MainWindow()
+    if mode == "eager":
+        for name, _, _ in main_module.PAGES:
+            window.show_page(name)
+        for index in list(window.bill_gen.lazy_tabs):
+            window.bill_gen.build_tab(index)
+        window.show_page("bill_gen")
+        ensure_initial_products(DataService.instance())
+    report["window_ms"] = (time.perf_counter() - constructed) * 1000
+    paint_filter = FirstPaint()
+    app.installEventFilter(paint_filter)
+    window.show()
+    while "paint_ms" not in report:
+        app.processEvents()
+    report["heavy"] = [module for module in HEAVY_MODULES if module in sys.modules]
+    # What the app runs on aboutToQuit, while the window still exists
+    main_module.CompletionThread.stop_all()
+    main_module.ConnectionPool.close_all()
+    return report
+
+def bench_startup(args):
+    if args.mode:
+        print(json.dumps(measure_startup(args.mode, args.db)))
+        return
+    from business_management.database.db_manager import DEFAULT_DB_PATH
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "bills.db")
+        if os.path.exists(DEFAULT_DB_PATH):
+            shutil.copyfile(DEFAULT_DB_PATH, db_path)
+        # One unmeasured run migrates the copy and seeds its products
+        child(args, "--mode", "lazy", "--db", db_path)
+        runs = {"lazy": [], "eager": []}
+        for _ in range(args.repeat):
+            for mode in runs:
+                runs[mode].append(child(args, "--mode", mode, "--db", db_path))
+    print(f"{'startup':<8}{'imports':>10}{'MainWindow()':>15}{'first paint':>14}   heavy modules loaded")
+    for mode, reports in runs.items():
+        medians = {key: statistics.median(report[key] for report in reports)
+                   for key in ("import_ms", "window_ms", "paint_ms")}
+        print(f"{mode:<8}{medians['import_ms']:>7.0f} ms{medians['window_ms']:>12.0f} ms"
+              f"{medians['paint_ms']:>11.0f} ms   {', '.join(reports[-1]['heavy']) or 'none'}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the UI on the offscreen Qt platform")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    item_list = commands.add_parser("item-list", help="Adding bill lines: table model against the QListWidget")
+    item_list.add_argument("--lines", type=int, default=5000, help="Lines added to the table model list")
+    item_list.add_argument("--legacy-lines", type=int, default=250, help="Lines added to the old list (quadratic)")
+    item_list.add_argument("--edits", type=int, default=100, help="Lines merged into, then removed, after adding")
+    # Child processes, one per list, so each reports its own peak memory
+    item_list.add_argument("--mode", choices=("model", "legacy"), help=argparse.SUPPRESS)
+    item_list.set_defaults(run=bench_item_list)
+
+    startup = commands.add_parser("startup", help="Time to the main window's first paint, lazy against eager pages")
+    startup.add_argument("--repeat", type=int, default=5, help="Runs of each (medians reported)")
+    # Child processes: each run needs a fresh interpreter
+    startup.add_argument("--mode", choices=("lazy", "eager"), help=argparse.SUPPRESS)
+    startup.add_argument("--db", help=argparse.SUPPRESS)
+    startup.set_defaults(run=bench_startup)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import datetime
+
+# Date formats accepted from user input and found in older bills.db files.
+# Day-first formats come before month-first ones, matching local usage.
+DATE_INPUT_FORMATS = (
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%Y/%m/%d",
+    "%d-%m-%y",
+    "%d/%m/%y",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+def to_iso_date(value) -> str:
+    """Normalize a date string (or date) to ISO-8601 ``YYYY-MM-DD``.
+
+    Raises ValueError if the value does not match any known format.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    text = str(value).strip()
+    if len(text) == 10 and text[4] == "-":
+        try:
+            return datetime.date.fromisoformat(text).isoformat()
+        except ValueError:
+            pass
+    for fmt in DATE_INPUT_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value!r}")
@@ -0,0 +1,43 @@
+import importlib
+import threading
+from types import ModuleType
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module that is only imported on first attribute access
+
+    Heavy optional dependencies (cv2, numpy, PIL, requests) can be bound at
+    module level as usual (``cv2 = lazy_import("cv2")``) without paying for
+    the import until a function actually uses them. The real module is
+    imported with importlib, so packages that swap themselves in
+    sys.modules during import (cv2 does) work too.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """A module proxy for name that imports it on first use (ImportError surfaces then)."""
+    return LazyModule(name)
@@ -0,0 +1,49 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Money is held as integer paise everywhere (models, database, cart) and only
+# converted to rupees at the edges: widget input and rendering.
+PAISE_PER_RUPEE = 100
+
+_ONE = Decimal(1)
+
+
+def to_paise(rupees) -> int:
+    """Rupees (int, float, str or Decimal) -> integer paise, half a paisa rounding away from zero.
+
+    Floats are converted through their shortest repr, so 0.285 becomes 29
+    paise rather than the 28 its binary value would round to. Strings may
+    carry thousands separators and a leading ₹ (as format_rupees writes).
+
+    Raises ValueError for anything that isn't a finite amount (None, "",
+    "abc", NaN).
+    """
+    if isinstance(rupees, int):
+        return rupees * PAISE_PER_RUPEE
+    try:
+        value = Decimal(str(rupees).strip().lstrip("₹").replace(",", "")) * PAISE_PER_RUPEE
+        return int(value.quantize(_ONE, rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Not an amount: {rupees!r}") from None
+
+
+def to_rupees(paise: int) -> float:
+    """Paise as a float number of rupees, for widgets such as QDoubleSpinBox."""
+    return paise / PAISE_PER_RUPEE
+
+
+def line_total(price: int, quantity) -> int:
+    """price (paise) times quantity, rounded to the paisa for fractional quantities."""
+    if isinstance(quantity, int):
+        return price * quantity
+    value = Decimal(price) * Decimal(str(quantity))
+    return int(value.quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+def format_amount(paise: int) -> str:
+    """Paise as a plain rupee amount with two decimals, e.g. -123456 -> "-1234.56"."""
+    rupees, rest = divmod(abs(paise), PAISE_PER_RUPEE)
+    return f"{'-' if paise < 0 else ''}{rupees}.{rest:02d}"
+
+
+def format_rupees(paise: int) -> str:
+    return f"₹{format_amount(paise)}"
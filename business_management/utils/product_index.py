@@ -0,0 +1,398 @@
+import bisect
+import heapq
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from business_management.utils.transliteration import graphemes, is_tamil, phonetic_key, split_gloss
+
+try:
+    from Levenshtein import distance as _edit_distance
+except ImportError:  # python-Levenshtein is optional here
+    def _edit_distance(a: str, b: str) -> int:
+        previous = list(range(len(b) + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+            previous = current
+        return previous[-1]
+
+# Word prefixes are indexed up to this many characters (grapheme clusters for
+# Tamil); longer query words are matched by filtering the candidates of
+# their first MAX_PREFIX characters.
+MAX_PREFIX = 6
+# Fuzzy queries count trigram postings, rarest first, until this many ids
+# have been counted; the common trigrams left over hardly narrow the search.
+MAX_GRAM_POSTINGS = 5000
+# How many of the best ranked prefix matches are gathered as candidates.
+CANDIDATE_FACTOR = 5
+# Prefix postings hold rank codes, (word position, name length, product id)
+# packed into one integer so that sorting them sorts by rank (ids below 2**24).
+_POSITION_SHIFT = 48
+_LENGTH_SHIFT = 24
+_ID_MASK = (1 << _LENGTH_SHIFT) - 1
+
+_SPLIT = re.compile(r"[\s()\[\],./-]+")
+
+def _words(text: str) -> List[str]:
+    return [word for word in _SPLIT.split(text.casefold()) if word]
+
+def _tokens(query: str) -> List[tuple]:
+    return [(token, phonetic_key(token, partial=True)) for token in _words(query)]
+
+def _prefix_limit(word: str) -> int:
+    if is_tamil(word):
+        return sum(len(cluster) for cluster in graphemes(word)[:MAX_PREFIX])
+    return MAX_PREFIX
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {' '.join(_words(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _letter_difference(letters: Dict[str, int], word: str) -> int:
+    """Size of the multiset difference between letters (a word's letter counts) and word's letters"""
+    # str.count over a handful of distinct letters beats Counter arithmetic;
+    # this runs for every typo candidate
+    return (sum(abs(count - word.count(letter)) for letter, count in letters.items())
+            + sum(1 for letter in word if letter not in letters))
+
+def _deletions(word: str) -> Set[str]:
+    """The word and every string one character shorter than it"""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+def _rank_code(position: int, length: int, product_id: int) -> int:
+    return (position << _POSITION_SHIFT) | (min(length, _ID_MASK) << _LENGTH_SHIFT) | product_id
+
+class ProductSearchIndex:
+    """
+    In-memory search index over product names for the item completer
+
+    Two inverted indexes are kept: word prefix -> product ids for
+    type-ahead matches, and character trigram -> product ids for fuzzy
+    queries, plus a single-deletion neighbourhood index over whole words
+    for misspellings such as transposed letters. Queries only touch the
+    posting lists of their own prefixes/trigrams/deletions instead of
+    scoring every product, and names can be added or removed one at a time.
+    Prefix posting lists are kept in rank order, so the best prefix
+    matches are read first.
+
+    Every word is also keyed by its phonetic romanization (see
+    utils.transliteration), so "ragi maavu", "ராகி மாவு" and "Ragi flour"
+    all reach "ராகி மாவு (Ragi flour)" through hashed lookups.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = []
+        self._words: List[List[str]] = []
+        self._keys: List[List[str]] = []
+        self._gram_counts: List[int] = []
+        self._exact: Dict[str, int] = {}
+        self._ids: Dict[str, int] = {}
+        self._removed: Set[int] = set()
+        self._prefixes: Dict[str, array] = defaultdict(lambda: array("Q"))
+        self._grams: Dict[str, List[int]] = defaultdict(list)
+        self._word_ids: Dict[str, List[int]] = defaultdict(list)
+        self._deletions: Dict[str, List[str]] = defaultdict(list)
+        self._lock = threading.RLock()
+        # Bumped on every add/remove so caches of search results can tell they are stale.
+        self.version = 0
+        self.update(names)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, name: str):
+        return name.strip().casefold() in self._ids
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [self._names[i] for i in sorted(self._ids.values())]
+
+    def add(self, name: str) -> bool:
+        return self._add(name, None)
+
+    def _add(self, name: str, unsorted: Optional[Set[str]]) -> bool:
+        """add(); the prefixes whose postings were appended to rather than kept sorted go in unsorted"""
+        name = name.strip()
+        key = name.casefold()
+        with self._lock:
+            if not key or key in self._ids:
+                return False
+            product_id = len(self._names)
+            words = _words(name)
+            keys = [phonetic_key(word) for word in words]
+            self._names.append(name)
+            self._words.append(words)
+            self._keys.append(keys)
+            self._ids[key] = product_id
+            terms = set(words) | set(keys)
+            positions = {}
+            for position, pair in enumerate(zip(words, keys)):
+                for term in pair:
+                    for length in range(1, min(len(term), _prefix_limit(term)) + 1):
+                        positions.setdefault(term[:length], position)
+            for prefix, position in positions.items():
+                code = _rank_code(position, len(name), product_id)
+                if unsorted is None:
+                    bisect.insort(self._prefixes[prefix], code)
+                else:
+                    self._prefixes[prefix].append(code)
+            if unsorted is not None:
+                unsorted.update(positions)
+            grams = _trigrams(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._grams[gram].append(product_id)
+            for part in (name, *split_gloss(name)):
+                if part:
+                    self._exact.setdefault(phonetic_key(part), product_id)
+            for word in terms:
+                if word not in self._word_ids:
+                    for variant in _deletions(word):
+                        self._deletions[variant].append(word)
+                self._word_ids[word].append(product_id)
+            self.version += 1
+            return True
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            product_id = self._ids.pop(name.strip().casefold(), None)
+            if product_id is None:
+                return False
+            self._removed.add(product_id)
+            self.version += 1
+            return True
+
+    def update(self, names: Iterable[str]):
+        """Make the index hold exactly these names, touching only the differences"""
+        names = list(names)
+        wanted = {name.strip().casefold() for name in names}
+        with self._lock:
+            for key in [key for key in self._ids if key not in wanted]:
+                self.remove(self._names[self._ids[key]])
+            # Appending and sorting once beats inserting every name in place
+            unsorted = set()
+            for name in names:
+                self._add(name, unsorted)
+            for prefix in unsorted:
+                self._prefixes[prefix] = array("Q", sorted(self._prefixes[prefix]))
+
+    def resolve(self, text: str) -> Optional[str]:
+        """
+        The single product a free-text name refers to, or None
+
+        Tried in order: the whole name, its Tamil part or its English gloss
+        in any spelling (one hash lookup), then the best search match.
+        """
+        with self._lock:
+            product_id = self._exact.get(phonetic_key(text.strip()))
+            if product_id is not None and product_id not in self._removed:
+                return self._names[product_id]
+            matches = self.search(text, 1)
+            return matches[0] if matches else None
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Best matching product names for a (partial) query
+
+        Names whose words start with every query word rank first (earlier
+        word position and shorter names first); if there are fewer than
+        limit of those, the rest is filled with trigram similarity matches
+        and then with names containing a word within a small edit distance
+        of the first query word.
+        """
+        return self.search_candidates(query, limit)[2]
+
+    def search_candidates(self, query: str, limit: int = 10,
+                          within: Optional[Iterable[int]] = None) -> Tuple[int, List[int], List[str]]:
+        """
+        search(), also returning the index version and the prefix-match candidates
+
+        The candidates are product ids, the limit * CANDIDATE_FACTOR best
+        ranked names the query's words prefix; when there are fewer than
+        that they are every such name. within is the candidates of an earlier query that this
+        one refines (every word extends the earlier word): only those are
+        checked instead of the posting lists. Used by CompletionCache.
+        """
+        tokens = _tokens(query)
+        with self._lock:
+            if not tokens:
+                return self.version, [], []
+            if within is None:
+                found = self._prefix_candidates(tokens, limit * CANDIDATE_FACTOR)
+            else:
+                found = [pid for pid in within if pid not in self._removed
+                         and all(self._matches(pid, token, key) for token, key in tokens)]
+            return self.version, found, self._ranked(query, tokens, found, limit)
+
+    def _ranked(self, query: str, tokens: List[tuple], found: List[int], limit: int) -> List[str]:
+        results = heapq.nsmallest(limit, found, key=lambda pid: self._prefix_rank(pid, tokens[0]))
+        for fallback in (self._fuzzy_candidates, self._typo_candidates):
+            if len(results) >= limit:
+                break
+            seen = set(results)
+            results.extend(pid for pid in fallback(query, limit) if pid not in seen)
+        return [self._names[pid] for pid in results[:limit]]
+
+    def _postings(self, token: str, key: str) -> List[array]:
+        """Rank codes of the names with a word prefixed like token in script or in sound, each list in rank order"""
+        postings = [self._prefixes.get(token[:_prefix_limit(token)], ())]
+        if key:
+            postings.append(self._prefixes.get(key[:MAX_PREFIX], ()))
+        return postings
+
+    def _matches(self, pid: int, token: str, key: str) -> bool:
+        return (any(word.startswith(token) for word in self._words[pid])
+                or bool(key) and any(word_key.startswith(key) for word_key in self._keys[pid]))
+
+    def _prefix_candidates(self, tokens: List[tuple], want: int) -> List[int]:
+        """The want best ranked names matching every token, best first"""
+        postings = [self._postings(token, key) for token, key in tokens]
+        rarest = min(range(len(postings)), key=lambda i: sum(map(len, postings[i])))
+        # A code in the first token's postings ranks its name by where the
+        # posting's prefix occurs, never after the name's actual rank, so
+        # reading them in order can stop at the first one past the worst
+        # kept. Another token's postings are shorter: they are read whole.
+        in_order = rarest == 0
+        codes = heapq.merge(*postings[0]) if in_order else chain(*postings[rarest])
+        best, seen = [], set()  # best holds negated rank codes, the worst kept on top
+        for code in codes:
+            if in_order and len(best) == want and code > -best[0]:
+                break
+            pid = code & _ID_MASK
+            if pid in seen or pid in self._removed:
+                continue
+            seen.add(pid)
+            if not all(self._matches(pid, token, key) for token, key in tokens):
+                continue
+            rank = self._prefix_rank(pid, tokens[0])
+            if len(best) < want:
+                heapq.heappush(best, -rank)
+            elif rank < -best[0]:
+                heapq.heapreplace(best, -rank)
+        return [code & _ID_MASK for code in sorted(-code for code in best)]
+
+    def _prefix_rank(self, pid: int, first: tuple) -> int:
+        token, key = first
+        words, keys = self._words[pid], self._keys[pid]
+        position = next(i for i in range(len(words))
+                        if words[i].startswith(token) or key and keys[i].startswith(key))
+        return _rank_code(position, len(self._names[pid]), pid)
+
+    def _fuzzy_candidates(self, query: str, limit: int, threshold: float = 0.3) -> List[int]:
+        grams = _trigrams(query)
+        postings = sorted((self._grams.get(gram, ()) for gram in grams), key=len)
+        counts = Counter()
+        budget = MAX_GRAM_POSTINGS
+        for posting in postings:
+            if len(posting) > budget and counts:
+                break
+            counts.update(posting[:budget])
+            budget -= len(posting)
+        scored = []
+        for pid, shared in counts.most_common(limit * CANDIDATE_FACTOR):
+            if pid in self._removed:
+                continue
+            # Dice coefficient over trigram sets
+            score = 2.0 * shared / (len(grams) + self._gram_counts[pid])
+            if score >= threshold:
+                scored.append((-score, len(self._names[pid]), pid))
+        return [pid for _, _, pid in sorted(scored)[:limit]]
+
+    def _typo_candidates(self, query: str, limit: int) -> List[int]:
+        token = _words(query)[0]
+        if len(token) < 3:
+            return []
+        letters = {letter: token.count(letter) for letter in set(token)}
+        max_distance = 1 if len(token) <= 3 else 2
+        # Two words share a single-deletion variant when they are one
+        # substitution, insertion, deletion or adjacent swap apart.
+        found = set()
+        for term in {token, phonetic_key(token)}:
+            for variant in _deletions(term):
+                for word in self._deletions.get(variant, ()):
+                    distance = _edit_distance(term, word)
+                    if distance <= max_distance:
+                        found.add((distance, word))
+        # same edit distance: prefer words made of the same letters (transpositions)
+        matches = sorted(found, key=lambda match: (match[0], _letter_difference(letters, match[1])))
+        candidates = {}
+        for _, word in matches:
+            candidates.update((pid, None) for pid in self._word_ids[word] if pid not in self._removed)
+            if len(candidates) >= limit:
+                break
+        return list(candidates)[:limit]
+
+
+class CompletionCache:
+    """
+    LRU cache of completer results keyed by query, for one consumer thread
+
+    Each entry keeps the prefix-match candidates and the ranked results of
+    its query. When the user keeps typing, the longest cached prefix that
+    holds all of its matches is filtered down instead of going back to the
+    posting lists. Entries are dropped whenever the index changes.
+    """
+
+    def __init__(self, index: ProductSearchIndex, size: int = 64):
+        self.index = index
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._version = index.version
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        tokens = _tokens(query)
+        if not tokens:
+            return []
+        key = " ".join(token for token, _ in tokens) + (" " if query[-1:].isspace() else "")
+        if self._version != self.index.version:
+            self._entries.clear()
+            self._version = self.index.version
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] == limit:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[3]
+        base = self._narrowable(key, tokens)
+        version, found, results = self.index.search_candidates(query, limit, base[1] if base else None)
+        if version != self._version:
+            # The index changed after the entries were checked, so base may be stale
+            self._entries.clear()
+            if base is not None:
+                base = None
+                version, found, results = self.index.search_candidates(query, limit)
+            self._version = version
+        if base is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._entries[key] = (tokens, found, limit, results, limit * CANDIDATE_FACTOR)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return results
+
+    def _narrowable(self, key: str, tokens: List[tuple]):
+        """The longest cached shorter query whose complete match set contains this query's"""
+        for end in range(len(key) - 1, 0, -1):
+            entry = self._entries.get(key[:end])
+            if entry is None:
+                continue
+            previous, found, _, _, want = entry
+            # an entry that stopped at `want` candidates may be missing matches
+            if len(found) < want and _refines(tokens, previous):
+                return entry
+        return None
+
+
+def _refines(tokens: List[tuple], previous: List[tuple]) -> bool:
+    """Whether every name matching tokens also matches previous"""
+    if len(tokens) < len(previous):
+        return False
+    return all(token.startswith(old_token) and key.startswith(old_key)
+               for (token, key), (old_token, old_key) in zip(tokens, previous))
@@ -0,0 +1,139 @@
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+# ISO 15919 romanization of the Tamil block.
+_VOWELS = {
+    "அ": "a", "ஆ": "ā", "இ": "i", "ஈ": "ī", "உ": "u", "ஊ": "ū",
+    "எ": "e", "ஏ": "ē", "ஐ": "ai", "ஒ": "o", "ஓ": "ō", "ஔ": "au",
+}
+_VOWEL_SIGNS = {
+    "ா": "ā", "ி": "i", "ீ": "ī", "ு": "u", "ூ": "ū", "ெ": "e",
+    "ே": "ē", "ை": "ai", "ொ": "o", "ோ": "ō", "ௌ": "au", "ௗ": "u",
+}
+_CONSONANTS = {
+    "க": "k", "ங": "ṅ", "ச": "c", "ஞ": "ñ", "ட": "ṭ", "ண": "ṇ",
+    "த": "t", "ந": "n", "ப": "p", "ம": "m", "ய": "y", "ர": "r",
+    "ல": "l", "வ": "v", "ழ": "ḻ", "ள": "ḷ", "ற": "ṟ", "ன": "ṉ",
+    "ஜ": "j", "ஷ": "ṣ", "ஸ": "s", "ஹ": "h", "ஶ": "ś",
+}
+_PULLI = "்"
+_AYTHAM = "ஃ"
+
+# Spelling variants that romanized Tamil is commonly typed with, folded to
+# one form. Tamil script doesn't distinguish voiced/unvoiced stops, so
+# "ragi" and "rāki" (ராகி) must meet at the same key.
+_DIGRAPHS = (
+    ("zh", "l"), ("th", "t"), ("dh", "t"), ("ch", "s"), ("sh", "s"),
+    ("ph", "p"), ("bh", "p"), ("kh", "k"), ("gh", "k"),
+    ("ee", "i"), ("oo", "u"),
+)
+_LETTERS = str.maketrans({
+    "g": "k", "b": "p", "d": "t", "j": "s", "c": "s", "z": "l",
+    "f": "p", "w": "v", "q": "k", "x": "ks",
+})
+_REPEATS = re.compile(r"(.)\1+")
+_GLOSS = re.compile(r"^(.*?)\s*\((.*)\)\s*$")
+
+
+def is_tamil(text: str) -> bool:
+    return any("஀" <= ch <= "௿" for ch in text)
+
+
+def graphemes(text: str) -> List[str]:
+    """Split text into user-perceived characters (base letter + its combining signs)."""
+    clusters: List[str] = []
+    for ch in text:
+        if clusters and (unicodedata.category(ch) in ("Mn", "Mc") or ch in "‌‍"):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+    return clusters
+
+
+def romanize(text: str, partial: bool = False) -> str:
+    """
+    ISO 15919 romanization of the Tamil letters in text; other characters pass through
+
+    With partial=True a trailing bare consonant gets no inherent vowel, so a
+    word that is still being typed ("ராக") is a prefix of the full word's
+    romanization ("rāki").
+    """
+    out = []
+    last = len(text) - 1
+    for i, ch in enumerate(text):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            following = text[i + 1] if i < last else ""
+            if following != _PULLI and following not in _VOWEL_SIGNS and not (partial and i == last):
+                out.append("a")
+        elif ch in _VOWEL_SIGNS:
+            out.append(_VOWEL_SIGNS[ch])
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch == _AYTHAM:
+            out.append("ḵ")
+        elif ch != _PULLI:
+            out.append(ch)
+    return "".join(out)
+
+
+def phonetic_key(text: str, partial: bool = False) -> str:
+    """
+    Loose ASCII key for matching romanized Tamil however it was spelt
+
+    "ragi maavu", "raagi mavu" and "ராகி மாவு" all map to "raki mavu".
+    """
+    decomposed = unicodedata.normalize("NFKD", romanize(text.casefold(), partial))
+    key = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    for digraph, replacement in _DIGRAPHS:
+        key = key.replace(digraph, replacement)
+    return _REPEATS.sub(r"\1", key.translate(_LETTERS))
+
+
+def split_gloss(name: str) -> Tuple[str, str]:
+    """Split "ராகி மாவு (Ragi flour)" into ("ராகி மாவு", "Ragi flour")."""
+    match = _GLOSS.match(name)
+    if match is None:
+        return name.strip(), ""
+    return match.group(1), match.group(2).strip()
+
+
+# Units that may follow (or precede) a quantity in a spoken/handwritten line,
+# e.g. "ராகி மாவு 2 கிலோ", "ragi 500g", "kambu x 3", mapped to the unit the
+# quantity is reported in and the factor that converts to it.
+_UNIT_SPELLINGS = {
+    ("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms", "கிலோ", "கி"): ("kg", 1),
+    ("g", "gm", "gms", "gram", "grams", "கிராம்"): ("kg", 0.001),
+    ("l", "ltr", "litre", "litres", "liter", "liters", "லிட்டர்"): ("l", 1),
+    ("ml", "millilitre", "millilitres", "milliliter", "milliliters", "மில்லி"): ("l", 0.001),
+    ("pkt", "pkts", "packet", "packets", "பாக்கெட்"): ("pkt", 1),
+    ("nos", "pcs", "x"): ("nos", 1),
+}
+_UNITS = {spelling: unit for spellings, unit in _UNIT_SPELLINGS.items() for spelling in spellings}
+_UNIT = "(?:{})".format("|".join(re.escape(unit) for unit in sorted(_UNITS, key=len, reverse=True)))
+_QUANTITY = re.compile(r"(?<!\S)(?:({unit})\s*)?(\d+(?:[.,]\d+)?)\s*({unit})?(?!\S)".format(unit=_UNIT), re.IGNORECASE)
+
+
+def parse_item_text(text: str) -> Tuple[str, Optional[float], Optional[str]]:
+    """
+    Split a free-text line into (item name, quantity, unit)
+
+    The last number in the line is the quantity. A unit written next to it
+    (kg, கிலோ, 500g, pkt, ...) is returned as kg, l, pkt or nos, with grams
+    and millilitres converted, so "ragi 500g" gives ("ragi", 0.5, "kg").
+    Tamil digits are accepted. quantity is None when the line has no
+    number, unit when no unit was written.
+    """
+    matches = list(_QUANTITY.finditer(text))
+    if not matches:
+        return " ".join(text.split()), None, None
+    last = matches[-1]
+    name = text[:last.start()] + " " + text[last.end():]
+    quantity = float(last.group(2).replace(",", "."))
+    spelling = last.group(3) or last.group(1)
+    unit = None
+    if spelling:
+        unit, factor = _UNITS[spelling.casefold()]
+        quantity = round(quantity * factor, 6)
+    return " ".join(name.split()), quantity, unit
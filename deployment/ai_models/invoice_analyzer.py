@@ -6,9 +6,9 @@ This would be deployed as a cloud service
 import base64
 import json
 import io
-from PIL import Image
-import cv2
-import numpy as np
+
+# PIL, cv2 and numpy are imported inside the methods that use them, so
+# importing this module (e.g. at API startup or in tooling) stays cheap.
 
 class InvoiceAnalyzer:
     """Production invoice analysis model"""
@@ -30,6 +30,9 @@ class InvoiceAnalyzer:
         Returns:
             Structured invoice data
         """
+        from PIL import Image
+        import cv2
+        import numpy as np
         try:
             # Decode image
             image_bytes = base64.b64decode(image_data)
@@ -55,6 +58,7 @@ class InvoiceAnalyzer:
     def detect_text_regions(self, image):
         """Detect text regions in invoice"""
         # In production, this would use EAST or similar text detection model
+        import cv2
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Apply threshold
@@ -0,0 +1,192 @@
+"""
+Stand-in for the AI services API (main.py) using only the standard library
+
+Serves the same routes with canned model results, so the desktop app's HTTP
+client can be exercised without FastAPI, PIL or the models installed. It
+can simulate network conditions: a delay on every new connection (the
+TCP + TLS setup a real deployment pays), a per-request delay, and a 503
+every Nth request to exercise client retries.
+
+Usage:
+    python deployment/api/standin.py --port 8000 --connect-ms 40 --latency-ms 5
+    AI_API_URL=http://127.0.0.1:8000 python -m business_management.main
+
+With --port 0 a free port is chosen; the first line printed is
+"listening on <url>".
+"""
+import argparse
+import gzip
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HANDWRITING_RESULTS = {
+    "tamil": {
+        "text": "நாட்டு சக்கரை",
+        "confidence": 0.92,
+        "language": "tamil",
+        "words": [
+            {"text": "நாட்டு", "confidence": 0.95, "bbox": [10, 20, 80, 45]},
+            {"text": "சக்கரை", "confidence": 0.89, "bbox": [85, 20, 150, 45]}
+        ]
+    },
+    "english": {
+        "text": "Country sugar",
+        "confidence": 0.88,
+        "language": "english",
+        "words": [
+            {"text": "Country", "confidence": 0.90, "bbox": [10, 20, 80, 45]},
+            {"text": "sugar", "confidence": 0.86, "bbox": [85, 20, 150, 45]}
+        ]
+    },
+}
+
+INVOICE_RESULT = {
+    "vendor": "SADHASIVA AGENCIES",
+    "invoice_number": "12345",
+    "date": "2025-01-15",
+    "customer": "",
+    "items": [
+        {"name": "நாட்டு சக்கரை", "quantity": 5, "unit": "kg", "rate": 45.0, "amount": 225.0},
+        {"name": "ராகி மாவு", "quantity": 2, "unit": "kg", "rate": 80.0, "amount": 160.0}
+    ],
+    "subtotal": 385.0,
+    "tax": 0.0,
+    "total": 385.0,
+    "confidence": 0.85
+}
+
+TRANSLATIONS = {
+    ("tamil", "english"): {"நாட்டு சக்கரை": "Country sugar", "ராகி": "Ragi", "கம்பு": "Pearl millet"},
+    ("english", "tamil"): {"Country sugar": "நாட்டு சக்கரை", "Ragi": "ராகி", "Pearl millet": "கம்பு"},
+}
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, connect_ms=0.0, latency_ms=0.0, fail_every=0):
+        super().__init__(address, StandinHandler)
+        self.connect_ms = connect_ms
+        self.latency_ms = latency_ms
+        self.fail_every = fail_every
+        self.counter_lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def handle_error(self, request, client_address):
+        # A client that timed out hangs up mid-response; that is not a server error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    # Like uvicorn: without TCP_NODELAY, Nagle's algorithm holds back the body
+    # written after the headers until the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+        if self.server.connect_ms:
+            time.sleep(self.server.connect_ms / 1000)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, status=200, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            data = gzip.compress(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_route(self, method):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)  # the upload; the canned results don't look at it
+        with self.server.counter_lock:
+            self.server.requests += 1
+            count = self.server.requests
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+        if self.server.fail_every and count % self.server.fail_every == 0:
+            return self.send_json({"detail": "Service temporarily unavailable"}, 503, [("Retry-After", "0")])
+
+        route = (method, url.path)
+        if route == ("GET", "/"):
+            return self.send_json({"message": "Business Management AI Services API"})
+        if route == ("GET", "/health"):
+            return self.send_json({"status": "healthy", "service": "AI Services API"})
+        if route == ("GET", "/stats"):
+            return self.send_json({"connections": self.server.connections, "requests": self.server.requests})
+        if route == ("POST", "/api/v1/handwriting/recognize"):
+            language = query.get("language", "auto")
+            if language == "auto":
+                language = "tamil"  # main.py returns the more confident of the two
+            return self.send_json(HANDWRITING_RESULTS.get(language, HANDWRITING_RESULTS["tamil"]))
+        if route == ("POST", "/api/v1/invoice/analyze"):
+            return self.send_json(INVOICE_RESULT)
+        if route == ("POST", "/api/v1/translate"):
+            if "text" not in query:
+                return self.send_json({"detail": "text is required"}, 422)
+            source, target = query.get("source_lang", "auto"), query.get("target_lang", "en")
+            return self.send_json({
+                "translated_text": TRANSLATIONS.get((source, target), {}).get(query["text"], query["text"]),
+                "source_language": source,
+                "target_language": target,
+                "confidence": 0.95
+            })
+        return self.send_json({"detail": "Not Found"}, 404)
+
+    def do_GET(self):
+        self.handle_route("GET")
+
+    def do_POST(self):
+        self.handle_route("POST")
+
+def start(host="127.0.0.1", port=0, **options) -> StandinServer:
+    """Start a stand-in server on a background thread; stop it with shutdown()"""
+    server = StandinServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the AI API routes with canned results")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="0 picks a free port")
+    parser.add_argument("--connect-ms", type=float, default=0.0, help="Delay on every new connection")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay on every request")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with 503")
+    args = parser.parse_args(argv)
+
+    server = StandinServer((args.host, args.port), connect_ms=args.connect_ms,
+                           latency_ms=args.latency_ms, fail_every=args.fail_every)
+    print(f"listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Bills read back column by column (get_bills_columnar) equal the same bills from get_bill
+
+Usage:
+    python -m unittest tests.test_bill_batch
+"""
+import os
+import tempfile
+import unittest
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+from business_management.models.bill import Bill, BillBatch, LineItem
+
+class BillBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.folder.name, "bills.db")
+        self.db = DBManager(self.db_path)
+
+    def tearDown(self):
+        ConnectionPool.for_path(self.db_path).close()
+        self.folder.cleanup()
+
+    def test_matches_get_bill(self):
+        bills = [
+            Bill(None, "kvs", "2024-04-01", [LineItem("Ragi", 4050, 2, 8100), LineItem("Salt", 1000, 0.5, 500)],
+                 8600, "Debit"),
+            # A credit, as the bill generators save it: one line carrying the remarks
+            Bill(None, "kvs", "2024-04-02", [LineItem("Cash", 0, 0, 50000, "Credit", "Cash")],
+                 50000, "Credit", "Cash"),
+            Bill(None, "sri", "2024-04-02", [], 0, "Debit", "no lines"),
+        ]
+        for bill in bills:
+            self.db.save_bill(bill)
+        batch = self.db.get_bills_columnar("2024-04-01", "2024-04-30")
+        self.assertEqual(len(batch), len(bills))
+        for row in range(len(batch)):
+            number = batch.bill_numbers[row]
+            self.assertEqual(batch.bill(row), self.db.get_bill(number))
+        credit = batch.bill(1)
+        self.assertEqual(credit.items[0].remarks, "Cash")
+
+    def test_non_iso_date_kept(self):
+        batch = BillBatch()
+        batch.add_bill(1, "kvs", "", 100, "Debit", None)
+        batch.add_bill(2, "kvs", "05-03-2024", 100, "Debit", None)
+        batch.add_bill(3, "kvs", "2024-03-05", 100, "Debit", None)
+        self.assertEqual([bill.date for bill in batch], ["", "05-03-2024", "2024-03-05"])
+
+if __name__ == "__main__":
+    unittest.main()
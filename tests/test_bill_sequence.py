@@ -0,0 +1,104 @@
+"""
+Stress test of bill number allocation with many writer processes on one bills.db
+
+Each spawned process saves bills with bill_number=None (one at a time and
+in batches) and reserves blocks of numbers, all at once against the same
+fresh database. Every number handed out must be unique, together they
+must be contiguous from 1, and the ledger must balance against the saved
+bills. Scale it with BILL_SEQUENCE_PROCESSES and BILL_SEQUENCE_SAVES.
+
+Usage:
+    python -m unittest tests.test_bill_sequence
+    BILL_SEQUENCE_PROCESSES=16 BILL_SEQUENCE_SAVES=300 python -m unittest tests.test_bill_sequence
+"""
+import multiprocessing
+import os
+import tempfile
+import unittest
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+from business_management.models.bill import Bill, LineItem
+
+PROCESSES = int(os.environ.get("BILL_SEQUENCE_PROCESSES", "8"))
+SAVES = int(os.environ.get("BILL_SEQUENCE_SAVES", "100"))
+# Every RESERVE_EVERY saves a worker also reserves RESERVE_COUNT numbers and saves a batch of BATCH_SIZE
+RESERVE_EVERY = 25
+RESERVE_COUNT = 5
+BATCH_SIZE = 10
+AMOUNT = 1234  # paise per bill, so the ledger total is easy to check
+
+def new_bill(worker: int) -> Bill:
+    return Bill(None, f"customer{worker}", "2024-04-01", [LineItem("item", AMOUNT, 1, AMOUNT)], AMOUNT, "Debit")
+
+def writer(db_path: str, worker: int, start, results):
+    """Runs in a spawned process: the numbers it saved and the numbers it reserved"""
+    db = DBManager(db_path)
+    saved, reserved = [], []
+    start.wait()
+    for count in range(1, SAVES + 1):
+        bill = new_bill(worker)
+        db.save_bill(bill)
+        saved.append(bill.bill_number)
+        if count % RESERVE_EVERY == 0:
+            reserved.extend(db.reserve_bill_numbers(RESERVE_COUNT))
+            batch = [new_bill(worker) for _ in range(BATCH_SIZE)]
+            db.save_bills(batch)
+            saved.extend(bill.bill_number for bill in batch)
+    results.put((saved, reserved))
+
+class BillSequenceStressTest(unittest.TestCase):
+
+    def test_concurrent_writers(self):
+        with tempfile.TemporaryDirectory() as folder:
+            db_path = os.path.join(folder, "bills.db")
+            db = DBManager(db_path)  # migrate once up front, like the app does on startup
+            # spawn, as on Windows and in BatchScanner: nothing is inherited from this process
+            context = multiprocessing.get_context("spawn")
+            start = context.Event()
+            results = context.Queue()
+            workers = [context.Process(target=writer, args=(db_path, worker, start, results))
+                       for worker in range(PROCESSES)]
+            for process in workers:
+                process.start()
+            start.set()
+            outcomes = [results.get(timeout=300) for _ in workers]
+            for process in workers:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+            saved = [number for numbers, _ in outcomes for number in numbers]
+            reserved = [number for _, numbers in outcomes for number in numbers]
+            handed_out = saved + reserved
+            self.assertEqual(len(set(handed_out)), len(handed_out), "a bill number was handed out twice")
+            self.assertEqual(sorted(handed_out), list(range(1, len(handed_out) + 1)))
+            self.assertEqual(db.peek_next_bill_number(), len(handed_out) + 1)
+
+            self.assertEqual(sorted(db.get_bill_numbers()), sorted(saved))
+            self.assertEqual(db.get_ledger_totals("2024-04-01", "2024-04-01"), (AMOUNT * len(saved), 0))
+            ConnectionPool.for_path(db_path).close()
+
+    def test_skipped_bills_use_no_numbers(self):
+        with tempfile.TemporaryDirectory() as folder:
+            db_path = os.path.join(folder, "bills.db")
+            db = DBManager(db_path)
+            db.save_bill(new_bill(0))
+            unreadable = new_bill(0)
+            unreadable.date = "someday"
+            taken = new_bill(0)
+            taken.bill_number = 1
+            ahead = new_bill(0)
+            ahead.bill_number = 4
+            batch = [new_bill(0), unreadable, taken, new_bill(0), ahead, new_bill(0)]
+            result = db.save_bills(batch)
+            self.assertEqual(result.saved, 4)
+            self.assertEqual([number for number, _ in result.conflicts], [None, 1])
+            # Numbered bills keep theirs; the rest follow the highest, skipped bills take none
+            self.assertEqual(sorted(db.get_bill_numbers()), [1, 4, 5, 6, 7])
+            self.assertEqual([batch[i].bill_number for i in (0, 3, 5)], [5, 6, 7])
+            self.assertEqual(db.peek_next_bill_number(), 8)
+            db.save_bill(new_bill(0))
+            self.assertEqual(sorted(db.get_bill_numbers())[-1], 8)
+            ConnectionPool.for_path(db_path).close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Date range queries use the (customer_key, date) and date indexes, at 1M bills
+
+Every statement the range queries actually run is captured with a trace
+callback and run again under EXPLAIN QUERY PLAN, before and after
+ANALYZE (the pool runs PRAGMA optimize on close, which can add
+statistics and change plans). No plan may scan bills. Set
+DATE_INDEX_TEST_BILLS to change the table size.
+
+Usage:
+    python -m unittest tests.test_date_index
+"""
+import os
+import tempfile
+import unittest
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+
+BILLS = int(os.environ.get("DATE_INDEX_TEST_BILLS", "1000000"))
+
+class DateIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.folder.name, "bills.db")
+        cls.db = DBManager(cls.db_path)
+        with ConnectionPool.for_path(cls.db_path).transaction() as conn:
+            # 50 customers over ten years, generated in SQL: save_bills would take a while at this size
+            conn.execute('''
+                WITH RECURSIVE n (i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                INSERT INTO bills (bill_number, customer_key, date, total_paise, transaction_type, remarks)
+                SELECT i, 'customer' || (i % 50), date('2015-01-01', '+' || (i * 7 % 3650) || ' days'),
+                       i % 100000, CASE WHEN i % 5 THEN 'Debit' ELSE 'Credit' END, ''
+                FROM n
+            ''', (BILLS,))
+
+    @classmethod
+    def tearDownClass(cls):
+        ConnectionPool.for_path(cls.db_path).close()
+        cls.folder.cleanup()
+
+    def range_queries(self):
+        """(description, call) for every date range query on bills"""
+        db = self.db
+        return [
+            ("get_bills", lambda: db.get_bills("2019-03-01", "2019-03-31")),
+            ("get_bills customer", lambda: db.get_bills("2019-03-01", "2019-03-31", "customer7")),
+            ("get_bills_columnar", lambda: db.get_bills_columnar("2019-03-01", "2019-03-31")),
+            ("get_bills_columnar customer", lambda: db.get_bills_columnar("2019-03-01", "2019-03-31", "customer7")),
+            ("iter_bills", lambda: list(db.iter_bills("2019-03-01", "2019-03-31"))),
+            ("iter_bills customer", lambda: list(db.iter_bills("2019-03-01", "2019-03-31", "customer7"))),
+            ("get_total_amount", lambda: db.get_total_amount("2019-03-01", "2019-03-31")),
+            ("get_total_amount type", lambda: db.get_total_amount("2019-03-01", "2019-03-31", "Debit")),
+            ("get_product_sales", lambda: db.get_product_sales("2019-03-01", "2019-03-31")),
+        ]
+
+    def traced(self, call):
+        """The statements call runs that read bills, with their parameters filled in"""
+        conn = ConnectionPool.for_path(self.db_path).connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            conn.set_trace_callback(None)
+        return [sql for sql in statements if "FROM bills" in sql or "JOIN bills" in sql]
+
+    def check_plans(self):
+        conn = ConnectionPool.for_path(self.db_path).connection()
+        for name, call in self.range_queries():
+            statements = self.traced(call)
+            self.assertTrue(statements, name)
+            for sql in statements:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+                with self.subTest(query=name, sql=sql):
+                    bills = [step for step in plan if step.split()[1:2] in (["bills"], ["b"])]
+                    self.assertTrue(bills, plan)
+                    for step in bills:
+                        self.assertTrue(step.startswith("SEARCH") and "idx_bills_" in step and "date" in step, plan)
+
+    def test_plans(self):
+        self.check_plans()
+
+    def test_plans_with_statistics(self):
+        ConnectionPool.for_path(self.db_path).connection().execute("ANALYZE")
+        try:
+            self.check_plans()
+        finally:
+            ConnectionPool.for_path(self.db_path).connection().execute("DROP TABLE sqlite_stat1")
+
+if __name__ == "__main__":
+    unittest.main()
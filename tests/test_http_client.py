@@ -0,0 +1,111 @@
+"""
+Which failures HttpTransport sends a request again after, against a local stub server
+
+A POST must never reach the server twice: the stub counts the requests it
+read, so a connection dropped after the body or a proxy's 502 must leave
+the count at one, while a GET is retried and a refused connection or a
+503 is safe to retry for either.
+
+Usage:
+    python -m unittest tests.test_http_client
+"""
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from business_management.services.http_client import HttpTransport
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Reads the request body, counts it, then does what the path says"""
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.seen.append((self.command, self.path))
+        if self.path == "/drop":
+            # The server got the whole request, then the connection goes before any response
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        status = int(self.path.strip("/")) if self.path.strip("/").isdigit() else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class RetryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.seen = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.seen.clear()
+        self.transport = HttpTransport(self.base_url, retries=3, backoff=0.001)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_post_not_resent_after_dropped_connection(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.post("/drop", json={"image": "x" * 10000})
+        self.assertEqual(self.server.seen, [("POST", "/drop")])
+
+    def test_get_resent_after_dropped_connection(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.get("/drop")
+        self.assertEqual(len(self.server.seen), 4)
+
+    def test_post_not_resent_after_bad_gateway(self):
+        for status in ("502", "504"):
+            self.server.seen.clear()
+            with self.assertRaises(requests.HTTPError):
+                self.transport.post("/" + status, json={})
+            self.assertEqual(len(self.server.seen), 1, status)
+
+    def test_post_resent_after_unavailable(self):
+        for status in ("429", "503"):
+            self.server.seen.clear()
+            with self.assertRaises(requests.HTTPError):
+                self.transport.post("/" + status, json={})
+            self.assertEqual(len(self.server.seen), 4, status)
+
+    def test_post_resent_after_refused_connection(self):
+        # A port nothing listens on: the connection is never made
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        transport = HttpTransport(f"http://127.0.0.1:{port}", retries=3, backoff=0.001)
+        attempts = []
+        session = transport._session()
+        send = session.request
+        session.request = lambda *args, **kwargs: attempts.append(args) or send(*args, **kwargs)
+        with self.assertRaises(requests.ConnectionError):
+            transport.post("/invoice/analyze", json={})
+        self.assertEqual(len(attempts), 4)
+        transport.close()
+
+    def test_success(self):
+        self.assertEqual(self.transport.post("/invoice/analyze", json={}), {"ok": True})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Product search returns the best ranked prefix matches, the same as ranking every name
+
+Random names (Tamil and romanized words, some repeated so popular
+prefixes have long posting lists) are indexed; some are added after the
+first queries and some removed. For every query the prefix-match
+candidates and the top results are compared with a brute-force ranking
+of all names, and the completer cache typing the query one key at a time
+must return what the index does. Set PRODUCT_INDEX_TEST_SEED to try other
+seeds.
+
+Usage:
+    python -m unittest tests.test_product_index
+"""
+import os
+import random
+import re
+import unittest
+from business_management.utils.product_index import CANDIDATE_FACTOR, CompletionCache, ProductSearchIndex
+from business_management.utils.transliteration import phonetic_key
+
+SEED = int(os.environ.get("PRODUCT_INDEX_TEST_SEED", "10"))
+WORDS = ("ragi", "raagi", "rava", "rasam", "kambu", "kollu", "maavu", "mavu", "flour", "rice", "red",
+         "ராகி", "மாவு", "கம்பு", "சோளம்", "அரிசி", "sugar", "salt", "samba", "sattu")
+LIMIT = 10
+
+def words(text: str):
+    return [word for word in re.split(r"[\s()\[\],./-]+", text.casefold()) if word]
+
+def random_name(rng: random.Random, number: int) -> str:
+    parts = [rng.choice(WORDS) if rng.random() < 0.7 else "".join(rng.choice("abcdegiklmnoprsuv")
+             for _ in range(rng.randint(2, 8))) for _ in range(rng.randint(1, 4))]
+    return " ".join(parts) + f" {number}"
+
+class ProductIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(SEED)
+        self.names = [random_name(self.rng, number) for number in range(3000)]
+        self.index = ProductSearchIndex(self.names[:2000])
+
+    def expected(self, query: str):
+        """Every name the query's words prefix, best ranked first, by checking all of them"""
+        tokens = [(word, phonetic_key(word, partial=True)) for word in words(query)]
+        ranked = []
+        for order, name in enumerate(self.index.names()):
+            name_words = words(name)
+            keys = [phonetic_key(word) for word in name_words]
+
+            def position(token, key):
+                return next((i for i, word in enumerate(name_words)
+                             if word.startswith(token) or key and keys[i].startswith(key)), None)
+            if all(position(token, key) is not None for token, key in tokens):
+                ranked.append((position(*tokens[0]), len(name), order, name))
+        return [name for *_, name in sorted(ranked)]
+
+    def queries(self):
+        for name in self.rng.sample(self.index.names(), 40):
+            first = words(name)[0]
+            yield first[:self.rng.randint(1, len(first))]
+        for _ in range(40):
+            yield " ".join(self.rng.choice(WORDS)[:self.rng.randint(1, 4)] for _ in range(self.rng.randint(1, 3)))
+        yield from ("r", "ra", "ம", "ragi ma", "raagi", "maavu ragi", "rice red", "kambu 1")
+
+    def check(self):
+        cache = CompletionCache(self.index)
+        for query in self.queries():
+            expected = self.expected(query)
+            _, found, results = self.index.search_candidates(query, LIMIT)
+            with self.subTest(query=query):
+                self.assertEqual([self.index._names[pid] for pid in found], expected[:LIMIT * CANDIDATE_FACTOR])
+                self.assertEqual(results[:len(expected)], expected[:LIMIT])
+                for end in range(1, len(query) + 1):
+                    self.assertEqual(cache.search(query[:end], LIMIT), self.index.search(query[:end], LIMIT))
+
+    def test_best_matches_first(self):
+        self.check()
+
+    def test_after_changes(self):
+        self.check()
+        for name in self.names[2000:]:
+            self.index.add(name)
+        for name in self.rng.sample(self.names, 500):
+            self.index.remove(name)
+        self.check()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Scanned invoice lines from unvalidated model JSON, and to_paise on bad amounts
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m unittest tests.test_scanned_invoice
+"""
+import os
+import unittest
+from business_management.models.bill import LineItem
+from business_management.utils.money import to_paise
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+class ToPaiseTest(unittest.TestCase):
+
+    def test_amounts(self):
+        self.assertEqual(to_paise("1,234.565"), 123457)
+        self.assertEqual(to_paise("₹120"), 12000)
+        self.assertEqual(to_paise("₹-0.50"), -50)
+        self.assertEqual(to_paise(0.285), 29)
+
+    def test_not_amounts(self):
+        for value in (None, "", "abc", "1e", "NaN", "Infinity", [1]):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                to_paise(value)
+
+class ScannedItemTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from business_management.ui.enhanced_bill_generator import EnhancedBillGeneratorWidget
+        cls.scanned_item = staticmethod(EnhancedBillGeneratorWidget.scanned_item)
+
+    def test_line(self):
+        self.assertEqual(self.scanned_item({"name": "Ragi", "rate": "₹120", "quantity": "2", "amount": 240}),
+                         LineItem("Ragi", 12000, 2, 24000))
+        self.assertEqual(self.scanned_item({"name": "Ragi", "rate": 40.5, "quantity": 0.5, "amount": 20.25}),
+                         LineItem("Ragi", 4050, 0.5, 2025))
+
+    def test_unreadable_lines(self):
+        for item_data in ({"name": "Ragi", "rate": None}, {"name": "Ragi", "amount": "twelve"},
+                          {"name": "Ragi", "quantity": "two"}, {"name": "Ragi", "quantity": None},
+                          {"name": "Ragi", "quantity": float("nan")}):
+            with self.subTest(item=item_data), self.assertRaises(ValueError):
+                self.scanned_item(item_data)
+
+if __name__ == "__main__":
+    unittest.main()
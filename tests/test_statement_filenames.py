@@ -0,0 +1,25 @@
+"""
+Batch statement file names stay inside the output folder and differ per customer
+
+Usage:
+    python -m unittest tests.test_statement_filenames
+"""
+import unittest
+from business_management.batch_statements import statement_filenames
+
+class StatementFilenamesTest(unittest.TestCase):
+
+    def test_safe_and_unique(self):
+        customers = ["kvs", "KVS", "../kvs", "a/b", "a?b", "a_b", "..", "ராகி", "kvs"]
+        filenames = statement_filenames(customers, "2025-06-01", "2025-06-30")
+        self.assertEqual(set(filenames), set(customers))
+        self.assertEqual(filenames["kvs"], "statement_kvs_2025-06-01_to_2025-06-30.html")
+        self.assertEqual(filenames["a_b"], "statement_a_b_2025-06-01_to_2025-06-30.html")
+        for key, filename in filenames.items():
+            with self.subTest(key=key):
+                self.assertRegex(filename, r"^statement_[\w.-]+\.html$")
+        names = [filename.casefold() for filename in filenames.values()]
+        self.assertEqual(len(names), len(set(names)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Randomized checks that statement totals and balances match the bill lines, to the paisa
+
+Random bills (fractional quantities, odd prices, debits and credits, some
+soft-deleted) are saved to a throwaway database, and every figure a
+statement shows is compared with a brute-force sum over the bills kept in
+Python. The seed is fixed so a failure reproduces; set STATEMENT_TEST_SEED
+to try others.
+
+Usage:
+    python -m unittest tests.test_statement_totals
+"""
+import datetime
+import os
+import random
+import tempfile
+import unittest
+from business_management.database.connection_pool import ConnectionPool
+from business_management.database.db_manager import DBManager
+from business_management.models.bill import Bill, LineItem
+from business_management.services.statement_service import StatementService
+from business_management.utils.money import format_amount, line_total, to_paise
+
+SEED = int(os.environ.get("STATEMENT_TEST_SEED", "15"))
+CUSTOMERS = ("kvs", "anand", "sri", "ravi", "meena")
+FIRST_DAY = datetime.date(2024, 1, 1)
+DAYS = 120
+
+def random_date(rng: random.Random) -> str:
+    return (FIRST_DAY + datetime.timedelta(days=rng.randrange(DAYS))).isoformat()
+
+def random_quantity(rng: random.Random):
+    # Whole units, or grams/millilitres as three-decimal fractions of a kg/l
+    if rng.random() < 0.5:
+        return rng.randint(1, 50)
+    return round(rng.uniform(0.001, 25), 3)
+
+def random_bill(rng: random.Random) -> Bill:
+    items = []
+    for _ in range(rng.randint(1, 6)):
+        price = to_paise(f"{rng.randint(0, 5000)}.{rng.randint(0, 99):02d}")
+        quantity = random_quantity(rng)
+        items.append(LineItem(f"item{rng.randrange(40)}", price, quantity, line_total(price, quantity)))
+    transaction_type = "Debit" if rng.random() < 0.7 else "Credit"
+    remarks = "" if transaction_type == "Debit" else rng.choice(("Cash", "UPI", "Cheque"))
+    return Bill(None, rng.choice(CUSTOMERS), random_date(rng), items,
+                sum(item.total for item in items), transaction_type, remarks)
+
+def signed(bill: Bill) -> int:
+    return bill.total_amount if bill.transaction_type == "Debit" else -bill.total_amount
+
+class StatementTotalsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = random.Random(SEED)
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.folder.name, "bills.db")
+        cls.db = DBManager(cls.db_path)
+
+        bills = [random_bill(cls.rng) for _ in range(1500)]
+        # Both write paths: one at a time, and batched
+        for bill in bills[:300]:
+            cls.db.save_bill(bill)
+        result = cls.db.save_bills(bills[300:], batch_size=250)
+        assert result.saved == len(bills) - 300 and not result.conflicts
+
+        deleted = set(cls.db.delete_bills(cls.rng.sample([bill.bill_number for bill in bills], 150)))
+        # Restoring some puts them back into the ledger
+        for number in cls.rng.sample(sorted(deleted), 30):
+            assert cls.db.restore_bill(number)
+            deleted.discard(number)
+        cls.bills = [bill for bill in bills if bill.bill_number not in deleted]
+
+    @classmethod
+    def tearDownClass(cls):
+        ConnectionPool.for_path(cls.db_path).close()
+        cls.folder.cleanup()
+
+    def expected(self, start: str, end: str, customer_key=None):
+        """(opening, debit, credit, rows) by brute force over the kept bills"""
+        opening = debit = credit = rows = 0
+        for bill in self.bills:
+            if customer_key and bill.customer_key != customer_key:
+                continue
+            if bill.date < start:
+                opening += signed(bill)
+            elif bill.date <= end:
+                rows += 1
+                if bill.transaction_type == "Debit":
+                    debit += bill.total_amount
+                else:
+                    credit += bill.total_amount
+        return opening, debit, credit, rows
+
+    def random_range(self):
+        first, last = sorted((random_date(self.rng), random_date(self.rng)))
+        return first, last
+
+    def test_line_totals_add_up(self):
+        for bill in self.rng.sample(self.bills, 200):
+            saved = self.db.get_bill(bill.bill_number)
+            self.assertEqual(saved.items, bill.items)
+            self.assertEqual(saved.total_amount, sum(item.total for item in saved.items))
+            for item in saved.items:
+                self.assertEqual(item.total, line_total(item.price, item.quantity))
+
+    def test_ledger_matches_bills(self):
+        for _ in range(200):
+            start, end = self.random_range()
+            customer_key = self.rng.choice(CUSTOMERS + (None,))
+            opening, debit, credit, _ = self.expected(start, end, customer_key)
+            with self.subTest(start=start, end=end, customer=customer_key):
+                self.assertEqual(self.db.get_opening_balance(start, customer_key), opening)
+                self.assertEqual(self.db.get_ledger_totals(start, end, customer_key), (debit, credit))
+
+    def test_ledger_rows(self):
+        expected = {}
+        for bill in self.bills:
+            debit, credit = expected.get((bill.customer_key, bill.date), (0, 0))
+            if bill.transaction_type == "Debit":
+                debit += bill.total_amount
+            else:
+                credit += bill.total_amount
+            expected[(bill.customer_key, bill.date)] = (debit, credit)
+        balances, rows = {}, {}
+        for (customer_key, date), (debit, credit) in sorted(expected.items()):
+            balances[customer_key] = balances.get(customer_key, 0) + debit - credit
+            if debit or credit:  # the ledger drops days that net to nothing posted
+                rows[(customer_key, date)] = (debit, credit, balances[customer_key])
+        conn = ConnectionPool.for_path(self.db_path).connection()
+        saved = {(row[0], row[1]): row[2:] for row in conn.execute(
+            "SELECT customer_key, date, debit_paise, credit_paise, balance_paise FROM ledger_daily")}
+        self.assertEqual(saved, rows)
+
+    def test_statement_summary(self):
+        service = StatementService(self.db)
+        output_path = os.path.join(self.folder.name, "statement.html")
+        for _ in range(40):
+            start, end = self.random_range()
+            customer_key = self.rng.choice(CUSTOMERS + (None,))
+            opening, debit, credit, rows = self.expected(start, end, customer_key)
+            summary = service.render(output_path, start, end, customer_key, chunk_size=self.rng.randint(1, 500))
+            with self.subTest(start=start, end=end, customer=customer_key):
+                if not rows:
+                    self.assertIsNone(summary)
+                    continue
+                self.assertEqual(summary["rows"], rows)
+                self.assertEqual(summary["opening_balance"], opening)
+                self.assertEqual((summary["total_debit"], summary["total_credit"]), (debit, credit))
+                self.assertEqual(summary["closing_balance"], opening + debit - credit)
+
+    def test_amounts_round_trip(self):
+        for _ in range(5000):
+            paise = self.rng.randint(-10 ** 12, 10 ** 12)
+            self.assertEqual(to_paise(format_amount(paise)), paise)
+
+if __name__ == "__main__":
+    unittest.main()